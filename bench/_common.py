@@ -0,0 +1,32 @@
+# _common.py
+"""
+Shared setup for the benchmarks that draw with framebuf.
+
+Importing it puts the repository on sys.path and, on the host, the
+simulator's framebuf (sim/) after it. That one is pure Python, so only
+times taken on the device count. On the device the modules live in /,
+so copy this file there with them.
+"""
+import sys
+import time
+
+try:
+    import os.path
+    REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, REPO)
+    sys.path.append(os.path.join(REPO, 'sim'))     # framebuf on the host
+except ImportError:
+    pass  # on the device the modules live in /
+
+
+def ticks_us():
+    if hasattr(time, 'ticks_us'):
+        return time.ticks_us()
+    return int(time.perf_counter() * 1000000)
+
+
+def elapsed(start):
+    """Microseconds since a ticks_us() reading"""
+    if hasattr(time, 'ticks_diff'):
+        return time.ticks_diff(time.ticks_us(), start)
+    return ticks_us() - start
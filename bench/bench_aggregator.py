@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for iss_aggregator.py with hundreds of simulated trackers.
+
+Starts a fake Open Notify server on localhost and then compares two setups:
+  direct     every subscriber polls the upstream itself (today's fleet)
+  aggregator one poll per round, fanned out over multicast on 127.0.0.1
+
+Usage:
+    python bench/bench_aggregator.py
+    python bench/bench_aggregator.py --subscribers 500 --rounds 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import iss_packet
+from iss_aggregator import Aggregator, http_get_json, multicast_socket
+
+GROUP = "239.255.43.99"
+PORT = 55440
+BODY = (b'{"iss_position": {"longitude": "-112.4718", "latitude": "-41.7093"}, '
+        b'"message": "success", "timestamp": 1729350123}')
+
+
+class FakeUpstream:
+    def __init__(self):
+        self.requests = 0
+
+    async def handle(self, reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        self.requests += 1
+        writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\n\r\n" + BODY)
+        await writer.drain()
+        writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0, backlog=1024)
+        return f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}/iss-now.json"
+
+
+class Subscriber(asyncio.DatagramProtocol):
+    def __init__(self, sent_at, latencies):
+        self.sent_at = sent_at
+        self.latencies = latencies
+        self.received = 0
+
+    def datagram_received(self, data, addr):
+        packet = iss_packet.unpack(data)
+        if packet and packet[0] == iss_packet.KIND_FIX:
+            self.received += 1
+            self.latencies.append(time.perf_counter() - self.sent_at[packet[1]])
+
+
+async def run_direct(url, subscribers, rounds):
+    upstream_before = time.perf_counter()
+    round_times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        results = await asyncio.gather(*(http_get_json(url) for _ in range(subscribers)),
+                                       return_exceptions=True)
+        round_times.append(time.perf_counter() - start)
+        failures = sum(isinstance(r, Exception) for r in results)
+        if failures:
+            print(f"  direct: {failures} failed requests")
+    return round_times, time.perf_counter() - upstream_before
+
+
+async def run_aggregator(url, subscribers, rounds):
+    loop = asyncio.get_running_loop()
+    aggregator = Aggregator(GROUP, PORT, interval=0, interface="127.0.0.1",
+                            iss_url=url, location_url=None)
+    await aggregator.start()
+
+    sent_at = {}
+    latencies = []
+    publish = aggregator.publish
+
+    def timed_publish(kind, timestamp, lat, lon):
+        sent_at[(aggregator.seq + 1) & 0xFFFF] = time.perf_counter()
+        publish(kind, timestamp, lat, lon)
+    aggregator.publish = timed_publish
+
+    subs = []
+    for _ in range(subscribers):
+        sock = multicast_socket(GROUP, PORT, "127.0.0.1")
+        _, protocol = await loop.create_datagram_endpoint(
+            lambda: Subscriber(sent_at, latencies), sock=sock)
+        subs.append(protocol)
+
+    round_times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await aggregator.poll_once()
+        await asyncio.sleep(0.05)   # let the datagrams drain
+        round_times.append(time.perf_counter() - start - 0.05)
+    aggregator.close()
+    received = sum(s.received for s in subs)
+    return round_times, latencies, received, aggregator.upstream_requests
+
+
+async def main_async(args):
+    upstream = FakeUpstream()
+    url = await upstream.start()
+
+    direct_times, _ = await run_direct(url, args.subscribers, args.rounds)
+    direct_requests = upstream.requests
+    upstream.requests = 0
+
+    agg_times, latencies, received, agg_requests = await run_aggregator(
+        url, args.subscribers, args.rounds)
+    expected = args.subscribers * args.rounds
+
+    print(f"{args.subscribers} subscribers, {args.rounds} rounds")
+    print(f"  direct:     {direct_requests:6d} upstream requests, "
+          f"{statistics.median(direct_times) * 1000:8.1f} ms median round")
+    print(f"  aggregator: {agg_requests:6d} upstream requests, "
+          f"{statistics.median(agg_times) * 1000:8.1f} ms median round, "
+          f"{received}/{expected} packets delivered")
+    if latencies:
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        print(f"  fan-out latency: p50 {p50:.2f} ms, p99 {p99:.2f} ms")
+    upstream.server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregator fan-out benchmark")
+    parser.add_argument("--subscribers", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=10)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
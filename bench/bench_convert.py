@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Speed of convert_screenshot.to_image: the NumPy path against the
+per-pixel loop it falls back to without NumPy, on a synthetic radar frame
+at a few saturations. The first NumPy call also builds the color table
+for that saturation and is shown separately; batches of screenshots pay
+it once. Checks that both give the same pixels. Host only.
+
+Usage:
+    python bench/bench_convert.py
+    python bench/bench_convert.py --repeat 20
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import convert_screenshot
+
+SIZE = 240
+
+
+def radar_frame():
+    buf = bytearray(SIZE * SIZE * 2)
+
+    def plot(x, y, color):
+        if 0 <= x < SIZE and 0 <= y < SIZE:
+            i = (y * SIZE + x) * 2
+            buf[i:i + 2] = color.to_bytes(2, "little")
+
+    for y in range(40, 200, 2):
+        for x in range(30 + (y % 60), 150 + (y % 40), 2):
+            plot(x, y, 0x2104)
+    for r in (30, 60, 90, 120):
+        for k in range(360):
+            a = math.radians(k)
+            plot(120 + int(r * math.cos(a)), 120 + int(r * math.sin(a)), 0x07E0)
+    for k in range(2000):       # every color the panel can show, along the trail
+        plot(120 + int(100 * math.sin(k * 0.013)), 120 + int(80 * math.sin(k * 0.021)), (k * 40503) & 0xFFFF)
+    return bytes(buf)
+
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        spent = time.perf_counter() - start
+        best = spent if best is None else min(best, spent)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark screenshot decoding")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per path, best kept (default: 5)")
+    args = parser.parse_args()
+
+    if convert_screenshot.np is None:
+        sys.exit("NumPy is required for this comparison: pip install numpy")
+    frame = radar_frame()
+    numpy_path = convert_screenshot.np
+    for saturation in (0.0, 0.3, 1.0):
+        start = time.perf_counter()
+        convert_screenshot.to_image(frame, saturation)
+        first = time.perf_counter() - start
+        fast = best_of(args.repeat, lambda: convert_screenshot.to_image(frame, saturation))
+        fast_img = convert_screenshot.to_image(frame, saturation)
+        convert_screenshot.np = None
+        try:
+            slow = best_of(args.repeat, lambda: convert_screenshot.to_image(frame, saturation))
+            slow_img = convert_screenshot.to_image(frame, saturation)
+        finally:
+            convert_screenshot.np = numpy_path
+        same = fast_img.tobytes() == slow_img.tobytes()
+        print(f"saturation {saturation:.1f}: loop {slow * 1000:7.1f} ms, numpy {fast * 1000:6.2f} ms "
+              f"({first * 1000:.2f} ms with the color table built), {slow / fast:5.0f}x faster, identical: {same}")
+
+
+if __name__ == "__main__":
+    main()
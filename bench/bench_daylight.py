@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Per-frame cost of the day/night overlay.
+
+Times one blit of the plain 1-bit map against one blit of the combined
+2-bit day/night map, and the incremental terminator update that runs once
+per frame (a refresh every minute, one sample row per frame). Needs
+framebuf (see _common.py), so time it on the device:
+
+    mpremote cp bench/_common.py world_map.py geometry.py orbit.py map_projection.py daylight.py :
+    mpremote run bench/bench_daylight.py
+"""
+
+from _common import ticks_us, elapsed
+import framebuf
+import map_projection
+import daylight
+from geometry import Observer
+
+NOW = 1729350000
+FRAMES = 200
+FPS = 20                # roughly what the tracker manages
+
+
+def main():
+    observer = Observer(40.7128, -74.0060)
+    start = ticks_us()
+    ring_table = map_projection.rings()
+    land = map_projection.build(observer, ring_table)
+    print(f"map build           {elapsed(start) / 1000:8.1f} ms (once per location)")
+
+    screen = framebuf.FrameBuffer(bytearray(240 * 240 * 2), 240, 240, framebuf.RGB565)
+    mono = framebuf.FrameBuffer(land, 240, 240, framebuf.MONO_HLSB)
+    mono_palette = framebuf.FrameBuffer(bytearray(4), 2, 1, framebuf.RGB565)
+    mono_palette.pixel(1, 0, 0x6631)
+    day_palette = framebuf.FrameBuffer(bytearray(8), 4, 1, framebuf.RGB565)
+    for i, color in enumerate((0, 0x6631, 0xC518, 0x4608)):
+        day_palette.pixel(i, 0, color)
+
+    overlay = daylight.Daylight(observer, land, ring_table)
+    start = ticks_us()
+    overlay.refresh(NOW)
+    refresh = elapsed(start)
+    print(f"full refresh        {refresh / 1000:8.1f} ms (first frame only)")
+
+    start = ticks_us()
+    for _ in range(FRAMES):
+        screen.blit(mono, 0, 0, 0, mono_palette)
+    mono_blit = elapsed(start) / FRAMES
+
+    start = ticks_us()
+    for _ in range(FRAMES):
+        screen.blit(overlay.fb, 0, 0, 0, day_palette)
+    day_blit = elapsed(start) / FRAMES
+
+    # Incremental refreshes: one step per frame with the clock at FPS
+    worst = 0
+    t = NOW + daylight.REFRESH
+    for _ in range(FRAMES):
+        start = ticks_us()
+        overlay.update(int(t))
+        worst = max(worst, elapsed(start))
+        t += 1 / FPS
+    steps = map_projection.SIZE // map_projection.STEP
+    amortized = refresh / (daylight.REFRESH * FPS)
+
+    print(f"mono map blit       {mono_blit / 1000:8.3f} ms/frame")
+    print(f"day/night blit      {day_blit / 1000:8.3f} ms/frame")
+    print(f"overlay extra blit  {(day_blit - mono_blit) / 1000:8.3f} ms/frame")
+    print(f"update step, worst  {worst / 1000:8.3f} ms ({steps} steps per refresh)")
+    print(f"update, amortized   {amortized / 1000:8.3f} ms/frame at {FPS} fps")
+
+
+if __name__ == "__main__":
+    main()
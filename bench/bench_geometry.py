@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Compare the tracker's original haversine range/bearing with
+geometry.Observer, one point at a time and through the batch project().
+
+Also checks the two agree. Runs on the host or on the device
+(`mpremote run bench/bench_geometry.py`).
+
+Usage:
+    python bench/bench_geometry.py
+"""
+
+import math
+import sys
+import time
+from array import array
+
+try:
+    import os.path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except ImportError:
+    pass  # on the device the modules live in /
+
+from geometry import Observer
+
+USER_LAT = 40.7128
+USER_LON = -74.0060
+POINTS = 500
+
+
+def haversine(lat, lon):
+    """calculate_position() as it was before geometry.py"""
+    earth_radius = 6371
+    iss_altitude = 408
+    obs_lat = math.radians(USER_LAT)
+    obs_lon = math.radians(USER_LON)
+    iss_lat = math.radians(lat)
+    iss_lon = math.radians(lon)
+    dlat = iss_lat - obs_lat
+    dlon = iss_lon - obs_lon
+    a = math.sin(dlat/2)**2 + \
+        math.cos(obs_lat) * math.cos(iss_lat) * \
+        math.sin(dlon/2)**2
+    great_circle_dist = 2 * earth_radius * math.asin(math.sqrt(max(min(a, 1), 0)))
+    slant_range = math.sqrt(great_circle_dist**2 + iss_altitude**2)
+    y = math.sin(dlon) * math.cos(iss_lat)
+    x = math.cos(obs_lat) * math.sin(iss_lat) - \
+        math.sin(obs_lat) * math.cos(iss_lat) * math.cos(dlon)
+    bearing = math.degrees(math.atan2(y, x)) % 360
+    return slant_range, bearing
+
+
+def timer():
+    if hasattr(time, 'ticks_us'):
+        return time.ticks_us()
+    return int(time.perf_counter() * 1000000)
+
+
+def elapsed(start):
+    if hasattr(time, 'ticks_diff'):
+        return time.ticks_diff(time.ticks_us(), start)
+    return timer() - start
+
+
+def main():
+    # A ground track-like spread of points
+    coords = array('f')
+    for i in range(POINTS):
+        coords.append(51.6 * math.sin(i * 0.05))
+        coords.append((i * 1.3) % 360 - 180)
+
+    observer = Observer(USER_LAT, USER_LON)
+
+    worst_range = worst_bearing = 0
+    for i in range(0, len(coords), 2):
+        r0, b0 = haversine(coords[i], coords[i + 1])
+        r1, b1 = observer.range_bearing(coords[i], coords[i + 1])
+        worst_range = max(worst_range, abs(r0 - r1))
+        worst_bearing = max(worst_bearing, abs((b0 - b1 + 180) % 360 - 180))
+    print(f"max difference: {worst_range:.3f} km, {worst_bearing:.4f} deg")
+
+    start = timer()
+    for i in range(0, len(coords), 2):
+        haversine(coords[i], coords[i + 1])
+    t_old = elapsed(start)
+
+    start = timer()
+    for i in range(0, len(coords), 2):
+        observer.range_bearing(coords[i], coords[i + 1])
+    t_new = elapsed(start)
+
+    start = timer()
+    for _ in range(POINTS):
+        observer.range_bearing(coords[0], coords[1])
+    t_memo = elapsed(start)
+
+    out = array('h', bytes(4 * POINTS))
+    start = timer()
+    observer.project(coords, out, max_range=12000)
+    t_batch = elapsed(start)
+
+    print(f"haversine       {t_old / POINTS:8.2f} us/point")
+    print(f"Observer        {t_new / POINTS:8.2f} us/point")
+    print(f"Observer (memo) {t_memo / POINTS:8.2f} us/call")
+    print(f"project()       {t_batch / POINTS:8.2f} us/point (to screen x, y)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Compare heap use of json.loads() against json_fields.FieldScanner for the
+two API responses the tracker parses.
+
+On the host (CPython) the peak heap growth per parse is taken from
+tracemalloc. On the device (`mpremote run bench/bench_json_fields.py`) the
+total bytes allocated per parse are counted with gc.mem_alloc() while the
+collector is disabled.
+
+Usage:
+    python bench/bench_json_fields.py
+"""
+
+import gc
+import io
+import json
+import sys
+import time
+
+try:
+    import os.path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except ImportError:
+    pass  # on the device the modules live in /
+
+from json_fields import FieldScanner
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+ISS_BODY = (b'{"iss_position": {"longitude": "-112.4718", "latitude": "-41.7093"}, '
+            b'"message": "success", "timestamp": 1729350123}')
+LOCATION_BODY = b'{"lat":40.7128,"lon":-74.006}'
+ROUNDS = 200
+# Bodies with values that are not numbers, and the lat, lon each must give
+# (None where the key has no number). A skipped value must not cost the
+# scanner its place, or every later key is lost.
+ODD_BODIES = (
+    (b'{"lat":"n/a","x":"a","lon":12.5}', (None, 12.5)),
+    (b'{"lat":"","x":"a","lon":12.5}', (None, 12.5)),
+    (b'{"lat":"12 km","x":"a","lon":-3}', (None, -3)),
+    (b'{"lat":"\\"q\\"","lon":null,"x":"lon","lon":"7"}', (None, 7)),
+    (b'{"lat":4.5e1,"lon":"-0.25"}', (45.0, -0.25)),
+)
+
+
+def parse_json(stream):
+    data = json.loads(stream.read())
+    if 'iss_position' in data:
+        return (float(data['iss_position']['latitude']),
+                float(data['iss_position']['longitude']),
+                data['timestamp'])
+    return data['lat'], data['lon']
+
+
+def make_scan(keys):
+    scanner = FieldScanner(keys)
+
+    def parse(stream):
+        scanner.scan(stream)
+        return scanner.values
+    return parse
+
+
+def now_us():
+    if hasattr(time, 'ticks_us'):
+        return time.ticks_us()
+    return int(time.perf_counter() * 1e6)
+
+
+def measure(parse, body):
+    """Return (heap bytes per parse, microseconds per parse)."""
+    streams = [io.BytesIO(body) for _ in range(ROUNDS)]
+    gc.collect()
+    if tracemalloc:
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        for s in streams:
+            parse(s)
+        heap = tracemalloc.get_traced_memory()[1] - base
+        tracemalloc.stop()
+    else:
+        gc.disable()
+        base = gc.mem_alloc()
+        for s in streams:
+            parse(s)
+        heap = (gc.mem_alloc() - base) // ROUNDS
+        gc.enable()
+
+    streams = [io.BytesIO(body) for _ in range(ROUNDS)]
+    gc.collect()
+    start = now_us()
+    for s in streams:
+        parse(s)
+    elapsed = now_us() - start
+    return heap, elapsed / ROUNDS
+
+
+def check():
+    """Values picked out of ODD_BODIES; True if all are as expected."""
+    scanner = FieldScanner((b'lat', b'lon'))
+    ok = True
+    for body, expected in ODD_BODIES:
+        scanner.scan(io.BytesIO(body))
+        got = tuple(v if scanner.found & (1 << k) else None for k, v in enumerate(scanner.values))
+        if got != expected:
+            print(f"FAIL {body}: {got}, expected {expected}")
+            ok = False
+    print(f"odd values        {'ok' if ok else 'FAILED'} ({len(ODD_BODIES)} bodies)")
+    return ok
+
+
+def main():
+    check()
+    kind = 'peak' if tracemalloc else 'allocated'
+    cases = (
+        ('iss-now', ISS_BODY, make_scan((b'latitude', b'longitude', b'timestamp'))),
+        ('ip-api', LOCATION_BODY, make_scan((b'lat', b'lon'))),
+    )
+    for name, body, scan in cases:
+        for label, parse in (('json.loads', parse_json), ('FieldScanner', scan)):
+            heap, us = measure(parse, body)
+            print(f"{name:8s} {label:13s} {heap:6d} bytes {kind}, {us:7.1f} us/parse")
+
+
+if __name__ == '__main__':
+    main()
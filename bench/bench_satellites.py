@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Cost of tracking 1 to 20 satellites with satellites.Registry.
+
+For each count this times the once-a-second batch update (propagate,
+project, touch the layer) and the per-frame draw (one layer blit). For
+comparison it also times drawing every trail and marker straight to the
+screen each frame, which grows with the number of objects. Needs framebuf
+(see _common.py), so time it on the device:
+
+    mpremote cp bench/_common.py orbit.py geometry.py trail.py satellites.py :
+    mpremote run bench/bench_satellites.py
+"""
+
+from _common import ticks_us, elapsed
+import framebuf
+import orbit
+import satellites
+from geometry import Observer
+
+LINE1 = "1 25544U 98067A   24293.50000000  .00020000  00000-0  35000-3 0  9991"
+LINE2 = "2 25544  51.6400 120.0000 0007000  60.0000 300.0000 15.50000000470000"
+COUNTS = (1, 2, 5, 10, 20)
+WARMUP = 300            # updates, 10 s apart, to grow the trails
+ROUNDS = 20
+
+
+def models(count):
+    """Copies of the ISS spread around in node and mean anomaly"""
+    out = []
+    for i in range(count):
+        node = f"{(120 + 37 * i) % 360:8.4f}"
+        anomaly = f"{(300 + 71 * i) % 360:8.4f}"
+        line2 = LINE2[:17] + node + LINE2[25:43] + anomaly + LINE2[51:]
+        out.append(orbit.SGP4(LINE1, line2, f"SAT{i}"))
+    return out
+
+
+def direct_draw(screen, registry):
+    """Every trail segment and marker drawn to the screen each frame"""
+    for obj in registry.objects:
+        trail, xy = obj.trail, obj.xy
+        for k in range(trail.count - 1):
+            i = trail.slot(k) * 2
+            j = trail.slot(k + 1) * 2
+            screen.line(xy[i], xy[i + 1], xy[j], xy[j + 1], 0xFFFF)
+        if obj.x >= 0:
+            screen.fill_rect(obj.x - 1, obj.y - 1, 3, 3, 0xFFFF)
+
+
+def main():
+    screen = framebuf.FrameBuffer(bytearray(240 * 240 * 2), 240, 240, framebuf.RGB565)
+    palette = framebuf.FrameBuffer(bytearray(8), 4, 1, framebuf.RGB565)
+    for i, color in enumerate((0xFF07, 0x1FF8, 0xE007)):
+        palette.pixel(i + 1, 0, color)
+    observer = Observer(40.7128, -74.0060)
+    base = orbit.SGP4(LINE1, LINE2).epoch
+
+    print("objects  update ms  frame ms  direct frame ms")
+    for count in COUNTS:
+        registry = satellites.Registry(observer, 12000)
+        registry.set_models(models(count))
+        for k in range(WARMUP):
+            registry.update(base + 10 * k)
+
+        start = ticks_us()
+        for k in range(ROUNDS):
+            registry.update(base + 10 * (WARMUP + k))
+        update = elapsed(start) / ROUNDS
+
+        start = ticks_us()
+        for _ in range(ROUNDS):
+            registry.draw(screen, palette)
+        frame = elapsed(start) / ROUNDS
+
+        start = ticks_us()
+        for _ in range(ROUNDS):
+            direct_draw(screen, registry)
+        direct = elapsed(start) / ROUNDS
+
+        print(f"{count:7d}  {update / 1000:9.2f}  {frame / 1000:8.2f}  {direct / 1000:15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Cost of a compressed screenshot as the frame loop sees it: the frame copy
+in start() and each step() of ROWS_PER_STEP rows, against writing the raw
+115200-byte frame in one go as the tracker used to.
+
+The frame is a synthetic radar (black, a dotted map drawn on every second
+pixel, rings and a trail), so the size is only a guide. The files use
+their own names and are deleted afterwards. Runs on the host or on the
+device:
+
+    mpremote cp rle565.py screenshots.py :
+    mpremote run bench/bench_screenshot.py
+"""
+
+import math
+import os
+import sys
+import time
+
+try:
+    import os.path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except ImportError:
+    pass  # on the device the modules live in /
+
+import rle565
+import screenshots
+
+SIZE = 240
+RAW_FILE = 'bench_screenshot.bin'
+
+
+def ticks_us():
+    if hasattr(time, 'ticks_us'):
+        return time.ticks_us()
+    return int(time.perf_counter() * 1000000)
+
+
+def elapsed(start):
+    if hasattr(time, 'ticks_diff'):
+        return time.ticks_diff(time.ticks_us(), start)
+    return ticks_us() - start
+
+
+def radar_frame():
+    buf = bytearray(SIZE * SIZE * 2)
+
+    def plot(x, y, color):
+        if 0 <= x < SIZE and 0 <= y < SIZE:
+            i = (y * SIZE + x) * 2
+            buf[i] = color & 0xFF
+            buf[i + 1] = color >> 8
+
+    for y in range(40, 200, 2):         # dotted land
+        for x in range(30 + (y % 60), 150 + (y % 40), 2):
+            plot(x, y, 0x2104)
+    for r in (30, 60, 90, 120):
+        for k in range(360):
+            a = math.radians(k)
+            plot(120 + int(r * math.cos(a)), 120 + int(r * math.sin(a)), 0x07E0)
+    for k in range(600):                # trail
+        plot(120 + int(100 * math.sin(k * 0.013)), 120 + int(80 * math.sin(k * 0.021)), 0xFFFF)
+    return buf
+
+
+def main():
+    frame = radar_frame()
+
+    start = ticks_us()
+    with open(RAW_FILE, 'wb') as f:
+        f.write(frame)
+    raw = elapsed(start)
+
+    writer = screenshots.ScreenshotWriter(SIZE, SIZE)
+    start = ticks_us()
+    if not writer.start(frame):
+        print("no room for a screenshot")
+        return
+    begin = elapsed(start)
+    worst = total = steps = 0
+    done = False
+    while not done:
+        start = ticks_us()
+        done = writer.step()
+        spent = elapsed(start)
+        worst = max(worst, spent)
+        total += spent
+        steps += 1
+    size = os.stat(writer.filename)[6]
+
+    print(f"raw write           {raw / 1000:8.2f} ms in one frame ({SIZE * SIZE * 2} bytes)")
+    print(f"start (frame copy)  {begin / 1000:8.2f} ms")
+    print(f"step ({screenshots.ROWS_PER_STEP} rows)       {total / steps / 1000:8.2f} ms average, "
+          f"{worst / 1000:.2f} ms worst, {steps} steps")
+    print(f"coded size          {size:8d} bytes, {SIZE * SIZE * 2 / size:.1f}x smaller")
+
+    with open(writer.filename, 'rb') as f:
+        assert rle565.decode(f.read())[2] == bytes(frame)
+    for path in (RAW_FILE, writer.filename):
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
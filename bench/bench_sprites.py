@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Per-frame cost of drawing the ISS icon along its heading.
+
+Times the old unrotated per-pixel draw, one blit from the pre-rotated
+sprite cache, and rotating the icon afresh every frame, which is what the
+cache avoids. Also reports the one-off cost of building the cache at
+startup. Needs framebuf (see _common.py), so time it on the device:
+
+    mpremote cp bench/_common.py iss_icon.py sprites.py :
+    mpremote run bench/bench_sprites.py
+"""
+
+import math
+
+from _common import ticks_us, elapsed
+import framebuf
+from iss_icon import image_data, IMAGE_WIDTH, IMAGE_HEIGHT
+from sprites import RotatedSprite
+
+FRAMES = 200
+
+
+def draw_unrotated(display, x, y):
+    for i in range(IMAGE_HEIGHT):
+        for j in range(IMAGE_WIDTH):
+            if image_data[i * IMAGE_WIDTH + j] == 0xFFFF:
+                display.pixel(x + j, y + i, 0xFFFF)
+
+
+def main():
+    screen = framebuf.FrameBuffer(bytearray(240 * 240 * 2), 240, 240, framebuf.RGB565)
+    palette = framebuf.FrameBuffer(bytearray(4), 2, 1, framebuf.RGB565)
+    palette.pixel(1, 0, 0xFFFF)
+
+    start = ticks_us()
+    sprite = RotatedSprite(image_data, IMAGE_WIDTH, IMAGE_HEIGHT)
+    print(f"build cache        {elapsed(start) / 1000:8.1f} ms (once at startup)")
+
+    start = ticks_us()
+    for k in range(FRAMES):
+        draw_unrotated(screen, 100, 100)
+    plain = elapsed(start) / FRAMES
+
+    start = ticks_us()
+    for k in range(FRAMES):
+        sprite.draw(screen, 120, 120, k * 1.8, palette)
+    cached = elapsed(start) / FRAMES
+
+    size = sprite.size
+    scratch = framebuf.FrameBuffer(bytearray((size + 7) // 8 * size), size, size,
+                                   framebuf.MONO_HLSB)
+    rounds = FRAMES // 10
+    start = ticks_us()
+    for k in range(rounds):
+        scratch.fill(0)
+        sprite._rotate(image_data, IMAGE_WIDTH, IMAGE_HEIGHT, 0xFFFF, math.radians(k * 1.8), scratch)
+        screen.blit(scratch, 110, 110, 0, palette)
+    live = elapsed(start) / rounds
+
+    print(f"unrotated pixels   {plain / 1000:8.3f} ms/frame")
+    print(f"cached heading     {cached / 1000:8.3f} ms/frame")
+    print(f"rotate each frame  {live / 1000:8.3f} ms/frame")
+
+
+if __name__ == "__main__":
+    main()
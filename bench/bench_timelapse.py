@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Cost of the time-lapse recorder as the frame loop sees it: the frame copy
+in start() and each step() of ROWS_PER_STEP rows, for a keyframe and for
+the deltas after it, plus the size of each record.
+
+Between captures the synthetic radar gains some trail and the sweep moves
+on, about what five minutes add. The container uses its own names and is
+deleted afterwards. Runs on the host or on the device:
+
+    mpremote cp rle565.py timelapse.py :
+    mpremote run bench/bench_timelapse.py
+"""
+
+import math
+import os
+import sys
+import time
+
+try:
+    import os.path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except ImportError:
+    pass  # on the device the modules live in /
+
+import timelapse
+
+SIZE = 240
+PATH = 'bench_timelapse.bin'
+OLD_PATH = 'bench_timelapse.old'
+CAPTURES = 4
+
+
+def ticks_us():
+    if hasattr(time, 'ticks_us'):
+        return time.ticks_us()
+    return int(time.perf_counter() * 1000000)
+
+
+def elapsed(start):
+    if hasattr(time, 'ticks_diff'):
+        return time.ticks_diff(time.ticks_us(), start)
+    return ticks_us() - start
+
+
+def plot(buf, x, y, color):
+    if 0 <= x < SIZE and 0 <= y < SIZE:
+        i = (y * SIZE + x) * 2
+        buf[i] = color & 0xFF
+        buf[i + 1] = color >> 8
+
+
+def main():
+    buf = bytearray(SIZE * SIZE * 2)
+    for y in range(40, 200, 2):         # dotted land
+        for x in range(30 + (y % 60), 150 + (y % 40), 2):
+            plot(buf, x, y, 0x2104)
+    for r in (30, 60, 90, 120):
+        for k in range(360):
+            a = math.radians(k)
+            plot(buf, 120 + int(r * math.cos(a)), 120 + int(r * math.sin(a)), 0x07E0)
+
+    for path in (PATH, OLD_PATH):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    recorder = timelapse.TimeLapse(SIZE, SIZE, PATH, OLD_PATH)
+    size = 0
+    for n in range(CAPTURES):
+        for k in range(n * 40, n * 40 + 40):     # new trail
+            plot(buf, 120 + int(100 * math.sin(k * 0.013)), 120 + int(80 * math.sin(k * 0.021)), 0xFFFF)
+        a = n * 1.3                             # sweep
+        for r in range(120):
+            plot(buf, 120 + int(r * math.cos(a)), 120 + int(r * math.sin(a)), 0x0320)
+
+        start = ticks_us()
+        recorder.start(buf, 1729350000 + n * 300)
+        begin = elapsed(start)
+        worst = total = steps = 0
+        done = False
+        while not done:
+            start = ticks_us()
+            done = recorder.step()
+            spent = elapsed(start)
+            worst = max(worst, spent)
+            total += spent
+            steps += 1
+        new_size = os.stat(PATH)[6]
+        kind = 'keyframe' if n == 0 else 'delta   '
+        print(f"{kind} start {begin / 1000:6.2f} ms, step {total / steps / 1000:6.2f} ms average, "
+              f"{worst / 1000:.2f} ms worst, {new_size - size:6d} bytes")
+        size = new_size
+
+    os.remove(PATH)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Cost of the flash trail log: one batched write as the frame loop sees it,
+and the boot replay of a full log into the trail.
+
+Fills every segment (the log wraps once, so rotation is exercised), then
+times replaying the last 24 hours into a 1000-point GeoTrail and projecting
+it in the first view. The segment files use their own names and are
+deleted afterwards. Runs on the host or on the device:
+
+    mpremote cp geometry.py trail.py trail_log.py :
+    mpremote run bench/bench_trail_log.py
+"""
+
+import os
+import sys
+import time
+
+try:
+    import os.path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+except ImportError:
+    pass  # on the device the modules live in /
+
+import trail_log
+from geometry import Observer
+from trail import GeoTrail
+
+PATTERN = 'bench_trail_{}.bin'
+NOW = 1729350000
+SPACING = 65            # s between trail points at ~7.7 km/s and 4.5 degree spacing
+
+
+def ticks_us():
+    if hasattr(time, 'ticks_us'):
+        return time.ticks_us()
+    return int(time.perf_counter() * 1000000)
+
+
+def elapsed(start):
+    if hasattr(time, 'ticks_diff'):
+        return time.ticks_diff(time.ticks_us(), start)
+    return ticks_us() - start
+
+
+def main():
+    log = trail_log.TrailLog(PATTERN)
+    capacity = trail_log.SEGMENTS * trail_log.SEGMENT_RECORDS
+    points = capacity + trail_log.SEGMENT_RECORDS // 2
+    start_time = NOW - points * SPACING
+    worst = total = flushes = 0
+    for k in range(points):
+        t = start_time + k * SPACING
+        log.append(t, (k * 0.37) % 100 - 50, (k * 0.5) % 360 - 180)
+        if log.due(t):
+            start = ticks_us()
+            log.flush()
+            spent = elapsed(start)
+            worst = max(worst, spent)
+            total += spent
+            flushes += 1
+    log.flush()
+    print(f"{points} points logged, {flushes} batched writes of {trail_log.BATCH}")
+    print(f"batched write       {total / flushes / 1000:8.2f} ms average, {worst / 1000:.2f} ms worst")
+
+    trail = GeoTrail(1000)
+    observer = Observer(40.7128, -74.0060)
+    start = ticks_us()
+    count = log.replay(trail, NOW - 24 * 3600)
+    replay = elapsed(start)
+    start = ticks_us()
+    trail.view(12000, observer, 100, 12000)
+    project = elapsed(start)
+    print(f"replay 24 h         {replay / 1000:8.1f} ms ({count} points read back)")
+    print(f"first view          {project / 1000:8.1f} ms ({trail.count} points projected)")
+
+    for i in range(trail_log.SEGMENTS):
+        try:
+            os.remove(PATTERN.format(i))
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    main()
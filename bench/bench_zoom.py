@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Cost of a zoom switch with per-zoom layer caches and a geographic trail.
+
+Times building each zoom level's layers the first time (map, ring table,
+day/night mask, rings), then switching between cached levels: a cache hit
+plus projecting the trail points added since the level was last shown. For
+comparison it also times re-projecting the whole 1000-point trail, which
+is what every switch would cost with screen space trails. The map caches
+use their own names and are deleted afterwards. Needs framebuf (see
+_common.py), so time it on the device:
+
+    mpremote cp bench/_common.py world_map.py geometry.py orbit.py map_projection.py daylight.py trail.py layers.py :
+    mpremote run bench/bench_zoom.py
+"""
+
+import gc
+import os
+
+from _common import ticks_us, elapsed
+import map_projection
+import orbit
+from geometry import Observer
+from layers import LayerCache
+from trail import GeoTrail
+
+LINE1 = "1 25544U 98067A   24293.50000000  .00020000  00000-0  35000-3 0  9991"
+LINE2 = "2 25544  51.6400 120.0000 0007000  60.0000 300.0000 15.50000000470000"
+ZOOM_LEVELS = (12000, 6000, 3000)
+NOW = 1729350000
+POINTS = 1000
+NEW_POINTS = 10         # points added between switches, about ten minutes of flight
+ROUNDS = 9
+MAP_CACHE = 'bench_map_{}.bin'  # in place of map_projection.MAP_CACHE
+
+
+def rings(fb, layer):
+    for radius in (30, 60, 90):
+        fb.ellipse(120, 120, radius, radius, 1)
+
+
+def main():
+    if not hasattr(gc, 'mem_free'):
+        gc.mem_free = lambda: 2000000   # LayerCache checks it; as in sim/run_sim.py
+    map_projection.MAP_CACHE = MAP_CACHE
+    observer = Observer(40.7128, -74.0060)
+    cache = LayerCache(observer, rings)
+    model = orbit.SGP4(LINE1, LINE2)
+    trail = GeoTrail(POINTS)
+    t = NOW
+    while trail.total < POINTS:
+        trail.add(*model.subpoint(t))
+        t += 5
+
+    for radar_range in ZOOM_LEVELS:
+        start = ticks_us()
+        cache.get(radar_range, NOW)
+        built = elapsed(start)
+        start = ticks_us()
+        trail.view(radar_range, observer, radar_range / 120, radar_range)
+        first = elapsed(start)
+        print(f"{radar_range:5d} km  build {built / 1000:8.1f} ms  first trail view {first / 1000:7.1f} ms")
+
+    worst = 0
+    for k in range(ROUNDS):
+        for _ in range(NEW_POINTS):
+            trail.append(*model.subpoint(t))
+            t += 5
+        radar_range = ZOOM_LEVELS[k % len(ZOOM_LEVELS)]
+        start = ticks_us()
+        cache.get(radar_range, NOW)
+        trail.view(radar_range, observer, radar_range / 120, radar_range)
+        worst = max(worst, elapsed(start))
+    print(f"cached switch, worst            {worst / 1000:7.2f} ms ({NEW_POINTS} new points)")
+
+    trail.reproject()
+    start = ticks_us()
+    trail.view(ZOOM_LEVELS[0], observer, ZOOM_LEVELS[0] / 120, ZOOM_LEVELS[0])
+    print(f"whole trail re-projected        {elapsed(start) / 1000:7.2f} ms ({POINTS} points)")
+
+    for radar_range in ZOOM_LEVELS:
+        try:
+            os.remove(MAP_CACHE.format(int(radar_range / 120)))
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Validate orbit.py against reference SGP4 ephemerides on the host.
+
+Always checks the published Vallado et al. (2006) verification vectors for
+satellite 00005. When the reference `sgp4` package is installed
+(pip install sgp4) it also compares TEME positions and sub-satellite points
+against it for a set of near-earth TLEs over +/- 2 days.
+
+Usage:
+    python bench/validate_orbit.py
+"""
+
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orbit
+
+VALLADO_00005 = (
+    "1 00005U 58002B   00179.78495062  .00000023  00000-0  28098-4 0  4753",
+    "2 00005  34.2682 348.7242 1859667 331.7664  19.3264 10.82419157413667",
+    # tsince (min), TEME position (km) from tcppver.out
+    ((0.0, (7022.46529266, -1400.08296755, 0.03995155)),
+     (360.0, (-7154.03120202, -3783.17682504, -3536.19412294))),
+)
+
+NEAR_EARTH = (
+    ("1 25544U 98067A   24293.50000000  .00020000  00000-0  35000-3 0  9991",
+     "2 25544  51.6400 120.0000 0007000  60.0000 300.0000 15.50000000470000"),
+    ("1 06251U 62025E   06176.82412014  .00008885  00000-0  12808-3 0  3985",
+     "2 06251  58.0579  54.0425 0030035 139.1568 221.1854 15.56387291  6774"),
+    ("1 28057U 03049A   06177.78615833  .00000060  00000-0  35940-4 0  1836",
+     "2 28057  98.4283 247.6961 0000884  88.1964 272.0286 14.34845089149063"),
+    ("1 20580U 90037B   24293.00000000  .00001000  00000-0  50000-4 0  9995",
+     "2 20580  28.4700 200.0000 0002500 100.0000 260.0000 15.14000000700000"),
+)
+
+
+def check_vallado():
+    line1, line2, vectors = VALLADO_00005
+    model = orbit.SGP4(line1, line2)
+    worst = 0.0
+    for tsince, expected in vectors:
+        worst = max(worst, math.dist(model.propagate(tsince), expected))
+    print(f"Vallado 00005 verification vectors: max error {worst * 1000:.3f} m")
+    return worst < 0.001
+
+
+def great_circle_km(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + \
+        math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * 6371 * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def check_reference():
+    try:
+        from sgp4.api import Satrec, WGS72
+        from sgp4.propagation import gstime
+    except ImportError:
+        print("sgp4 package not installed; skipping reference comparison")
+        return True
+
+    ok = True
+    for line1, line2 in NEAR_EARTH:
+        model = orbit.SGP4(line1, line2)
+        ref = Satrec.twoline2rv(line1, line2, WGS72)
+        worst_pos = worst_ground = 0.0
+        for step in range(-2880, 2881, 7):
+            unix_s = model.epoch + step * 60
+            tsince = model.minutes_since_epoch(unix_s)
+            _, r, _ = ref.sgp4_tsince(tsince)
+            worst_pos = max(worst_pos, math.dist(r, model.propagate(tsince)))
+
+            jd = unix_s / 86400.0 + 2440587.5
+            lat_ref, lon_ref = orbit.ecef_subpoint(r[0], r[1], r[2], gstime(jd))
+            lat, lon = model.subpoint(unix_s)
+            worst_ground = max(worst_ground, great_circle_km(lat, lon, lat_ref, lon_ref))
+        print(f"{model.catnr:05d}: max TEME error {worst_pos * 1000:.3f} m, "
+              f"max sub-point error {worst_ground * 1000:.1f} m")
+        ok = ok and worst_pos < 0.001 and worst_ground < 0.05
+    return ok
+
+
+def benchmark():
+    model = orbit.SGP4(*NEAR_EARTH[0])
+    rounds = 2000
+    start = time.perf_counter()
+    for i in range(rounds):
+        model.subpoint(model.epoch + i * 30)
+    us = (time.perf_counter() - start) * 1e6 / rounds
+    print(f"subpoint(): {us:.1f} us per call on this host")
+
+
+def main():
+    ok = check_vallado()
+    ok = check_reference() and ok
+    benchmark()
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,30 +2,65 @@
 """
 Convert a raw RGB565 screenshot from the ISS tracker to PNG.
 
-The ESP32 saves the 240x240 framebuffer as raw RGB565 bytes (little-endian,
-115200 bytes). This script decodes the binary and writes a standard PNG.
+The ESP32 saves the 240x240 framebuffer run-length coded (rle565.py,
+screenshot_NNN.rle); older firmware saved it as raw RGB565 bytes
+(little-endian, 115200 bytes, screenshot_NNN.bin). This script reads
+either and writes a standard PNG. With NumPy installed every pixel is
+converted at once through a 65536-entry color table; without it, one
+pixel at a time.
 
 Usage:
-    python convert_screenshot.py screenshot_001.bin
-    python convert_screenshot.py screenshot_*.bin
+    python convert_screenshot.py screenshot_001.rle
+    python convert_screenshot.py screenshot_*.rle screenshot_*.bin
     python convert_screenshot.py screenshot_001.bin -o mandala.png
     python convert_screenshot.py screenshot_001.bin --saturation 0.3  (hint of color)
     python convert_screenshot.py screenshot_001.bin --saturation 1.0  (full color)
+    python convert_screenshot.py --watch captures/ -j 8
+
+Many files are converted in parallel, one process per core. A manifest
+(.screenshot_manifest.json) records the content hash of each file
+converted, so a rerun skips the ones that have not changed (--force to
+redo them). --watch converts the screenshots already in a directory,
+then each new one as it is written, using inotify on Linux and polling
+elsewhere.
 """
 
 import argparse
+import ctypes
+import ctypes.util
+import functools
+import hashlib
+import json
+import os
+import select
 import struct
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import rle565
+
 try:
     from PIL import Image
 except ImportError:
     sys.exit("Pillow is required: pip install Pillow")
 
+try:
+    import numpy as np
+except ImportError:
+    np = None   # per-pixel fallback below; pip install numpy for speed
+
 WIDTH = 240
 HEIGHT = 240
 EXPECTED_SIZE = WIDTH * HEIGHT * 2  # 115200 bytes
+SUFFIXES = (".rle", ".bin")
+MANIFEST = ".screenshot_manifest.json"
+WATCH_POLL = 1.0        # s between directory scans without inotify
+WATCH_SETTLE = 0.2      # s of quiet that ends a burst of inotify events
+IN_CLOSE_WRITE = 0x08
+IN_MOVED_TO = 0x80
+INOTIFY_EVENT = struct.Struct("iIII")   # wd, mask, cookie, name length
 
 
 def rgb565_to_rgb888(pixel):
@@ -46,11 +81,27 @@ def desaturate(r, g, b, saturation):
     )
 
 
-def convert(input_path, output_path, saturation=0.0):
+def read_frame(input_path):
+    """Raw RGB565 bytes of a screenshot file, coded or raw; ValueError if neither"""
     data = Path(input_path).read_bytes()
-    if len(data) != EXPECTED_SIZE:
-        sys.exit(f"Expected {EXPECTED_SIZE} bytes, got {len(data)}")
+    if rle565.is_rle(data):
+        width, height, data = rle565.decode(data)
+        if (width, height) != (WIDTH, HEIGHT):
+            raise ValueError(f"expected a {WIDTH}x{HEIGHT} frame, got {width}x{height}")
+    elif len(data) != EXPECTED_SIZE:
+        raise ValueError(f"expected {EXPECTED_SIZE} bytes, got {len(data)}")
+    return data
+
+
+def convert(input_path, output_path, saturation=0.0):
+    """Save one screenshot file as a PNG"""
+    to_image(read_frame(input_path), saturation).save(output_path)
+
 
+def to_image(data, saturation=0.0):
+    """PIL image of a raw 240x240 RGB565 frame"""
+    if np is not None:
+        return Image.fromarray(to_rgb_array(data, saturation), "RGB")
     img = Image.new("RGB", (WIDTH, HEIGHT))
     pixels = img.load()
 
@@ -60,25 +111,232 @@ def convert(input_path, output_path, saturation=0.0):
             pixel = struct.unpack_from("<H", data, offset)[0]
             r, g, b = rgb565_to_rgb888(pixel)
             pixels[x, y] = desaturate(r, g, b, saturation)
+    return img
+
+
+def to_rgb_array(data, saturation=0.0):
+    """HEIGHT x WIDTH x 3 uint8 array of a raw RGB565 frame"""
+    pixel = np.frombuffer(data, dtype="<u2", count=WIDTH * HEIGHT).reshape(HEIGHT, WIDTH)
+    return np.take(color_table(saturation), pixel, axis=0)
+
+
+@functools.lru_cache(maxsize=8)
+def color_table(saturation):
+    """RGB888 of all 65536 RGB565 values, the same values as
+    rgb565_to_rgb888 and desaturate give pixel by pixel. Built once per
+    saturation, so each frame is a single table lookup."""
+    pixel = np.arange(0x10000, dtype=np.uint32)
+    r = (pixel >> 11) & 0x1F
+    g = (pixel >> 5) & 0x3F
+    b = pixel & 0x1F
+    rgb = np.stack((r << 3 | r >> 2, g << 2 | g >> 4, b << 3 | b >> 2), axis=-1).astype(np.float64)
+    # Same float operations in the same order, truncated like int()
+    lum = np.trunc(0.299 * rgb[:, 0] + 0.587 * rgb[:, 1] + 0.114 * rgb[:, 2])[:, None]
+    out = np.trunc(lum + saturation * (rgb - lum))
+    return np.clip(out, 0, 255).astype(np.uint8)
+
+
+def _convert_job(job):
+    """Worker: (input, output, saturation) -> (input, error or None)"""
+    input_path, output_path, saturation = job
+    try:
+        convert(input_path, output_path, saturation)
+    except (OSError, ValueError) as e:
+        return input_path, str(e)
+    return input_path, None
+
+
+class Manifest:
+    """Content hashes of converted inputs, so unchanged files are skipped"""
+
+    def __init__(self, path):
+        self.path = Path(path) if path else None
+        self.entries = {}
+        if self.path and self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text())
+            except ValueError:
+                print(f"Ignoring unreadable manifest {self.path}")
+
+    def key(self, input_path, saturation):
+        return f"{Path(input_path).resolve()}|{saturation}"
+
+    def current(self, input_path, output_path, digest, saturation):
+        entry = self.entries.get(self.key(input_path, saturation))
+        return entry is not None and entry["sha1"] == digest and \
+            entry["output"] == str(Path(output_path).resolve()) and Path(output_path).exists()
+
+    def record(self, input_path, output_path, digest, saturation):
+        self.entries[self.key(input_path, saturation)] = {
+            "sha1": digest, "output": str(Path(output_path).resolve())}
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.entries, indent=1, sort_keys=True))
+        os.replace(tmp, self.path)
+
+
+def batch(inputs, saturation=0.0, output=None, manifest=None, jobs=None, force=False):
+    """Convert inputs, skipping those the manifest says are unchanged and
+    spreading the rest over jobs processes; returns (converted, skipped, failed)"""
+    todo = []
+    digests = {}
+    owners = {}
+    skipped = collided = 0
+    for path in dict.fromkeys(inputs):
+        out = output or str(Path(path).with_suffix(".png"))
+        # shot_0001.rle and shot_0001.bin would both write shot_0001.png
+        if out in owners:
+            print(f"{path}: skipped, {out} is already written from {owners[out]}")
+            collided += 1
+            continue
+        owners[out] = path
+        try:
+            digest = hashlib.sha1(Path(path).read_bytes()).hexdigest()
+        except OSError as e:
+            print(f"{path}: {e}")
+            continue
+        if not force and manifest and manifest.current(path, out, digest, saturation):
+            skipped += 1
+            continue
+        digests[path] = (out, digest)
+        todo.append((path, out, saturation))
+
+    jobs = jobs or os.cpu_count() or 1
+    if len(todo) > 1 and jobs > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(todo))) as pool:
+            results = list(pool.map(_convert_job, todo, chunksize=max(1, len(todo) // (jobs * 4))))
+    else:
+        results = [_convert_job(job) for job in todo]
+
+    failed = collided
+    for path, error in results:
+        out, digest = digests[path]
+        if error:
+            print(f"{path}: {error}")
+            failed += 1
+            continue
+        print(f"Saved {out} ({WIDTH}x{HEIGHT})")
+        if manifest:
+            manifest.record(path, out, digest, saturation)
+    if manifest:
+        manifest.save()
+    return len(results) - failed + collided, skipped, failed
+
+
+def _screenshots(directory):
+    return sorted(str(p) for p in Path(directory).iterdir() if p.suffix in SUFFIXES and p.is_file())
+
+
+def _inotify_events(directory):
+    """Yield lists of names closed after writing or moved into directory,
+    using inotify through ctypes; raises OSError where that is unavailable"""
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    if not hasattr(libc, "inotify_init1"):
+        raise OSError("no inotify")
+    fd = libc.inotify_init1(os.O_CLOEXEC)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+    try:
+        if libc.inotify_add_watch(fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+        while True:
+            names = []
+            # Wait for the first event, then gather the burst that follows it
+            timeout = None
+            while select.select([fd], [], [], timeout)[0]:
+                data = os.read(fd, 64 * 1024)
+                pos = 0
+                while pos + INOTIFY_EVENT.size <= len(data):
+                    _, _, _, length = INOTIFY_EVENT.unpack_from(data, pos)
+                    pos += INOTIFY_EVENT.size
+                    name = data[pos:pos + length].rstrip(b"\0")
+                    pos += length
+                    if name:
+                        names.append(os.fsdecode(name))
+                timeout = WATCH_SETTLE
+            yield names
+    finally:
+        os.close(fd)
+
+
+def _polled_events(directory):
+    """Yield lists of new or changed names by scanning directory every
+    WATCH_POLL seconds; a file is reported once its size stops changing"""
+    seen = {}
+    pending = {}
+    while True:
+        names = []
+        for entry in os.scandir(directory):
+            if not entry.is_file():
+                continue
+            st = entry.stat()
+            stamp = (st.st_size, st.st_mtime_ns)
+            if seen.get(entry.name) == stamp:
+                continue
+            if pending.get(entry.name) == stamp:
+                seen[entry.name] = stamp
+                del pending[entry.name]
+                names.append(entry.name)
+            else:
+                pending[entry.name] = stamp
+        yield names
+        time.sleep(WATCH_POLL)
+
 
-    img.save(output_path)
-    print(f"Saved {output_path} ({WIDTH}x{HEIGHT})")
+def watch(directory, saturation=0.0, manifest=None, jobs=None):
+    """Convert the screenshots in directory, then each new one as it lands"""
+    converted, skipped, failed = batch(_screenshots(directory), saturation, manifest=manifest, jobs=jobs)
+    print(f"Watching {directory} ({converted} converted, {skipped} unchanged, {failed} failed)")
+    try:
+        events = _inotify_events(directory)
+        names = next(events)
+    except OSError as e:
+        print(f"inotify unavailable ({e}), polling every {WATCH_POLL} s")
+        events = _polled_events(directory)
+        names = next(events)
+    while True:
+        paths = sorted({str(Path(directory) / n) for n in names if Path(n).suffix in SUFFIXES})
+        paths = [p for p in paths if Path(p).is_file()]
+        if paths:
+            batch(paths, saturation, manifest=manifest, jobs=jobs)
+        names = next(events)
 
 
 def main():
     parser = argparse.ArgumentParser(description="Convert ISS tracker screenshot to PNG")
-    parser.add_argument("input", nargs="+", help="Path(s) to screenshot .bin file(s)")
+    parser.add_argument("input", nargs="*", help="Path(s) to screenshot .rle or .bin file(s)")
     parser.add_argument("-o", "--output", help="Output PNG path (only valid with a single input file)")
     parser.add_argument("--saturation", type=float, default=0.0,
                         help="Color saturation (default: 0.0=greyscale, 1.0=full color)")
+    parser.add_argument("-j", "--jobs", type=int, help="Worker processes (default: one per core)")
+    parser.add_argument("--manifest", default=MANIFEST,
+                        help=f"Hash manifest of converted files (default: {MANIFEST}; '' for none)")
+    parser.add_argument("--force", action="store_true", help="Reconvert files the manifest says are unchanged")
+    parser.add_argument("--watch", metavar="DIR", help="Convert screenshots as they land in DIR until interrupted")
     args = parser.parse_args()
 
-    if args.output and len(args.input) > 1:
+    if args.output and (len(args.input) > 1 or args.watch):
         sys.exit("-o/--output can only be used with a single input file")
+    if not args.input and not args.watch:
+        parser.error("give screenshot files or --watch DIR")
 
-    for path in args.input:
-        output = args.output or str(Path(path).with_suffix(".png"))
-        convert(path, output, args.saturation)
+    manifest = Manifest(args.manifest)
+    failed = 0
+    if args.input:
+        converted, skipped, failed = batch(args.input, args.saturation, args.output, manifest,
+                                           args.jobs, args.force)
+        if len(args.input) > 1:
+            print(f"{converted} converted, {skipped} unchanged, {failed} failed")
+    if args.watch:
+        try:
+            watch(args.watch, args.saturation, manifest, args.jobs)
+        except KeyboardInterrupt:
+            print()
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
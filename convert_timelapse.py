@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Rebuild the frames of a time-lapse recorded by the ISS tracker, or turn a
+sequence of captures into an animation or a long-exposure image.
+
+The tracker writes keyframes and XOR deltas into timelapse.bin, and
+keeps the previous file as timelapse.old when it rotates (timelapse.py).
+Screenshots (.rle or raw .bin) can be mixed in as single frames. By
+default each frame is written as a PNG named after its capture time.
+
+--gif and --apng write an animation instead, and --stack a single image
+holding the brightest (or mean) value each pixel reached, the whole
+mandala at once. Inputs are memory-mapped and decoded one frame at a
+time, and the animations are encoded frame by frame as they go, each
+frame cropped to what changed since the last, so memory stays flat
+however long the sequence. The device shows only a handful of colors, so
+one palette is built for the whole animation in a first pass over the
+inputs.
+
+Usage:
+    python convert_timelapse.py timelapse.old timelapse.bin
+    python convert_timelapse.py timelapse.bin -o frames --saturation 0.3
+    python convert_timelapse.py timelapse.old timelapse.bin --gif mandala.gif --fps 12
+    python convert_timelapse.py screenshot_*.rle --apng mandala.png --stack exposure.png
+"""
+
+import argparse
+import io
+import mmap
+import struct
+import sys
+import time
+import zlib
+from pathlib import Path
+
+import rle565
+import timelapse
+from convert_screenshot import EXPECTED_SIZE, HEIGHT, WIDTH, color_table, np, to_image
+
+try:
+    from PIL import Image
+except ImportError:
+    sys.exit("Pillow is required: pip install Pillow")
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def read_frames(data, name="time-lapse"):
+    """Yield (unix s, kind, raw RGB565 bytes) for each complete record"""
+    magic, width, height = struct.unpack_from(timelapse.HEADER, data)
+    if magic != timelapse.MAGIC:
+        sys.exit(f"{name}: not a time-lapse file")
+    size = width * height * 2
+    frame = None
+    pos = timelapse.HEADER_SIZE
+    while pos < len(data):
+        if pos + timelapse.RECORD_SIZE > len(data):
+            print(f"{name}: torn record at byte {pos}, stopping")
+            return
+        kind, unix_s = struct.unpack_from(timelapse.RECORD, data, pos)
+        coded = bytearray(size)
+        try:
+            end = rle565.decode_into(data, pos + timelapse.RECORD_SIZE, coded)
+        except ValueError:
+            print(f"{name}: torn record at byte {pos}, stopping")
+            return
+        if data[end:end + len(timelapse.END)] != timelapse.END:
+            print(f"{name}: torn record at byte {pos}, stopping")
+            return
+        pos = end + len(timelapse.END)
+        if kind == timelapse.KEYFRAME:
+            frame = bytes(coded)
+        elif kind == timelapse.DELTA and frame is not None:
+            frame = (int.from_bytes(frame, "little") ^ int.from_bytes(coded, "little")).to_bytes(size, "little")
+        else:
+            continue            # a delta with no keyframe before it
+        yield unix_s, kind, frame
+
+
+def input_frames(paths):
+    """Yield (unix s or 0, raw RGB565 bytes) from time-lapse files and
+    screenshots in turn, each file memory-mapped rather than read whole"""
+    for path in paths:
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data[:4] == timelapse.MAGIC:
+                    for unix_s, _, frame in read_frames(data, path):
+                        yield unix_s, frame
+                elif rle565.is_rle(data):
+                    width, height = struct.unpack_from(rle565.HEADER, data)[1:]
+                    if (width, height) != (WIDTH, HEIGHT):
+                        print(f"{path}: expected a {WIDTH}x{HEIGHT} frame, skipping")
+                        continue
+                    frame = bytearray(EXPECTED_SIZE)
+                    rle565.decode_into(data, rle565.HEADER_SIZE, frame)
+                    yield 0, bytes(frame)
+                elif len(data) == EXPECTED_SIZE:
+                    yield 0, data[:]
+                else:
+                    print(f"{path}: not a screenshot or time-lapse, skipping")
+        except (OSError, ValueError) as e:    # mmap refuses empty files with ValueError
+            print(f"{path}: {e}, skipping")
+
+
+def shared_palette(paths, saturation):
+    """(768-byte palette, uint8 index of every RGB565 value) for all frames.
+    The colors in use nearly always fit in 256 and are kept exactly;
+    beyond that Pillow picks 256 and the rest go to the nearest one."""
+    used = np.zeros(0x10000, dtype=bool)
+    for _, frame in input_frames(paths):
+        used[np.frombuffer(frame, dtype="<u2")] = True
+    table = color_table(saturation)
+    rgb565 = np.flatnonzero(used)
+    colors, index = np.unique(table[rgb565], axis=0, return_inverse=True)
+    if len(colors) > 256:
+        strip = Image.fromarray(colors.reshape(1, -1, 3).astype(np.uint8), "RGB")
+        palette = np.array(strip.quantize(256).getpalette()[:768], dtype=np.int32).reshape(-1, 3)
+        distance = ((colors[:, None, :].astype(np.int32) - palette[None, :, :]) ** 2).sum(axis=2)
+        index = distance.argmin(axis=1)[index]
+        colors = palette
+    lookup = np.zeros(0x10000, dtype=np.uint8)
+    lookup[rgb565] = index.reshape(-1)
+    palette = np.zeros((256, 3), dtype=np.uint8)
+    palette[:len(colors)] = colors
+    return palette.tobytes(), lookup
+
+
+def changed_box(indices, previous):
+    """(x, y, w, h) around the pixels that differ from previous; the whole
+    frame for the first, and a single pixel when nothing changed"""
+    if previous is None:
+        return 0, 0, WIDTH, HEIGHT
+    diff = indices != previous
+    rows = np.flatnonzero(diff.any(axis=1))
+    if not len(rows):
+        return 0, 0, 1, 1
+    cols = np.flatnonzero(diff.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1] - cols[0] + 1), int(rows[-1] - rows[0] + 1)
+
+
+class GifWriter:
+    """Animated GIF written frame by frame with one global palette"""
+
+    def __init__(self, path, palette, delay_ms):
+        self.file = open(path, "wb")
+        self.palette = palette
+        self.delay = max(delay_ms // 10, 1)
+        self.previous = None
+        self.frames = 0
+        self.file.write(b"GIF89a" + struct.pack("<HHBBB", WIDTH, HEIGHT, 0xF7, 0, 0) + palette)
+        self.file.write(b"!\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00")   # loop forever
+
+    def add(self, indices):
+        x, y, w, h = changed_box(indices, self.previous)
+        self.previous = indices
+        # Graphic control: keep what is on screen, show for delay
+        self.file.write(b"!\xf9\x04\x04" + struct.pack("<H", self.delay) + b"\x00\x00")
+        self.file.write(self._image_data(indices[y:y + h, x:x + w], x, y))
+        self.frames += 1
+
+    def _image_data(self, crop, x, y):
+        """Image descriptor and LZW data of crop, taken from a one-frame GIF
+        Pillow writes with our palette, moved to (x, y)"""
+        im = Image.fromarray(np.ascontiguousarray(crop), "P")
+        im.putpalette(self.palette)
+        buf = io.BytesIO()
+        im.save(buf, "GIF", optimize=False)
+        data = buf.getvalue()
+        flags = data[10]
+        pos = 13 + (3 << ((flags & 7) + 1) if flags & 0x80 else 0)
+        while data[pos] == 0x21:            # skip extensions up to the image descriptor
+            pos += 2
+            while data[pos]:
+                pos += data[pos] + 1
+            pos += 1
+        if data[pos + 9] & 0x80:
+            raise ValueError("Pillow wrote a local color table")
+        return b"," + struct.pack("<HH", x, y) + data[pos + 5:-1]
+
+    def close(self):
+        self.file.write(b";")
+        self.file.close()
+
+
+class ApngWriter:
+    """Animated PNG written frame by frame; the frame count in acTL is
+    patched in on close"""
+
+    def __init__(self, path, palette, delay_ms):
+        self.file = open(path, "wb")
+        self.delay_ms = delay_ms
+        self.previous = None
+        self.frames = 0
+        self.sequence = 0
+        self.file.write(PNG_SIGNATURE)
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", WIDTH, HEIGHT, 8, 3, 0, 0, 0))
+        self.actl_at = self.file.tell()
+        self._chunk(b"acTL", struct.pack(">II", 0, 0))
+        self._chunk(b"PLTE", palette)
+
+    def _chunk(self, kind, body):
+        self.file.write(struct.pack(">I", len(body)) + kind + body +
+                        struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF))
+
+    def add(self, indices):
+        x, y, w, h = changed_box(indices, self.previous)
+        self.previous = indices
+        self._chunk(b"fcTL", struct.pack(">IIIIIHHBB", self.sequence, w, h, x, y,
+                                         self.delay_ms, 1000, 0, 0))
+        self.sequence += 1
+        crop = indices[y:y + h, x:x + w]
+        rows = np.zeros((h, w + 1), dtype=np.uint8)     # filter byte 0 on each row
+        rows[:, 1:] = crop
+        data = zlib.compress(rows.tobytes(), 9)
+        if self.frames == 0:
+            self._chunk(b"IDAT", data)      # the first frame is also the still image
+        else:
+            self._chunk(b"fdAT", struct.pack(">I", self.sequence) + data)
+            self.sequence += 1
+        self.frames += 1
+
+    def close(self):
+        self._chunk(b"IEND", b"")
+        self.file.seek(self.actl_at)
+        self._chunk(b"acTL", struct.pack(">II", self.frames, 0))
+        self.file.close()
+
+
+class Stack:
+    """Long exposure: the brightest value, or the mean, of every pixel"""
+
+    def __init__(self, path, mode, saturation):
+        self.path = path
+        self.mode = mode
+        self.table = color_table(saturation)
+        self.total = None
+        self.frames = 0
+
+    def add(self, frame):
+        rgb = np.take(self.table, np.frombuffer(frame, dtype="<u2").reshape(HEIGHT, WIDTH), axis=0)
+        if self.total is None:
+            self.total = rgb.astype(np.uint32)
+        elif self.mode == "max":
+            np.maximum(self.total, rgb, out=self.total)
+        else:
+            self.total += rgb
+        self.frames += 1
+
+    def close(self):
+        if self.total is None:
+            return
+        image = self.total if self.mode == "max" else self.total // self.frames
+        Image.fromarray(image.astype(np.uint8), "RGB").save(self.path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild ISS tracker time-lapse frames as PNGs, "
+                                                 "an animation or a long exposure")
+    parser.add_argument("input", nargs="+",
+                        help="timelapse.old and/or timelapse.bin, and/or screenshots, oldest first")
+    parser.add_argument("-o", "--output", default="timelapse",
+                        help="Directory for PNG frames (default: timelapse; unused with --gif/--apng/--stack)")
+    parser.add_argument("--saturation", type=float, default=0.0,
+                        help="Color saturation (default: 0.0=greyscale, 1.0=full color)")
+    parser.add_argument("--gif", help="Write an animated GIF")
+    parser.add_argument("--apng", help="Write an animated PNG")
+    parser.add_argument("--fps", type=float, default=10, help="Animation frame rate (default: 10)")
+    parser.add_argument("--stack", help="Write a long-exposure PNG of all frames")
+    parser.add_argument("--stack-mode", choices=("max", "mean"), default="max",
+                        help="Brightest value per pixel, or the mean (default: max)")
+    args = parser.parse_args()
+
+    if not (args.gif or args.apng or args.stack):
+        out_dir = Path(args.output)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        count = 0
+        for unix_s, frame in input_frames(args.input):
+            count += 1
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime(unix_s)) if unix_s else "unknown"
+            output = out_dir / f"frame_{count:04d}_{stamp}.png"
+            to_image(frame, args.saturation).save(output)
+            print(f"Saved {output}")
+        print(f"{count} frames")
+        return
+
+    if np is None:
+        sys.exit("NumPy is required for --gif, --apng and --stack: pip install numpy")
+    writers = []
+    lookup = None
+    if args.gif or args.apng:
+        palette, lookup = shared_palette(args.input, args.saturation)
+        delay_ms = int(round(1000 / args.fps))
+        if args.gif:
+            writers.append(GifWriter(args.gif, palette, delay_ms))
+        if args.apng:
+            writers.append(ApngWriter(args.apng, palette, delay_ms))
+    stack = Stack(args.stack, args.stack_mode, args.saturation) if args.stack else None
+
+    count = 0
+    for _, frame in input_frames(args.input):
+        count += 1
+        if writers:
+            indices = np.take(lookup, np.frombuffer(frame, dtype="<u2").reshape(HEIGHT, WIDTH))
+            for writer in writers:
+                writer.add(indices)
+        if stack:
+            stack.add(frame)
+    for writer in writers:
+        writer.close()
+    if stack:
+        stack.close()
+    for path in (args.gif, args.apng, args.stack):
+        if path:
+            print(f"Saved {path} ({count} frames)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# daylight.py
+"""
+Day/night shading for the radar map.
+
+The map and the night side are combined into one 2-bit GS2_HMSB bitmap
+(ocean, day land, night land, night ocean). A frame draws it with a single
+palette blit, so drawing the overlay costs no more than the plain map.
+
+Whether a sample is in daylight is the sign of the dot product of its
+surface vector with the sun's. With map_projection's ring table that
+becomes cos(psi) * U + sin(psi)/r * (dx * E + dy * N), where U, E and N are
+the sun vector's components along the observer's up/east/north, worked out
+once per refresh. So a refresh needs no trig per pixel. It is spread over
+frames one sample row at a time into a back buffer, which is swapped in
+when complete.
+"""
+import math
+import framebuf
+import orbit
+import map_projection
+
+REFRESH = 60            # s between terminator updates
+ROWS_PER_STEP = 1       # sample rows recomputed per frame
+OCEAN, DAY_LAND, NIGHT_LAND, NIGHT_OCEAN = 0, 1, 2, 3
+BYTES = map_projection.SIZE * map_projection.SIZE // 4
+
+
+def sun_vector(unix_s):
+    """Earth-fixed unit vector towards the sun (low-precision almanac, ~0.01 deg)"""
+    secs = unix_s - orbit.UNIX_J2000
+    days = secs // 86400
+    frac = (secs - days * 86400) / 86400.0
+    # Mean longitude and anomaly, whole days reduced before adding the fraction
+    mean_lon = math.radians((280.460 + (0.9856474 * days) % 360.0 + 0.9856474 * frac) % 360.0)
+    anomaly = math.radians((357.528 + (0.9856003 * days) % 360.0 + 0.9856003 * frac) % 360.0)
+    ecl_lon = mean_lon + math.radians(1.915 * math.sin(anomaly) + 0.020 * math.sin(2 * anomaly))
+    obliquity = math.radians(23.439 - 0.0000004 * days)
+    sin_lon = math.sin(ecl_lon)
+    ra = math.atan2(math.cos(obliquity) * sin_lon, math.cos(ecl_lon))
+    dec = math.asin(math.sin(obliquity) * sin_lon)
+    lon = ra - orbit.gmst(unix_s)
+    c = math.cos(dec)
+    return c * math.cos(lon), c * math.sin(lon), math.sin(dec)
+
+
+class Daylight:
+    def __init__(self, observer, land, ring_table):
+        """land: MONO_HLSB map bytes; ring_table: from map_projection.rings()"""
+        self.observer = observer
+        self.land = land
+        self.cos_psi, self.sin_r = ring_table
+        self._front = bytearray(BYTES)
+        self._back = bytearray(BYTES)
+        self.fb = framebuf.FrameBuffer(self._front, map_projection.SIZE,
+                                       map_projection.SIZE, framebuf.GS2_HMSB)
+        self.updated = 0        # unix time of the sun position shown
+        self._row = None        # next sample row of a refresh in progress
+        self._pending = 0
+        self._sun = (0.0, 0.0, 0.0)
+
+    def update(self, unix_s):
+        """Advance the terminator; call once per frame. True when a new mask was swapped in."""
+        if not unix_s:
+            return False
+        if self._row is None:
+            if self.updated and unix_s - self.updated < REFRESH:
+                return False
+            self._start(unix_s)
+        return self._step(ROWS_PER_STEP)
+
+    def refresh(self, unix_s):
+        """Recompute the whole mask now (first frame, location change)"""
+        if not unix_s:
+            return
+        self._start(unix_s)
+        self._step(map_projection.SIZE)
+
+    def _start(self, unix_s):
+        sx, sy, sz = sun_vector(unix_s)
+        o = self.observer
+        self._sun = (sx * o.up[0] + sy * o.up[1] + sz * o.up[2],
+                     sx * o.east[0] + sy * o.east[1],
+                     sx * o.north[0] + sy * o.north[1] + sz * o.north[2])
+        self._pending = unix_s
+        self._row = 0
+
+    def _step(self, rows):
+        size = map_projection.SIZE
+        step = map_projection.STEP
+        half = size // 2
+        n = len(self.cos_psi)
+        cos_psi, sin_r = self.cos_psi, self.sin_r
+        land, out = self.land, self._back
+        u, e, nn = self._sun
+        end = min(self._row + rows * step, size)
+        for sy in range(self._row, end, step):
+            dy = half - sy
+            row_sun = dy * nn
+            base = sy * size
+            for sx in range(0, size, step):
+                dx = sx - half
+                q = (dx * dx + dy * dy) // (step * step)
+                i = base + sx
+                if q >= n:
+                    value = OCEAN
+                else:
+                    is_land = land[i >> 3] & (0x80 >> (i & 7))
+                    if cos_psi[q] * u + sin_r[q] * (dx * e + row_sun) > 0:
+                        value = DAY_LAND if is_land else OCEAN
+                    else:
+                        value = NIGHT_LAND if is_land else NIGHT_OCEAN
+                # GS2_HMSB keeps pixel x in bits 2*(x&3); samples are at even x
+                j = i >> 2
+                shift = (sx & 3) << 1
+                out[j] = (out[j] & ~(3 << shift)) | (value << shift)
+        self._row = end
+        if end < size:
+            return False
+        # Swap buffers; the FrameBuffer wraps the front one
+        self._front, self._back = self._back, self._front
+        self.fb = framebuf.FrameBuffer(self._front, size, size, framebuf.GS2_HMSB)
+        self.updated = self._pending
+        self._row = None
+        return True
@@ -0,0 +1,68 @@
+# fix_listener.py
+"""
+Receives ISS fixes (and the LAN's geolocation) multicast by iss_aggregator.py,
+so a fleet of trackers shares one upstream poll. Non-blocking: poll() is cheap
+enough to call every frame.
+"""
+import socket
+import time
+import iss_packet
+
+QUIET_TIMEOUT = 90000   # ms without packets before the aggregator counts as gone
+
+
+class FixListener:
+    def __init__(self, local_ip, group=iss_packet.GROUP, port=iss_packet.PORT):
+        self.group = group
+        self.port = port
+        self.fix = None         # (timestamp, lat, lon)
+        self.location = None    # (lat, lon)
+        self.last_packet = None
+        self._seq = 0
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(socket.getaddrinfo('0.0.0.0', port)[0][-1])
+        mreq = bytes(int(p) for p in group.split('.')) + bytes(int(p) for p in local_ip.split('.'))
+        self._sock.setsockopt(getattr(socket, 'IPPROTO_IP', 0),
+                              getattr(socket, 'IP_ADD_MEMBERSHIP', 3), mreq)
+        self._sock.setblocking(False)
+        self._dest = socket.getaddrinfo(group, port)[0][-1]
+
+    def hello(self):
+        """Ask the aggregator to resend its current state right away."""
+        self._seq += 1
+        try:
+            self._sock.sendto(iss_packet.pack(iss_packet.KIND_HELLO, self._seq, 0, 0, 0), self._dest)
+        except OSError:
+            pass
+
+    def poll(self):
+        """Drain pending packets. Returns True when a newer fix arrived."""
+        new_fix = False
+        while True:
+            try:
+                data = self._sock.recv(64)
+            except OSError:
+                break
+            packet = iss_packet.unpack(data)
+            if packet is None:
+                continue
+            kind, seq, timestamp, lat, lon = packet
+            if kind == iss_packet.KIND_FIX:
+                if self.fix is None or timestamp > self.fix[0]:
+                    self.fix = (timestamp, lat, lon)
+                    new_fix = True
+            elif kind == iss_packet.KIND_LOCATION:
+                self.location = (lat, lon)
+            else:
+                continue
+            self.last_packet = time.ticks_ms()
+        return new_fix
+
+    def quiet(self):
+        """True when nothing has been heard for QUIET_TIMEOUT."""
+        return self.last_packet is None or \
+            time.ticks_diff(time.ticks_ms(), self.last_packet) >= QUIET_TIMEOUT
+
+    def close(self):
+        self._sock.close()
@@ -0,0 +1,42 @@
+# geo_cache.py
+"""
+Persisted geolocation for the ISS tracker.
+
+The resolved location is kept in a small JSON file on flash together with the
+unix time it was resolved and the network (WiFi SSID) it belongs to, so later
+boots on the same network can start drawing immediately.
+"""
+import json
+
+CACHE_FILE = 'location.json'
+MAX_AGE = 7 * 24 * 3600  # seconds before a cached location is refreshed
+
+
+def load(network_key):
+    """Return (lat, lon, timestamp) cached for network_key, or None."""
+    try:
+        with open(CACHE_FILE) as f:
+            entry = json.load(f)
+        if entry['key'] != network_key:
+            return None
+        return float(entry['lat']), float(entry['lon']), int(entry['t'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save(network_key, lat, lon, timestamp):
+    """Write the location for network_key. timestamp 0 means 'age unknown'."""
+    try:
+        with open(CACHE_FILE, 'w') as f:
+            json.dump({'key': network_key, 'lat': lat, 'lon': lon, 't': timestamp}, f)
+        return True
+    except OSError as e:
+        print(f"Location cache write failed: {e}")
+        return False
+
+
+def is_stale(timestamp, now, max_age=MAX_AGE):
+    """True when a cached entry should be refreshed. Unknown times are stale."""
+    if not timestamp or not now:
+        return True
+    return now - timestamp >= max_age
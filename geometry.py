@@ -0,0 +1,84 @@
+# geometry.py
+"""
+Range and bearing from the observer to sub-satellite points.
+
+The observer's unit vector and local east/north/up basis are computed once
+per location. A point's components along that basis give the bearing
+(atan2 of east over north) and the central angle (atan2 of the horizontal
+part over up) directly, so each point costs four trig calls plus two
+atan2 instead of a haversine and a separate bearing formula. atan2 keeps
+short ranges accurate in single precision, where acos of a dot product
+would not.
+"""
+import math
+
+EARTH_RADIUS = 6371     # km
+ISS_ALTITUDE = 408      # km
+
+
+class Observer:
+    def __init__(self, lat, lon):
+        self.set(lat, lon)
+
+    def set(self, lat, lon):
+        """Move the observer; clears the memoized result"""
+        self.lat = lat
+        self.lon = lon
+        phi = math.radians(lat)
+        lam = math.radians(lon)
+        sp, cp = math.sin(phi), math.cos(phi)
+        sl, cl = math.sin(lam), math.cos(lam)
+        self.east = (-sl, cl, 0.0)
+        self.north = (-sp * cl, -sp * sl, cp)
+        self.up = (cp * cl, cp * sl, sp)
+        self._memo_point = None
+        self._memo = (0.0, 0.0)
+
+    def _enu(self, lat, lon):
+        phi = math.radians(lat)
+        lam = math.radians(lon)
+        c = math.cos(phi)
+        x = c * math.cos(lam)
+        y = c * math.sin(lam)
+        z = math.sin(phi)
+        e, n, u = self.east, self.north, self.up
+        return (x * e[0] + y * e[1],
+                x * n[0] + y * n[1] + z * n[2],
+                x * u[0] + y * u[1] + z * u[2])
+
+    def range_bearing(self, lat, lon):
+        """Slant range in km and bearing in degrees; repeated points are free"""
+        if self._memo_point == (lat, lon):
+            return self._memo
+        e, n, u = self._enu(lat, lon)
+        ground = EARTH_RADIUS * math.atan2(math.sqrt(e * e + n * n), u)
+        result = (math.sqrt(ground * ground + ISS_ALTITUDE * ISS_ALTITUDE),
+                  math.degrees(math.atan2(e, n)) % 360)
+        self._memo_point = (lat, lon)
+        self._memo = result
+        return result
+
+    def project(self, coords, out, km_per_px=100, center=120, max_px=120,
+                max_range=None, scale=1):
+        """Batch of lat, lon pairs to radar screen x, y pairs.
+
+        coords is a flat sequence lat0, lon0, lat1, lon1, ... (multiplied by
+        scale, e.g. 0.01 for centidegrees); out is a same-length writable
+        sequence such as array('h'). Points beyond max_range km become -1, -1.
+        """
+        alt2 = ISS_ALTITUDE * ISS_ALTITUDE
+        limit = max_range * max_range if max_range else None
+        for i in range(0, len(coords) - 1, 2):
+            e, n, u = self._enu(coords[i] * scale, coords[i + 1] * scale)
+            h = math.sqrt(e * e + n * n)
+            ground = EARTH_RADIUS * math.atan2(h, u)
+            slant2 = ground * ground + alt2
+            if limit is not None and slant2 > limit:
+                out[i] = out[i + 1] = -1
+                continue
+            r = min(math.sqrt(slant2) / km_per_px, max_px)
+            if h > 0:
+                r /= h
+            out[i] = int(center + e * r)
+            out[i + 1] = int(center - n * r)
+        return out
@@ -24,46 +24,151 @@
 Realtime International Space Station Tracker for ESP32-S3-Touch-LCD-1.28
 240x240 pixels, RGB565 color, SPI interface
 """
-import network
 import urequests
 import math
 import time
-import os
-from machine import Pin
+from machine import Pin, deepsleep, reset_cause, wake_reason, DEEPSLEEP_RESET, EXT0_WAKE
+import esp32
 import gc
+import framebuf
+from array import array
 from lcd_1inch28 import LCD_1inch28
 from iss_icon import image_data, IMAGE_WIDTH, IMAGE_HEIGHT
-from world_map import map_data, MAP_WIDTH, MAP_HEIGHT
 from boot_logo import boot_image_data, BOOT_IMAGE_WIDTH, BOOT_IMAGE_HEIGHT
+from json_fields import FieldScanner
+import geo_cache
+from wifi_manager import WiFiManager
+from poll_scheduler import PollScheduler
+from fix_listener import FixListener
+import orbit
+from motion import MotionModel
+from passes import PassPredictor
+from geometry import Observer
+from layers import LayerCache
+from trail import GeoTrail
+from trail_log import TrailLog
+from satellites import Registry
+from sprites import RotatedSprite
+import snapshot
+from screenshots import ScreenshotWriter
+from timelapse import TimeLapse
 
 WIFI_SSID = "YOUR_SSID"
 WIFI_PASSWORD = "YOUR_PASSWORD"
+STATIC_IP = None        # e.g. ('192.168.1.50', '255.255.255.0', '192.168.1.1', '8.8.8.8') skips DHCP
 USER_LAT = 40.7128      # fallback if geolocation fails
 USER_LON = -74.0060
-UPDATE_INTERVAL = 30000
+UPDATE_INTERVAL = 30000    # poll interval while the ISS is in or near radar range
+MAX_UPDATE_INTERVAL = 600000
 MAX_RADAR_DISTANCE = 12000
-
-def draw_image(display, x, y, color=0xFFFF):
-    """Draw ISS icon with specified color for the silhouette"""
-    for i in range(IMAGE_HEIGHT):
-        for j in range(IMAGE_WIDTH):
-            if image_data[i * IMAGE_WIDTH + j] == 0xFFFF:
-                display.pixel(x + j, y + i, color)
+ZOOM_LEVELS = (12000, 6000, 3000)  # km at the radar edge; a long BOOT press cycles them
+RADAR_RADIUS = 120      # px
+RING_RADII = (30, 60, 90)
+LONG_PRESS = 800        # ms the BOOT button is held to change zoom
+TRAIL_POINTS = 1000
+DEEP_SLEEP = False      # battery use: sleep while the ISS is far away
+SLEEP_MIN_GAP = 1800    # s until the ISS is back in range before sleeping pays off
+SLEEP_WAKE_LEAD = 300   # s woken ahead of its return
+SLEEP_BUTTON_HOLD = 120  # s kept awake after the BOOT button is pressed or wakes it
+SCREENSHOT_FLASH = 60   # ms the backlight blinks when a screenshot is taken
+TIMELAPSE = 0           # s between time-lapse frames (300 for one every 5 minutes), 0 for off
+TRAIL_REPLAY = 24 * 3600  # s of logged trail restored at boot; TRAIL_POINTS hold ~30 h
+HEADING_SPAN = 0.2      # degrees the ISS moves before its heading is re-derived
+AGGREGATOR = True       # take fixes from iss_aggregator.py on the LAN when one is running
+AGGREGATOR_HELLO_WAIT = 300
+TLE_URL = 'https://celestrak.org/NORAD/elements/gp.php?CATNR=25544&FORMAT=TLE'
+TLE_FILE = 'tle.txt'
+TLE_MAX_AGE = 86400     # s; refresh the elements about daily
+TLE_RETRY = 3600        # s between failed refresh attempts
+TLE_TOLERANCE = 1.0     # degrees an API fix may differ from the propagated position
+ORBIT_STEP = 1000       # ms between propagated positions
+SATELLITES = (48274, 20580)  # other objects on the radar: Tiangong, Hubble
+SAT_TLE_URL = 'https://celestrak.org/NORAD/elements/gp.php?CATNR={}&FORMAT=TLE'
+SAT_TLE_FILE = 'tle_extra.txt'
+SAT_COLORS = (0xFF07, 0x1FF8, 0xE007)  # cyan, magenta, green
+PASS_HOURS = 24         # how far ahead to predict passes
+FORECAST_STEP = 60      # s between forecast track points
+FORECAST_SPAN = 5580    # s; about one orbit ahead
+FORECAST_REFRESH = 600  # s before the forecast is recomputed without a new fix
+FORECAST_COLOR = 0xA0FD  # amber (byte-swapped RGB565 like the other colors)
+NIGHT_SHADING = True    # dim the night side of the map
+MAP_COLOR = 0x6631
+NIGHT_LAND_COLOR = 0xC518
+NIGHT_OCEAN_COLOR = 0x4608
+
+# MicroPython ports count time.time() from either 2000 or 1970
+_EPOCH_OFFSET = 946684800 if time.gmtime(0)[0] == 2000 else 0
 
 class ISSTracker:
     def __init__(self):
         self.lcd = LCD_1inch28()
-        self.iss_data = {'lat': 0, 'lon': 0}
+        self.iss_data = {'lat': 0, 'lon': 0, 'timestamp': 0}
+        self._iss_fields = FieldScanner((b'latitude', b'longitude', b'timestamp'))
+        self._location_fields = FieldScanner((b'lat', b'lon'))
+        self._location_time = 0
+        self._unix_base = 0
+        self._unix_ticks = 0
+        self.wifi = WiFiManager(WIFI_SSID, WIFI_PASSWORD, STATIC_IP)
+        self.listener = None
+        self.orbit = orbit.load_tle(TLE_FILE)
+        self._tle_fetched = orbit.load_fetched(TLE_FILE)   # unix s of the last download
+        self._tle_attempt = 0
+        self._tle_suspect = False
+        self._last_propagation = 0
+        self.motion = MotionModel()
+        self.passes = PassPredictor(MAX_RADAR_DISTANCE, PASS_HOURS)
+        self.observer = Observer(USER_LAT, USER_LON)
+        self.zoom = 0
+        self.radar_range = ZOOM_LEVELS[0]
+        self.km_per_px = self.radar_range / RADAR_RADIUS
+        self.satellites = Registry(self.observer, self.radar_range, self.km_per_px)
+        self.satellites.set_models(orbit.load_tles(SAT_TLE_FILE))
+        self._sat_tle_fetched = orbit.load_fetched(SAT_TLE_FILE)
+        self._sat_tle_attempt = 0
+        self._sat_palette = framebuf.FrameBuffer(bytearray(8), 4, 1, framebuf.RGB565)
+        for i, color in enumerate(SAT_COLORS):
+            self._sat_palette.pixel(i + 1, 0, color)
+        # Map, day/night mask and rings per zoom level, built when first shown
+        self.layers = LayerCache(self.observer, self.draw_background, NIGHT_SHADING,
+                                 self._drop_zoom)
+        self.layer = None       # layers of the current zoom level
+        self._map_palette = framebuf.FrameBuffer(bytearray(4), 2, 1, framebuf.RGB565)
+        self._map_palette.pixel(1, 0, MAP_COLOR)
+        self._ring_palette = framebuf.FrameBuffer(bytearray(4), 2, 1, framebuf.RGB565)
+        self._ring_palette.pixel(1, 0, 0xFFFF)
+        # ISS icon pre-rotated to 32 headings; a frame blits the nearest one
+        self.icon = RotatedSprite(image_data, IMAGE_WIDTH, IMAGE_HEIGHT)
+        self._icon_palette = self._ring_palette
+        self.heading = 0.0          # screen direction of travel, degrees clockwise from up
+        self._heading_from = None   # lat, lon the heading is measured from
+        self._heading_xy = array('h', bytes(8))
+        self._day_palette = framebuf.FrameBuffer(bytearray(8), 4, 1, framebuf.RGB565)
+        for i, color in enumerate((0, MAP_COLOR, NIGHT_LAND_COLOR, NIGHT_OCEAN_COLOR)):
+            self._day_palette.pixel(i, 0, color)
         self.last_update = 0
-        self.trajectory_points = []
-        self.max_trajectory_points = 1000
+        self.poll_interval = UPDATE_INTERVAL
+        self.scheduler = PollScheduler(MAX_RADAR_DISTANCE, UPDATE_INTERVAL, MAX_UPDATE_INTERVAL)
+        # ISS ground track in centidegrees, projected per zoom level
+        self.trail = GeoTrail(TRAIL_POINTS)
+        self.trail_log = TrailLog()     # the trail on flash, replayed at boot
+        # Forecast track as lat, lon pairs and as screen x, y pairs; point i
+        # is FORECAST_STEP * i after _forecast_start, (-1, -1) where it is
+        # beyond radar range
+        self._forecast_coords = array('f')
+        self.forecast_points = array('h')
+        self._forecast_start = 0
+        self._forecast_time = 0     # unix time it was computed; 0 forces a redo
         self.sweep_angle = 0
         self._last_sweep_time = 0
 
-        # BOOT button (GPIO 0) for screenshots
-        self._screenshot_requested = False
-        self._screenshot_count = self._count_existing_screenshots()
-        self._screenshot_max = 10
+        # BOOT button (GPIO 0): short press for a screenshot, long press to zoom
+        self._press_start = None    # ticks_ms when the button went down
+        self._press_handled = False
+        self._awake_until = 0       # unix s before which deep sleep waits
+        self.screenshots = ScreenshotWriter(240, 240)
+        self._flash_until = None    # ticks_ms when the screenshot flash ends
+        self.timelapse = TimeLapse(240, 240) if TIMELAPSE else None
+        self._timelapse_at = None   # ticks_ms of the last time-lapse frame
         self._boot_btn = Pin(0, Pin.IN, Pin.PULL_UP)
         self._boot_btn.irq(trigger=Pin.IRQ_FALLING, handler=self._on_boot_press)
 
@@ -71,42 +176,59 @@ class ISSTracker:
         self.lcd.fill(0x0000)
         self.lcd.show()
 
+        # Waking from deep sleep: pick up where the snapshot left off
+        self._resumed = reset_cause() == DEEPSLEEP_RESET and self.resume()
+
     def _on_boot_press(self, pin):
-        """ISR – just set a flag, no I/O allowed here."""
-        self._screenshot_requested = True
+        """ISR – just note the time, no I/O allowed here."""
+        if self._press_start is None:
+            self._press_start = time.ticks_ms()
 
-    def _count_existing_screenshots(self):
-        """Scan filesystem for existing screenshot_NNN.bin files to resume numbering."""
-        count = 0
-        try:
-            for f in os.listdir('/'):
-                if f.startswith('screenshot_') and f.endswith('.bin'):
-                    count += 1
-        except:
-            pass
-        return count
+    def poll_button(self):
+        """Screenshot on release of a short press, next zoom level once held LONG_PRESS"""
+        if self._press_start is None:
+            return
+        if self._boot_btn.value() == 0:
+            if not self._press_handled and \
+                    time.ticks_diff(time.ticks_ms(), self._press_start) >= LONG_PRESS:
+                self._press_handled = True
+                self.set_zoom(self.zoom + 1)
+            return
+        if not self._press_handled:
+            self.save_screenshot()
+        self._awake_until = self.unix_time() + SLEEP_BUTTON_HOLD
+        self._press_start = None
+        self._press_handled = False
 
     def save_screenshot(self):
-        """Save current framebuffer as raw RGB565 binary to flash."""
-        if self._screenshot_count >= self._screenshot_max:
-            print(f"Screenshot limit reached ({self._screenshot_max}). Delete files to free space.")
-            return
+        """Start a compressed screenshot of this frame; it is written over the next frames"""
+        if self.screenshots.start(self.lcd.buffer):
+            # Visual feedback: brief backlight flash, ended by the main loop
+            self.lcd.set_bl_pwm(0)
+            self._flash_until = time.ticks_add(time.ticks_ms(), SCREENSHOT_FLASH)
+
+    def service_screenshot(self):
+        """Write the next rows of a screenshot in progress and end the flash"""
+        if self.screenshots.busy:
+            self.screenshots.step()
+        if self._flash_until is not None and \
+                time.ticks_diff(time.ticks_ms(), self._flash_until) >= 0:
+            self._flash_until = None
+            self.lcd.set_bl_pwm(65535)
 
-        self._screenshot_count += 1
-        filename = f"screenshot_{self._screenshot_count:03d}.bin"
-        try:
-            with open(filename, 'wb') as f:
-                f.write(self.lcd.buffer)
-            print(f"Screenshot saved: {filename} ({self._screenshot_count}/{self._screenshot_max})")
-        except Exception as e:
-            print(f"Screenshot failed: {e}")
-            self._screenshot_count -= 1
+    def service_timelapse(self):
+        """Start a time-lapse frame every TIMELAPSE seconds and write the next rows"""
+        if self.timelapse is None:
             return
-
-        # Visual feedback: brief backlight flash
-        self.lcd.set_bl_pwm(0)
-        time.sleep_ms(60)
-        self.lcd.set_bl_pwm(65535)
+        if self.timelapse.busy:
+            self.timelapse.step()
+            return
+        now = time.ticks_ms()
+        if self.screenshots.busy or (self._timelapse_at is not None and
+                                     time.ticks_diff(now, self._timelapse_at) < TIMELAPSE * 1000):
+            return
+        if self.timelapse.start(self.lcd.buffer, self.unix_time()):
+            self._timelapse_at = now
 
     TINY_FONT = {
         '0': [0b111,
@@ -194,28 +316,50 @@ class ISSTracker:
               0b111,
               0b000,
               0b000],
+        ':': [0b000,
+              0b010,
+              0b000,
+              0b010,
+              0b000],
+        'A': [0b010,
+              0b101,
+              0b111,
+              0b101,
+              0b101],
+        'O': [0b010,
+              0b101,
+              0b101,
+              0b101,
+              0b010],
+        'L': [0b100,
+              0b100,
+              0b100,
+              0b100,
+              0b111],
     }
 
-    def draw_tiny_char(self, char, x, y, color):
+    def draw_tiny_char(self, char, x, y, color, target=None):
         """Draw a single character from the tiny font"""
         if char not in self.TINY_FONT:
             return x
 
+        fb = self.lcd if target is None else target
         pattern = self.TINY_FONT[char]
         for row in range(5):
             for col in range(3):
                 if pattern[row] & (1 << (2 - col)):
-                    self.lcd.pixel(x + col, y + row, color)
+                    fb.pixel(x + col, y + row, color)
         return x + 4
 
-    def draw_tiny_text(self, text, x, y, color):
+    def draw_tiny_text(self, text, x, y, color, target=None):
         """Draw a string using the tiny font"""
         current_x = x
         for char in text:
-            current_x = self.draw_tiny_char(char, current_x, y, color)
+            current_x = self.draw_tiny_char(char, current_x, y, color, target)
 
-    def line(self, x0, y0, x1, y1, color):
+    def line(self, x0, y0, x1, y1, color, target=None):
         """Draw a line using Bresenham's algorithm"""
+        fb = self.lcd if target is None else target
         dx = abs(x1 - x0)
         dy = abs(y1 - y0)
         x, y = x0, y0
@@ -225,7 +369,7 @@ class ISSTracker:
         if dx > dy:
             err = dx / 2.0
             while x != x1:
-                self.lcd.pixel(x, y, color)
+                fb.pixel(x, y, color)
                 err -= dy
                 if err < 0:
                     y += sy
@@ -234,29 +378,30 @@ class ISSTracker:
         else:
             err = dy / 2.0
             while y != y1:
-                self.lcd.pixel(x, y, color)
+                fb.pixel(x, y, color)
                 err -= dx
                 if err < 0:
                     x += sx
                     err += dy
                 y += sy
-        self.lcd.pixel(x, y, color)
+        fb.pixel(x, y, color)
 
-    def circle(self, x0, y0, radius, color):
+    def circle(self, x0, y0, radius, color, target=None):
         """Draw a circle using Bresenham's algorithm"""
+        fb = self.lcd if target is None else target
         x = radius
         y = 0
         err = 0
 
         while x >= y:
-            self.lcd.pixel(x0 + x, y0 + y, color)
-            self.lcd.pixel(x0 + y, y0 + x, color)
-            self.lcd.pixel(x0 - y, y0 + x, color)
-            self.lcd.pixel(x0 - x, y0 + y, color)
-            self.lcd.pixel(x0 - x, y0 - y, color)
-            self.lcd.pixel(x0 - y, y0 - x, color)
-            self.lcd.pixel(x0 + y, y0 - x, color)
-            self.lcd.pixel(x0 + x, y0 - y, color)
+            fb.pixel(x0 + x, y0 + y, color)
+            fb.pixel(x0 + y, y0 + x, color)
+            fb.pixel(x0 - y, y0 + x, color)
+            fb.pixel(x0 - x, y0 + y, color)
+            fb.pixel(x0 - x, y0 - y, color)
+            fb.pixel(x0 - y, y0 - x, color)
+            fb.pixel(x0 + y, y0 - x, color)
+            fb.pixel(x0 + x, y0 - y, color)
 
             y += 1
             if err <= 0:
@@ -312,50 +457,72 @@ class ISSTracker:
             self.lcd.set_bl_pwm(level)
             time.sleep_ms(delay_ms)
 
-    def pulse_screen(self):
-        """Create a subtle pulse effect"""
-        PULSE_CYCLES = 4
-        STEP_DELAY = 5
-
-        for i in range(PULSE_CYCLES):
-            intensity = int((math.sin(i * math.pi / PULSE_CYCLES) + 1) * 127)
-            overlay_color = (intensity << 11) | (intensity << 5) | intensity
-
-            for y in range(0, 240, 4):
-                for x in range(0, 240, 4):
-                    current = self.lcd.pixel(x, y)
-                    blended = ((current & overlay_color) >> 1) & 0xFFFF
-                    self.lcd.pixel(x, y, blended)
-
-            self.lcd.show()
-            time.sleep_ms(STEP_DELAY)
+    def breathe_backlight(self):
+        """Waiting indicator: ramp the backlight up and down, no pixel work"""
+        phase = time.ticks_ms() % 2000
+        level = phase if phase < 1000 else 2000 - phase
+        self.lcd.set_bl_pwm(16384 + level * 49)
+
+    def unix_time(self):
+        """Current unix time anchored to the last API fix, else the RTC; 0 if unknown"""
+        if self._unix_base:
+            return self._unix_base + time.ticks_diff(time.ticks_ms(), self._unix_ticks) // 1000
+        now = time.time() + _EPOCH_OFFSET
+        return now if now > 1700000000 else 0
+
+    def load_cached_location(self):
+        """Use the location cached for this network, if there is one"""
+        global USER_LAT, USER_LON
+        entry = geo_cache.load(WIFI_SSID)
+        if entry is None:
+            return False
+        USER_LAT, USER_LON, self._location_time = entry
+        self.observer.set(USER_LAT, USER_LON)
+        self.observer_moved()
+        print(f"Cached location: {USER_LAT}, {USER_LON}")
+        return True
 
     def fetch_location(self):
-        """Fetch approximate location via IP geolocation"""
-        global USER_LAT, USER_LON
+        """Fetch approximate location via IP geolocation and cache it"""
         try:
             response = urequests.get('http://ip-api.com/json/?fields=lat,lon')
-            data = response.json()
-            response.close()
-            USER_LAT = data['lat']
-            USER_LON = data['lon']
-            print(f"Geolocation: {USER_LAT}, {USER_LON}")
+            try:
+                found = self._location_fields.scan(response.raw)
+            finally:
+                response.close()
+            if not found:
+                raise ValueError("no lat/lon in response")
+            lat, lon = self._location_fields.values
+            self.set_location(lat, lon)
             gc.collect()
+            return True
         except:
-            print("Geolocation failed, using fallback coordinates")
+            print(f"Geolocation failed, using {USER_LAT}, {USER_LON}")
+            return False
+
+    def set_location(self, lat, lon):
+        """Adopt a freshly resolved observer location and cache it"""
+        global USER_LAT, USER_LON
+        USER_LAT, USER_LON = lat, lon
+        self.observer.set(lat, lon)
+        self.observer_moved()
+        print(f"Geolocation: {USER_LAT}, {USER_LON}")
+        self._location_time = self.unix_time()
+        geo_cache.save(WIFI_SSID, USER_LAT, USER_LON, self._location_time)
+
+    def use_shared_location(self):
+        """Take the LAN geolocation published by the aggregator, if heard"""
+        if self.listener is None or self.listener.location is None:
+            return False
+        self.set_location(*self.listener.location)
+        return True
 
     def connect_wifi(self):
         """Connect to WiFi network with visual feedback"""
-        wlan = network.WLAN(network.STA_IF)
-        wlan.active(True)
-
-        if not wlan.isconnected():
-            print('Connecting to WiFi...')
-            wlan.connect(WIFI_SSID, WIFI_PASSWORD)
-
-            while not wlan.isconnected():
-                self.pulse_screen()
-                time.sleep_ms(5)
+        print('Connecting to WiFi...')
+        connected = self.wifi.connect(idle=self.breathe_backlight)
+        self.lcd.set_bl_pwm(65535)
+        return connected
 
     def handle_connection_loss(self):
         """Invert screen to indicate connection loss"""
@@ -369,69 +536,376 @@ class ISSTracker:
         """Fetch ISS position from API"""
         try:
             response = urequests.get('http://api.open-notify.org/iss-now.json')
-            data = response.json()
-            response.close()
-            self.iss_data = {
-                'lat': float(data['iss_position']['latitude']),
-                'lon': float(data['iss_position']['longitude'])
-            }
+            try:
+                found = self._iss_fields.scan(response.raw)
+            finally:
+                response.close()
+            if not found:
+                return False
+            lat, lon, timestamp = self._iss_fields.values
+            self.set_fix(lat, lon, timestamp)
             return True
         except:
+            self.poll_interval = UPDATE_INTERVAL
             return False
 
-
-    def calculate_position(self):
-        """Calculate ISS position with basic spherical geometry"""
-        earth_radius = 6371  # km
-        iss_altitude = 408  # km
-
+    def set_fix(self, lat, lon, timestamp):
+        """Adopt a new ISS fix from the API or the aggregator"""
+        # Update in place so a fix allocates no dict on the heap
+        self.iss_data['lat'] = lat
+        self.iss_data['lon'] = lon
+        self.iss_data['timestamp'] = timestamp
+        now_ticks = time.ticks_ms()
+        # The aggregator resends fixes up to 30 s old; only a newer one
+        # may move the clock, and then only forwards
+        if not self._unix_base or timestamp > self.unix_time():
+            self._unix_base = timestamp
+            self._unix_ticks = now_ticks
+        self.motion.add_fix(lat, lon, timestamp, now_ticks)
+        self._forecast_time = 0
+        distance, _ = self.calculate_position()
+        self.poll_interval = self.scheduler.update(distance, timestamp)
+
+        if self.orbit is not None:
+            # With good elements the API only keeps the clock honest
+            plat, plon = self.orbit.subpoint(timestamp)
+            if abs(plat - lat) > TLE_TOLERANCE or \
+                    abs((plon - lon + 180) % 360 - 180) > TLE_TOLERANCE:
+                print("Fix disagrees with TLE, refreshing elements")
+                self._tle_suspect = True
+                self._tle_attempt = 0
+            elif not self._tle_suspect:
+                self.poll_interval = MAX_UPDATE_INTERVAL
+
+    def fetch_tle(self):
+        """Download fresh ISS elements and cache them on flash"""
+        self._tle_attempt = self.unix_time()
         try:
-            obs_lat = math.radians(USER_LAT)
-            obs_lon = math.radians(USER_LON)
-            iss_lat = math.radians(self.iss_data['lat'])
-            iss_lon = math.radians(self.iss_data['lon'])
-
-            dlat = iss_lat - obs_lat
-            dlon = iss_lon - obs_lon
+            response = urequests.get(TLE_URL)
+            try:
+                model = orbit.parse_tle(response.text)
+            finally:
+                response.close()
+            if model is None:
+                raise ValueError("no TLE in response")
+        except Exception as e:
+            print(f"TLE fetch failed: {e}")
+            return False
+        self.orbit = model
+        self._tle_suspect = False
+        self._tle_fetched = self._tle_attempt
+        self._forecast_time = 0
+        orbit.save_tle(TLE_FILE, model, self._tle_fetched)
+        print(f"TLE updated, epoch {model.epoch}")
+        gc.collect()
+        return True
+
+    def tle_due(self):
+        """True when the cached elements are missing, contradicted, or were
+        downloaded a day ago. Their epoch can be older than that when
+        CelesTrak has nothing newer, and asking again would not help."""
+        now = self.unix_time()
+        if not now or now - self._tle_attempt < TLE_RETRY:
+            return False
+        return self.orbit is None or self._tle_suspect or \
+            orbit.download_age(self._tle_fetched, self.orbit.epoch, now) >= TLE_MAX_AGE
+
+    def fetch_satellite_tles(self):
+        """Download elements for the other tracked satellites, one request each"""
+        self._sat_tle_attempt = self.unix_time()
+        models = []
+        for catnr in SATELLITES:
+            try:
+                response = urequests.get(SAT_TLE_URL.format(catnr))
+                try:
+                    models.extend(orbit.parse_tles(response.text))
+                finally:
+                    response.close()
+            except Exception as e:
+                print(f"TLE fetch for {catnr} failed: {e}")
+        if not models:
+            return False
+        self.satellites.set_models(models)
+        self._sat_tle_fetched = self._sat_tle_attempt
+        orbit.save_tles(SAT_TLE_FILE, models, self._sat_tle_fetched)
+        print(f"Tracking {', '.join(m.name or str(m.catnr) for m in models)}")
+        gc.collect()
+        return True
+
+    def satellite_tles_due(self):
+        """True when there are no elements for the other satellites, or they
+        were downloaded a day ago. Published epochs lag by days (Hubble's
+        often does), so they only bound the download time, as for the ISS."""
+        now = self.unix_time()
+        if not SATELLITES or not now or now - self._sat_tle_attempt < TLE_RETRY:
+            return False
+        objects = self.satellites.objects
+        if not objects:
+            return True
+        newest = max(obj.model.epoch for obj in objects)
+        return orbit.download_age(self._sat_tle_fetched, newest, now) >= TLE_MAX_AGE
 
-            a = math.sin(dlat/2)**2 + \
-                math.cos(obs_lat) * math.cos(iss_lat) * \
-                math.sin(dlon/2)**2
+    def propagate_iss(self):
+        """Feed iss_data from the cached elements; False without orbit or clock"""
+        now = self.unix_time()
+        if self.orbit is None or not now:
+            return False
+        try:
+            lat, lon = self.orbit.subpoint(now)
+        except ValueError:
+            self.orbit = None
+            return False
+        self.iss_data['lat'] = lat
+        self.iss_data['lon'] = lon
+        self.iss_data['timestamp'] = now
+        return True
+
+    def start_listener(self):
+        """Join the aggregator's multicast group and ask for its current state"""
+        if not AGGREGATOR:
+            return
+        try:
+            self.listener = FixListener(self.wifi.wlan.ifconfig()[0])
+        except OSError as e:
+            print(f"Aggregator listener unavailable: {e}")
+            return
+        self.listener.hello()
+        start = time.ticks_ms()
+        while self.listener.fix is None or self.listener.location is None:
+            if time.ticks_diff(time.ticks_ms(), start) >= AGGREGATOR_HELLO_WAIT:
+                break
+            self.poll_listener()
+            time.sleep_ms(10)
+        if self.listener.fix is not None:
+            print("Receiving fixes from aggregator")
+
+    def poll_listener(self):
+        """Apply a newer fix heard from the aggregator; True if one arrived"""
+        if self.listener is None or not self.listener.poll():
+            return False
+        timestamp, lat, lon = self.listener.fix
+        self.set_fix(lat, lon, timestamp)
+        return True
 
-            great_circle_dist = 2 * earth_radius * math.asin(math.sqrt(max(min(a, 1), 0)))
-            slant_range = math.sqrt(great_circle_dist**2 + iss_altitude**2)
 
-            y = math.sin(dlon) * math.cos(iss_lat)
-            x = math.cos(obs_lat) * math.sin(iss_lat) - \
-                math.sin(obs_lat) * math.cos(iss_lat) * math.cos(dlon)
-            bearing = math.degrees(math.atan2(y, x)) % 360
+    def update_passes(self):
+        """Re-predict passes when the elements or the location changed"""
+        if self.orbit is None:
+            return
+        start = time.ticks_ms()
+        if self.passes.update(self.orbit, USER_LAT, USER_LON, self.unix_time()):
+            print(f"Predicted {len(self.passes.passes)} passes in "
+                  f"{time.ticks_diff(time.ticks_ms(), start)}ms")
+            gc.collect()
 
-            return slant_range, bearing
+    def draw_next_pass(self, center_x, y):
+        """Countdown to the next pass and its peak elevation, centred on center_x"""
+        now = self.unix_time()
+        next_pass = self.passes.next_pass(now)
+        if next_pass is None:
+            return
+        wait = max(next_pass[0] - now, 0)
+        aos_str = f"AOS {wait // 3600}:{wait % 3600 // 60:02d}"
+        el_str = f"EL {int(next_pass[3])}"
+        self.draw_tiny_text(aos_str, center_x - len(aos_str) * 2, y, 0xFFFF)
+        self.draw_tiny_text(el_str, center_x - len(el_str) * 2, y + 6, 0xFFFF)
+
+    def update_forecast(self):
+        """Recompute the forecast track after a new fix or TLE, or when it runs short"""
+        now = self.unix_time()
+        if not now or (self._forecast_time and
+                       now - self._forecast_time < FORECAST_REFRESH):
+            return
+        if self.orbit is not None:
+            subpoint = self.orbit.subpoint
+            start = now
+        elif self.motion.ready:
+            subpoint = self.motion.forecast
+            start = self.iss_data['timestamp']
+        else:
+            return
+        coords = array('f', bytes(8 * (FORECAST_SPAN // FORECAST_STEP)))  # lat, lon per point
+        try:
+            for i in range(0, len(coords), 2):
+                coords[i], coords[i + 1] = subpoint(start + i * FORECAST_STEP // 2)
+        except ValueError:
+            return
+        self._forecast_coords = coords
+        self.project_forecast()
+        self._forecast_start = start
+        self._forecast_time = now
+
+    def project_forecast(self):
+        """Screen points of the forecast track at the current zoom"""
+        coords = self._forecast_coords
+        points = array('h', bytes(len(coords) * 2))
+        self.forecast_points = self.observer.project(coords, points, self.km_per_px,
+                                                     max_range=self.radar_range)
+
+    def draw_forecast(self):
+        """Dotted track of where the ISS is heading; the points are already on screen"""
+        points = self.forecast_points
+        if not self._forecast_start:
+            return
+        elapsed = self.unix_time() - self._forecast_start
+        first = max(elapsed // FORECAST_STEP + 1, 0) * 2
+        for i in range(first, len(points), 2):
+            x = points[i]
+            if x >= 0:
+                self.lcd.fill_rect(x, points[i + 1], 2, 2, FORECAST_COLOR)
+
+    def resume(self):
+        """Restore the state saved by deep_sleep(); True if there was any"""
+        global USER_LAT, USER_LON
+        found = snapshot.load()
+        snapshot.clear()
+        if found is None:
+            return False
+        state, points = found
+        USER_LAT, USER_LON = state['user_lat'], state['user_lon']
+        self._location_time = state['location_time']
+        self.observer.set(USER_LAT, USER_LON)
+        # The clock carries on from when we went to sleep. The RTC kept
+        # counting, so it says how long that was even when the BOOT button
+        # cut the sleep short; the timer's full span is the fallback.
+        asleep = time.time() - state['rtc_at']
+        if not 0 <= asleep <= state['sleep_ms'] // 1000 + 60:
+            asleep = state['sleep_ms'] // 1000
+        self._unix_base = state['slept_at'] + asleep
+        self._unix_ticks = time.ticks_ms()
+        button = wake_reason() == EXT0_WAKE
+        if button:
+            # Woken to be looked at: a screenshot or zoom, not straight back to sleep
+            self._awake_until = self._unix_base + SLEEP_BUTTON_HOLD
+        self.iss_data = {'lat': state['fix_lat'], 'lon': state['fix_lon'],
+                         'timestamp': state['fix_time']}
+        self.sweep_angle = state['sweep']
+        self.heading = state['heading']
+        self.zoom = state['zoom'] % len(ZOOM_LEVELS)
+        self.radar_range = ZOOM_LEVELS[self.zoom]
+        self.km_per_px = self.radar_range / RADAR_RADIUS
+        self.satellites.set_zoom(self.radar_range, self.km_per_px)
+        for lat, lon in points:
+            self.trail.append(lat, lon)
+        print(f"Resumed after {asleep}s asleep{' (BOOT button)' if button else ''}, "
+              f"fix {self._unix_base - state['fix_time']}s old, {len(points)} trail points")
+        return True
+
+    def sleep_due(self):
+        """True when the ISS is out of range and not back for SLEEP_MIN_GAP"""
+        now = self.unix_time()
+        if not DEEP_SLEEP or not now or now < self._awake_until or \
+                self.orbit is None or self.screenshots.busy or \
+                (self.timelapse is not None and self.timelapse.busy):
+            return False
+        entry = self.passes.next_radar_entry(now)
+        if entry is None or entry - now < SLEEP_MIN_GAP:
+            return False
+        return self.calculate_position()[0] > MAX_RADAR_DISTANCE
+
+    def deep_sleep(self):
+        """Snapshot the state and sleep until shortly before the ISS returns"""
+        now = self.unix_time()
+        sleep_s = self.passes.next_radar_entry(now) - now - SLEEP_WAKE_LEAD
+        self.trail_log.flush()
+        state = {
+            'slept_at': now, 'sleep_ms': sleep_s * 1000,
+            'fix_lat': self.iss_data['lat'], 'fix_lon': self.iss_data['lon'],
+            'fix_time': self.iss_data['timestamp'],
+            'user_lat': USER_LAT, 'user_lon': USER_LON, 'location_time': self._location_time,
+            'sweep': self.sweep_angle, 'heading': self.heading, 'zoom': self.zoom,
+            'rtc_at': time.time(),
+        }
+        where = snapshot.save(state, self.trail)
+        print(f"Deep sleep for {sleep_s}s or until BOOT is pressed, snapshot in {where}")
+        self.fade_backlight(65535, 0)
+        self.wifi.wlan.active(False)
+        esp32.wake_on_ext0(self._boot_btn, esp32.WAKEUP_ALL_LOW)
+        deepsleep(sleep_s * 1000)
+
+    def replay_trail(self):
+        """Restore the logged trail so the pattern is back on the first frame"""
+        start = time.ticks_ms()
+        now = self.unix_time()
+        count = self.trail_log.replay(self.trail, now - TRAIL_REPLAY if now else 0)
+        if count:
+            print(f"Replayed {count} trail points in {time.ticks_diff(time.ticks_ms(), start)}ms")
+
+    def update_heading(self):
+        """Screen direction of travel from the last two ISS positions at least
+        HEADING_SPAN apart. Taken on screen, so it already allows for the
+        radar's projection; a frame only looks up the matching sprite."""
+        if not self.iss_data['timestamp']:
+            return
+        lat, lon = self.iss_data['lat'], self.iss_data['lon']
+        start = self._heading_from
+        self._heading_from = (lat, lon)
+        if start is None:
+            return
+        if abs(lat - start[0]) < HEADING_SPAN and abs(lon - start[1]) < HEADING_SPAN:
+            self._heading_from = start
+            return
+        # 1 km per px and no clamp at the edge, so only the direction matters
+        xy = self.observer.project((start[0], start[1], lat, lon), self._heading_xy,
+                                   km_per_px=1, max_px=30000)
+        dx, dy = xy[2] - xy[0], xy[3] - xy[1]
+        if dx or dy:
+            self.heading = math.degrees(math.atan2(dx, -dy)) % 360
 
-        except Exception as e:
-            print(f"Error in calculate_position: {e}")
-            return 1000, 0
+    def calculate_position(self):
+        """Slant range and bearing from the observer to the ISS"""
+        return self.observer.range_bearing(self.iss_data['lat'], self.iss_data['lon'])
 
     def draw_world_map(self):
-        """Draw world map as background with horizontal wrapping"""
-        x_offset = int(MAP_WIDTH/2 + (USER_LON * MAP_WIDTH/360))
-        y_offset = int(MAP_HEIGHT/2 - (USER_LAT * MAP_HEIGHT/180))
-
-        start_x = 120 - x_offset + 16
-        start_y = 120 - y_offset - 50
-
-        map_color = 0x6631
-
-        for screen_y in range(0, 240, 2):
-            map_y = screen_y - start_y
-            if 0 <= map_y < MAP_HEIGHT:
-                for screen_x in range(0, 240, 2):
-                    map_x = (screen_x - start_x) % MAP_WIDTH
-                    byte_index = (map_y * MAP_WIDTH + map_x) // 8
-                    bit_index = 7 - ((map_y * MAP_WIDTH + map_x) % 8)
-                    if byte_index < len(map_data):
-                        if map_data[byte_index] & (1 << bit_index):
-                            self.lcd.pixel(screen_x, screen_y, map_color)
+        """Blit the world map, reprojected around the observer"""
+        if self.layer is None:
+            start = time.ticks_ms()
+            self.layer = self.layers.get(self.radar_range, self.unix_time())
+            print(f"Map ready in {time.ticks_diff(time.ticks_ms(), start)}ms")
+        daylight = self.layer.daylight
+        if daylight is not None and daylight.updated:
+            # Map and night side in one 2-bit blit
+            self.lcd.blit(daylight.fb, 0, 0, 0, self._day_palette)
+        else:
+            # Palette maps set bits to the map color; key 0 skips the ocean
+            self.lcd.blit(self.layer.map, 0, 0, 0, self._map_palette)
+
+    def draw_background(self, fb, layer):
+        """Crosshair and range rings of one zoom level, labelled in km of slant range"""
+        self.line(120, 0, 120, 120, 1, fb)
+        self.line(112, 120, 128, 120, 1, fb)
+        for radius in RING_RADII:
+            self.circle(120, 120, radius, 1, fb)
+            self.draw_tiny_text(str(int(radius * layer.km_per_px)), 123, 122 - radius, 1, fb)
+
+    def observer_moved(self):
+        """Every map layer and screen point depends on the observer"""
+        self.layer = None
+        self.layers.clear()
+        self.trail.reproject()
+        self.satellites.reproject()
+        self._forecast_time = 0
+
+    def set_zoom(self, index):
+        """Switch zoom level. A cached level only swaps layers and projects the
+        trail points added since it was last shown."""
+        start = time.ticks_ms()
+        self.zoom = index % len(ZOOM_LEVELS)
+        self.radar_range = ZOOM_LEVELS[self.zoom]
+        self.km_per_px = self.radar_range / RADAR_RADIUS
+        cached = self.layers.cached(self.radar_range)
+        self.layer = self.layers.get(self.radar_range, self.unix_time())
+        self.satellites.set_zoom(self.radar_range, self.km_per_px)
+        if self.unix_time():
+            self.satellites.update(self.unix_time())
+        self.project_forecast()
+        print(f"Zoom {self.radar_range} km in {time.ticks_diff(time.ticks_ms(), start)}ms"
+              f"{'' if cached else ' (built)'}")
+
+    def _drop_zoom(self, radar_range):
+        """A zoom level's layers were evicted; free its trail views too"""
+        self.trail.drop(radar_range)
+        self.satellites.drop_zoom(radar_range)
 
     def draw_radar(self):
         """Main loop"""
@@ -447,18 +921,35 @@ class ISSTracker:
         self.lcd.fill(0x0000)
 
         self.draw_world_map()
+        self.draw_forecast()
+        self.satellites.draw(self.lcd, self._sat_palette)
 
-        if len(self.trajectory_points) > 1:
+        trail = self.trail
+        if trail.count > 1:
             dash_length = 3
             gap_length = 3
-
-            for i in range(len(self.trajectory_points) - 1):
-                x0, y0, t0 = self.trajectory_points[i]
-                x1, y1, t1 = self.trajectory_points[i + 1]
+            xy = trail.view(self.radar_range, self.observer, self.km_per_px, self.radar_range)
+
+            start, size = trail.slot(0), trail.size
+            x0 = y0 = -1
+            for k in range(trail.count):
+                i = ((start + k) % size) * 2
+                x1, y1 = xy[i], xy[i + 1]
+                if x1 < 0:
+                    x0 = -1
+                    continue
+                if x0 < 0:
+                    x0, y0 = x1, y1
+                    continue
+                # Dashes between points at least 5 px apart, as before zooming
+                if abs(x1 - x0) <= 5 and abs(y1 - y0) <= 5:
+                    continue
 
                 dx = x1 - x0
                 dy = y1 - y0
                 distance = math.sqrt(dx * dx + dy * dy)
+                x_prev, y_prev = x0, y0
+                x0, y0 = x1, y1
 
                 if distance > 30:
                     continue
@@ -471,18 +962,15 @@ class ISSTracker:
                         t_start = j * (dash_length + gap_length) / distance
                         t_end = min((j * (dash_length + gap_length) + dash_length) / distance, 1.0)
 
-                        x_start = int(x0 + dx * t_start + 0.5)
-                        y_start = int(y0 + dy * t_start + 0.5)
-                        x_end = int(x0 + dx * t_end + 0.5)
-                        y_end = int(y0 + dy * t_end + 0.5)
+                        x_start = int(x_prev + dx * t_start + 0.5)
+                        y_start = int(y_prev + dy * t_start + 0.5)
+                        x_end = int(x_prev + dx * t_end + 0.5)
+                        y_end = int(y_prev + dy * t_end + 0.5)
 
                         self.line(x_start, y_start, x_end, y_end, 0xE739)
 
-        self.line(center_x, 0, center_x, center_y, 0xFFFF)
-        self.line(center_x - 8, center_y, center_x + 8, center_y, 0xFFFF)
-
-        for radius in [30, 60, 90]:
-            self.circle(center_x, center_y, radius, 0xFFFF)
+        # Crosshair and range rings, pre-drawn for this zoom level
+        self.lcd.blit(self.layer.background, 0, 0, 0, self._ring_palette)
 
         self.draw_sweep(center_x, center_y, sweep_angle, 120)
 
@@ -492,24 +980,20 @@ class ISSTracker:
         screen_radius = 120
         arrow_buffer = 10
 
-        scaled_distance = min((distance / 100), screen_radius)
-        iss_in_range = distance <= MAX_RADAR_DISTANCE
+        scaled_distance = min((distance / self.km_per_px), screen_radius)
+        iss_in_range = distance <= self.radar_range
+
+        # The trail keeps what the widest zoom would show, whatever is on screen
+        if distance <= MAX_RADAR_DISTANCE and self.iss_data['timestamp']:
+            if self.trail.add(self.iss_data['lat'], self.iss_data['lon']):
+                self.trail_log.append(self.unix_time(), self.iss_data['lat'], self.iss_data['lon'])
 
         if iss_in_range:
             x = center_x + scaled_distance * math.sin(rad_bearing)
             y = center_y - scaled_distance * math.cos(rad_bearing)
 
-            if len(self.trajectory_points) == 0 or (
-                abs(self.trajectory_points[-1][0] - x) > 5 or
-                abs(self.trajectory_points[-1][1] - y) > 5
-            ):
-                self.trajectory_points.append((int(x), int(y), current_time))
-                if len(self.trajectory_points) > self.max_trajectory_points:
-                    self.trajectory_points.pop(0)
-
             icon_x = int(x - IMAGE_WIDTH // 2)
-            icon_y = int(y - IMAGE_HEIGHT // 2)
-            draw_image(self.lcd, icon_x, icon_y, 0xFFFF)
+            self.icon.draw(self.lcd, int(x), int(y), self.heading, self._icon_palette)
 
             if self.is_sweep_near_iss(sweep_angle, bearing):
                 lat = self.iss_data['lat']
@@ -517,7 +1001,7 @@ class ISSTracker:
                 lat_str = f"{abs(lat):.1f}{'N' if lat >= 0 else 'S'}"
                 lon_str = f"{abs(lon):.1f}{'E' if lon >= 0 else 'W'}"
 
-                text_y = icon_y + IMAGE_HEIGHT + 1
+                text_y = int(y) + self.icon.size // 2 + 1
                 self.draw_tiny_text(lat_str, icon_x, text_y, 0xFFFF)
                 self.draw_tiny_text(lon_str, icon_x, text_y + 6, 0xFFFF)
 
@@ -550,49 +1034,109 @@ class ISSTracker:
                 self.draw_tiny_text(lat_str, text_x, text_y, 0xFFFF)
                 self.draw_tiny_text(lon_str, text_x, text_y + 6, 0xFFFF)
 
+            self.draw_next_pass(center_x, center_y + 40)
+
         self.lcd.show()
 
     def run(self):
         """Main loop"""
         try:
-            self.boot_animation()
+            if self._resumed:
+                # First frame straight from the snapshot, before WiFi. The
+                # map comes from flash; the night side fills in over the
+                # next frames instead of holding this one up.
+                self.layer = self.layers.get(self.radar_range)
+                self.propagate_iss()
+                self.draw_radar()
+                self.lcd.set_bl_pwm(65535)
+            else:
+                self.boot_animation()
+            # A cached location lets the first frame go out without waiting
+            # on ip-api; a stale one is refreshed once that frame is drawn.
+            # It is loaded before the first fix so that fix is placed
+            # relative to the observer. A resume brings location and trail along.
+            cached = not self._resumed and self.load_cached_location()
             self.connect_wifi()
-            self.fetch_location()
-
-            start_time = time.ticks_ms()
-            self.last_update = start_time
-            last_wifi_check = start_time
-            WIFI_CHECK_INTERVAL = 2000
-            wifi_connected = True
-
-            self.fetch_iss_data()
+            self.start_listener()
+            # A fix heard from the aggregator makes the first upstream poll unnecessary
+            if not self.iss_data['timestamp'] and not self.fetch_iss_data() and \
+                    self.wifi.timings.get('mode') == 'fast':
+                # The reused lease may have expired; redo a full DHCP connect
+                self.wifi.forget()
+                self.wifi.wlan.disconnect()
+                self.connect_wifi()
+                self.fetch_iss_data()
+
+            location_due = False
+            if not self._resumed:
+                if cached:
+                    # Judged only now: the fix is what sets the clock
+                    location_due = geo_cache.is_stale(self._location_time, self.unix_time())
+                elif not self.use_shared_location():
+                    self.fetch_location()
+                self.replay_trail()
+            self.last_update = time.ticks_ms()
 
             while True:
                 current_time = time.ticks_ms()
 
-                if time.ticks_diff(current_time, last_wifi_check) >= WIFI_CHECK_INTERVAL:
-                    current_wifi_state = network.WLAN(network.STA_IF).isconnected()
-                    if current_wifi_state != wifi_connected:
-                        print("WiFi state changed:", "Connected" if current_wifi_state else "Disconnected")
-                        if not current_wifi_state:
-                            self.handle_connection_loss()
-                        wifi_connected = current_wifi_state
-                    last_wifi_check = current_time
+                link = self.wifi.poll()
+                if link is not None:
+                    print("WiFi state changed:", "Connected" if link else "Disconnected")
+                    if not link:
+                        self.handle_connection_loss()
 
-                if time.ticks_diff(current_time, self.last_update) >= UPDATE_INTERVAL:
+                # Poll upstream only while no aggregator is being heard
+                if self.poll_listener():
+                    self.last_update = current_time
+                elif (self.listener is None or self.listener.quiet()) and \
+                        time.ticks_diff(current_time, self.last_update) >= self.poll_interval:
                     self.fetch_iss_data()
                     self.last_update = current_time
                     gc.collect()
 
+                if time.ticks_diff(current_time, self._last_propagation) >= ORBIT_STEP:
+                    self._last_propagation = current_time
+                    self.propagate_iss()
+                    if self.unix_time():
+                        self.satellites.update(self.unix_time())
+                if self.orbit is None and self.motion.ready:
+                    # Glide between fixes instead of jumping once per poll
+                    lat, lon = self.motion.position(current_time)
+                    self.iss_data['lat'] = lat
+                    self.iss_data['lon'] = lon
+                self.update_heading()
+
                 self.draw_radar()
 
-                if self._screenshot_requested:
-                    self._screenshot_requested = False
-                    self.save_screenshot()
+                if self.tle_due():
+                    self.fetch_tle()
+                elif self.satellite_tles_due():
+                    self.fetch_satellite_tles()
+
+                self.update_passes()
+                self.update_forecast()
+                if self.layer is not None and self.layer.daylight is not None:
+                    self.layer.daylight.update(self.unix_time())
+                if self.trail_log.due(self.unix_time()):
+                    self.trail_log.flush()
+
+                if location_due:
+                    location_due = False
+                    if not self.use_shared_location():
+                        self.fetch_location()
+
+                self.poll_button()
+                self.service_screenshot()
+                self.service_timelapse()
+
+                if self.sleep_due():
+                    self.deep_sleep()
 
                 time.sleep_ms(25)
 
         except KeyboardInterrupt:
+            self.trail_log.flush()
             print("\nExiting gracefully...")
         except Exception as e:
             print(f"Runtime error: {e}")
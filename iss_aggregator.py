@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Fan-out aggregator for a fleet of ISS trackers — runs on a host computer.
+
+Polls the Open Notify API (and ip-api.com for the LAN's geolocation) once, and
+publishes each result as an 18-byte iss_packet over UDP multicast. Trackers on
+the same LAN pick the packets up with fix_listener.FixListener instead of
+polling upstream themselves. A HELLO packet from a booting tracker triggers an
+immediate resend of the current state.
+
+Usage:
+    python iss_aggregator.py
+    python iss_aggregator.py --interface 192.168.1.10
+    python iss_aggregator.py --interval 10 --ttl 2
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import time
+from urllib.parse import urlsplit
+
+import iss_packet
+
+ISS_URL = "http://api.open-notify.org/iss-now.json"
+LOCATION_URL = "http://ip-api.com/json/?fields=lat,lon"
+LOCATION_REFRESH = 3600     # seconds between geolocation lookups
+HELLO_HOLDOFF = 1.0         # seconds; caps resends when many trackers boot at once
+
+
+async def http_get_json(url, timeout=10):
+    """Minimal HTTP/1.0 GET returning the decoded JSON body."""
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(parts.hostname, parts.port or 80), timeout)
+    try:
+        writer.write(f"GET {path} HTTP/1.0\r\nHost: {parts.hostname}\r\n"
+                     f"User-Agent: iss-aggregator\r\n\r\n".encode())
+        data = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    head, _, body = data.partition(b"\r\n\r\n")
+    status = int(head.split()[1])
+    if status != 200:
+        raise OSError(f"HTTP {status} from {url}")
+    return json.loads(body)
+
+
+def multicast_socket(group, port, interface="0.0.0.0", ttl=1):
+    """UDP socket joined to group, sending through interface."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if hasattr(socket, "SO_REUSEPORT"):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(("", port))
+    mreq = socket.inet_aton(group) + socket.inet_aton(interface)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+    sock.setblocking(False)
+    return sock
+
+
+class _Protocol(asyncio.DatagramProtocol):
+    def __init__(self, aggregator):
+        self.aggregator = aggregator
+
+    def datagram_received(self, data, addr):
+        self.aggregator.on_packet(data)
+
+
+class Aggregator:
+    def __init__(self, group=iss_packet.GROUP, port=iss_packet.PORT, interval=30,
+                 interface="0.0.0.0", ttl=1, iss_url=ISS_URL, location_url=LOCATION_URL):
+        self.group = group
+        self.port = port
+        self.interval = interval
+        self.interface = interface
+        self.ttl = ttl
+        self.iss_url = iss_url
+        self.location_url = location_url
+        self.fix = None         # (timestamp, lat, lon)
+        self.location = None    # (lat, lon)
+        self.seq = 0
+        self.packets_sent = 0
+        self.upstream_requests = 0
+        self.transport = None
+        self._last_hello = 0.0
+        self._location_time = 0.0
+
+    async def start(self):
+        sock = multicast_socket(self.group, self.port, self.interface, self.ttl)
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(lambda: _Protocol(self), sock=sock)
+
+    def close(self):
+        if self.transport:
+            self.transport.close()
+
+    def publish(self, kind, timestamp, lat, lon):
+        self.seq += 1
+        self.transport.sendto(iss_packet.pack(kind, self.seq, timestamp, lat, lon),
+                              (self.group, self.port))
+        self.packets_sent += 1
+
+    def publish_state(self):
+        if self.fix:
+            self.publish(iss_packet.KIND_FIX, *self.fix)
+        if self.location:
+            self.publish(iss_packet.KIND_LOCATION, int(self._location_time), *self.location)
+
+    def on_packet(self, data):
+        packet = iss_packet.unpack(data)
+        if packet is None or packet[0] != iss_packet.KIND_HELLO:
+            return
+        now = time.monotonic()
+        if now - self._last_hello >= HELLO_HOLDOFF:
+            self._last_hello = now
+            self.publish_state()
+
+    async def refresh_location(self):
+        if not self.location_url:
+            return
+        try:
+            data = await http_get_json(self.location_url)
+            self.upstream_requests += 1
+            self.location = (float(data["lat"]), float(data["lon"]))
+            self._location_time = time.time()
+            print(f"Geolocation: {self.location[0]}, {self.location[1]}")
+        except (OSError, ValueError, KeyError, asyncio.TimeoutError) as e:
+            print(f"Geolocation failed: {e}")
+
+    async def poll_once(self):
+        if self.location_url and time.time() - self._location_time >= LOCATION_REFRESH:
+            await self.refresh_location()
+        try:
+            data = await http_get_json(self.iss_url)
+            self.upstream_requests += 1
+            position = data["iss_position"]
+            self.fix = (int(data["timestamp"]), float(position["latitude"]),
+                        float(position["longitude"]))
+        except (OSError, ValueError, KeyError, asyncio.TimeoutError) as e:
+            print(f"ISS fetch failed: {e}")
+            return False
+        self.publish_state()
+        return True
+
+    async def run(self):
+        await self.start()
+        print(f"Publishing to {self.group}:{self.port} every {self.interval}s")
+        try:
+            while True:
+                await self.poll_once()
+                await asyncio.sleep(self.interval)
+        finally:
+            self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Share one ISS API poll with a LAN of trackers")
+    parser.add_argument("--group", default=iss_packet.GROUP, help="Multicast group")
+    parser.add_argument("--port", type=int, default=iss_packet.PORT, help="UDP port")
+    parser.add_argument("--interval", type=float, default=30, help="Upstream poll interval in seconds")
+    parser.add_argument("--interface", default="0.0.0.0", help="IP of the LAN interface to publish on")
+    parser.add_argument("--ttl", type=int, default=1, help="Multicast TTL (1 = local subnet)")
+    parser.add_argument("--no-location", action="store_true", help="Do not publish geolocation")
+    args = parser.parse_args()
+
+    aggregator = Aggregator(args.group, args.port, args.interval, args.interface, args.ttl,
+                            location_url=None if args.no_location else LOCATION_URL)
+    try:
+        asyncio.run(aggregator.run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# iss_packet.py
+"""
+Compact binary packets shared by iss_aggregator.py (host) and the tracker's
+multicast listener (device). Works on MicroPython and CPython.
+
+Every packet is 18 bytes, little-endian:
+    magic 'IS', version, kind, sequence (u16), unix time (u32),
+    latitude and longitude in micro-degrees (i32).
+"""
+import struct
+
+GROUP = '239.255.43.21'   # administratively scoped, stays on the LAN
+PORT = 5544
+MAGIC = b'IS'
+VERSION = 1
+
+KIND_HELLO = 0      # tracker -> aggregator: please resend the current state
+KIND_FIX = 1        # ISS sub-satellite point
+KIND_LOCATION = 2   # geolocation of the LAN's public IP
+
+_FORMAT = '<2sBBHIii'
+PACKET_SIZE = struct.calcsize(_FORMAT)
+
+
+def pack(kind, seq, timestamp, lat, lon):
+    return struct.pack(_FORMAT, MAGIC, VERSION, kind, seq & 0xFFFF, timestamp,
+                       int(round(lat * 1000000)), int(round(lon * 1000000)))
+
+
+def unpack(data):
+    """Return (kind, seq, timestamp, lat, lon), or None for foreign packets."""
+    if len(data) < PACKET_SIZE:
+        return None
+    magic, version, kind, seq, timestamp, lat, lon = struct.unpack_from(_FORMAT, data)
+    if magic != MAGIC or version != VERSION:
+        return None
+    return kind, seq, timestamp, lat / 1000000, lon / 1000000
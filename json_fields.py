@@ -0,0 +1,186 @@
+# json_fields.py
+"""
+Streaming extractor for numeric fields in small JSON API responses.
+
+Reads the socket into a fixed buffer and picks out only the wanted keys as
+numbers, without building the body string or a dict tree. Works the same on
+MicroPython (socket.readinto) and CPython (any object with readinto).
+"""
+
+_QUOTE = 0x22       # "
+_BACKSLASH = 0x5C   # \
+_COLON = 0x3A       # :
+_MINUS = 0x2D       # -
+_PLUS = 0x2B        # +
+_DOT = 0x2E         # .
+_ZERO = 0x30
+_NINE = 0x39
+
+# Scanner states
+_OUT = 0            # between tokens
+_STR = 1            # inside a string (possibly a key)
+_ESC = 2            # after a backslash inside a string
+_AFTER_STR = 3      # string closed, waiting to see if a ':' follows
+_VALUE = 4          # wanted key seen, skipping to the value
+_NUMBER = 5         # accumulating number digits
+
+_KEY_MAX = 16
+
+_POW10 = (1.0, 10.0, 100.0, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9,
+          1e10, 1e11, 1e12, 1e13, 1e14, 1e15, 1e16)
+
+
+class FieldScanner:
+    """Pull numeric values for a fixed set of keys out of a JSON stream.
+
+    Values may be plain JSON numbers or numbers wrapped in quotes (as
+    open-notify sends its coordinates). Integers stay ints so timestamps are
+    exact; anything with a fraction or exponent becomes a float. Nesting is
+    ignored: the first occurrence of each key wins.
+    """
+
+    def __init__(self, keys, bufsize=128):
+        self.keys = keys
+        self.values = [0] * len(keys)
+        self.found = 0
+        self._all = (1 << len(keys)) - 1
+        self._buf = bytearray(bufsize)
+        self._key = bytearray(_KEY_MAX)
+
+    def scan(self, stream):
+        """Read stream to EOF. Returns True when every key was found."""
+        self.found = 0
+        buf = self._buf
+        key = self._key
+        values = self.values
+
+        state = _OUT
+        key_len = 0
+        index = -1
+        quoted = False
+        neg = False
+        mant = 0
+        frac = -1       # digits after '.', -1 while no '.' seen
+        exp = 0
+        exp_neg = False
+        in_exp = False
+        digits = 0
+
+        while True:
+            n = stream.readinto(buf)
+            if not n:
+                break
+            for i in range(n):
+                c = buf[i]
+
+                if state == _OUT:
+                    if c == _QUOTE:
+                        state = _STR
+                        key_len = 0
+
+                elif state == _STR:
+                    if c == _QUOTE:
+                        state = _AFTER_STR
+                    elif c == _BACKSLASH:
+                        state = _ESC
+                    else:
+                        if key_len < _KEY_MAX:
+                            key[key_len] = c
+                        key_len += 1
+
+                elif state == _ESC:
+                    key_len = _KEY_MAX + 1  # escaped keys never match
+                    state = _STR
+
+                elif state == _AFTER_STR:
+                    if c == _COLON:
+                        index = self._match(key, key_len)
+                        state = _VALUE if index >= 0 else _OUT
+                    elif c > 0x20:
+                        state = _OUT
+                        if c == _QUOTE:
+                            state = _STR
+                            key_len = 0
+
+                elif state == _VALUE:
+                    if c == _QUOTE and not quoted:
+                        quoted = True
+                    elif c > 0x20:
+                        state = _NUMBER
+                        neg = c == _MINUS
+                        mant = 0
+                        frac = -1
+                        exp = 0
+                        exp_neg = False
+                        in_exp = False
+                        digits = 0
+                        if _ZERO <= c <= _NINE:
+                            mant = c - _ZERO
+                            digits = 1
+                        elif c != _MINUS and c != _PLUS:
+                            state = self._skip(c, quoted)
+                            key_len = _KEY_MAX + 1
+                            quoted = False
+
+                else:  # _NUMBER
+                    if _ZERO <= c <= _NINE:
+                        if in_exp:
+                            exp = exp * 10 + c - _ZERO
+                        else:
+                            mant = mant * 10 + c - _ZERO
+                            digits += 1
+                            if frac >= 0:
+                                frac += 1
+                    elif c == _DOT and frac < 0 and not in_exp:
+                        frac = 0
+                    elif (c == 0x65 or c == 0x45) and not in_exp:  # e / E
+                        in_exp = True
+                    elif in_exp and (c == _MINUS or c == _PLUS) and exp == 0:
+                        exp_neg = c == _MINUS
+                    elif quoted and c != _QUOTE:
+                        # "12 km" is text, not a number; skip the rest of it
+                        state = self._skip(c, quoted)
+                        key_len = _KEY_MAX + 1
+                        quoted = False
+                    else:
+                        if digits and not self.found & (1 << index):
+                            if frac < 0 and not in_exp:
+                                values[index] = -mant if neg else mant
+                            else:
+                                e = (-exp if exp_neg else exp) - (frac if frac > 0 else 0)
+                                v = float(mant)
+                                if e < 0:
+                                    v /= _POW10[min(-e, 16)]
+                                elif e > 0:
+                                    v *= _POW10[min(e, 16)]
+                                values[index] = -v if neg else v
+                            self.found |= 1 << index
+                        state = _OUT
+                        quoted = False
+                        if self.found == self._all:
+                            return True
+
+        return self.found == self._all
+
+    @staticmethod
+    def _skip(c, quoted):
+        """State after a value turned out not to be a number at c. Inside
+        quotes the rest of the string is skipped, so its closing quote is not
+        taken for the start of a key."""
+        if not quoted or c == _QUOTE:
+            return _OUT
+        return _ESC if c == _BACKSLASH else _STR
+
+    def _match(self, key, key_len):
+        """Index of the wanted key equal to key[:key_len], or -1."""
+        keys = self.keys
+        for k in range(len(keys)):
+            want = keys[k]
+            if len(want) != key_len:
+                continue
+            for j in range(key_len):
+                if key[j] != want[j]:
+                    break
+            else:
+                return k
+        return -1
@@ -0,0 +1,84 @@
+# layers.py
+"""
+Per-zoom radar layers: the reprojected map, its day/night mask and the
+static rings with their range labels.
+
+A zoom level's layers are built the first time it is shown (the map from
+flash if it was cached there) and kept, so switching back to it is just a
+different blit. Before a level is built, and after, the least recently
+shown levels are dropped until enough memory is free.
+"""
+import gc
+import framebuf
+import map_projection
+from daylight import Daylight
+
+SIZE = map_projection.SIZE
+LEVEL_BYTES = 72 * 1024     # ring table, map, two day/night buffers, rings
+MIN_FREE = 32 * 1024        # left free for everything else
+
+
+class Layer:
+    def __init__(self, observer, radar_range, draw_background, night=True, now=0):
+        self.radar_range = radar_range
+        self.km_per_px = radar_range / (SIZE // 2)
+        ring_table = map_projection.rings(self.km_per_px)
+        land = map_projection.radar_map(observer, ring_table, self.km_per_px)
+        self.map = framebuf.FrameBuffer(land, SIZE, SIZE, framebuf.MONO_HLSB)
+        self.daylight = None
+        if night:
+            self.daylight = Daylight(observer, land, ring_table)
+            self.daylight.refresh(now)
+        self.background = framebuf.FrameBuffer(bytearray(SIZE * SIZE // 8), SIZE, SIZE,
+                                               framebuf.MONO_HLSB)
+        draw_background(self.background, self)
+
+
+class LayerCache:
+    def __init__(self, observer, draw_background, night=True, on_evict=None):
+        """draw_background(fb, layer) draws a level's static rings in colour 1;
+        on_evict(radar_range) is told when a level is dropped"""
+        self.observer = observer
+        self.draw_background = draw_background
+        self.night = night
+        self.on_evict = on_evict
+        self._levels = []       # least recently shown first
+
+    def get(self, radar_range, now=0):
+        """Layers for a zoom level, built if they are not cached"""
+        levels = self._levels
+        for i, layer in enumerate(levels):
+            if layer.radar_range == radar_range:
+                if i != len(levels) - 1:
+                    levels.append(levels.pop(i))
+                return layer
+        self._trim(LEVEL_BYTES + MIN_FREE)
+        layer = Layer(self.observer, radar_range, self.draw_background, self.night, now)
+        levels.append(layer)
+        self._trim(MIN_FREE)
+        return layer
+
+    def cached(self, radar_range):
+        for layer in self._levels:
+            if layer.radar_range == radar_range:
+                return True
+        return False
+
+    def clear(self):
+        """Drop every level, e.g. after the observer moved"""
+        while self._levels:
+            self._evict()
+        gc.collect()
+
+    def _trim(self, free):
+        """Drop least recently shown levels, keeping the newest, until free bytes are"""
+        gc.collect()
+        while len(self._levels) > 1 and gc.mem_free() < free:
+            self._evict()
+            gc.collect()
+
+    def _evict(self):
+        layer = self._levels.pop(0)
+        print(f"Dropping {layer.radar_range} km layers")
+        if self.on_evict:
+            self.on_evict(layer.radar_range)
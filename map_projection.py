@@ -0,0 +1,143 @@
+# map_projection.py
+"""
+Reprojects world_map onto the radar: azimuthal equidistant around the
+observer, at the radar's km per pixel (slant range, 100 at the widest zoom)
+that draw_radar uses, so coastlines line up with the plotted ISS.
+
+world_map is a Mercator bitmap covering about 84N to 57S. Fitted against
+coastline landmarks it has 0.89 px per degree of longitude, with the
+equator at row 145.4. The Americas and Greenland sit 23 px further west
+than the rest of the world, so the Atlantic is wider than it should be.
+Longitudes in that gap are looked up in both blocks.
+
+The result is a 240x240 MONO_HLSB bitmap with every second pixel in each
+direction, like the old map. Each frame only needs one palette blit, and
+the bitmap is cached on flash for the location it was built for, one file
+per zoom level.
+"""
+import math
+from array import array
+from world_map import map_data, MAP_WIDTH, MAP_HEIGHT
+from geometry import EARTH_RADIUS, ISS_ALTITUDE
+
+MAP_CACHE = 'radar_map_{}.bin'    # formatted with km per pixel
+SIZE = 240
+BYTES = SIZE * SIZE // 8
+KM_PER_PX = 100         # widest zoom
+STEP = 2                # sample every second pixel like the old map
+
+MAP_X_SCALE = 0.89      # px per degree of longitude
+MAP_Y_SCALE = 0.881     # px per degree of Mercator ordinate
+MAP_EQUATOR = 145.4     # row of the equator
+OLD_WORLD_X = 173.3     # column of longitude 0 for Europe, Africa, Asia, Australia
+AMERICAS_X = 149.9      # column of longitude 0 as the Americas block is drawn
+ATLANTIC = (-25.0, -11.5)  # longitudes where both blocks have coastline
+
+
+def _land(x, y):
+    i = y * MAP_WIDTH + x
+    return map_data[i >> 3] & (0x80 >> (i & 7))
+
+
+def rings(km_per_px=KM_PER_PX):
+    """cos(psi) and sin(psi)/r for every sample ring, indexed by r^2 // 4.
+
+    psi is the central angle the radar shows r pixels from the centre; the
+    point there along screen offset (dx, dy) is
+    cos(psi) * up + sin(psi)/r * (dx * east + dy * north).
+    """
+    n = (SIZE // 2) ** 2 // (STEP * STEP) + 1
+    cos_psi = array('f', bytes(4 * n))
+    sin_r = array('f', bytes(4 * n))
+    alt2 = ISS_ALTITUDE * ISS_ALTITUDE
+    for q in range(n):
+        r2 = q * STEP * STEP
+        slant2 = r2 * km_per_px * km_per_px
+        if slant2 <= alt2:
+            cos_psi[q] = 1.0
+        else:
+            psi = math.sqrt(slant2 - alt2) / EARTH_RADIUS
+            cos_psi[q] = math.cos(psi)
+            sin_r[q] = math.sin(psi) / math.sqrt(r2)
+    return cos_psi, sin_r
+
+
+def build(observer, ring_table=None, km_per_px=KM_PER_PX):
+    """Bitmap bytes for the radar map around a geometry.Observer"""
+    buf = bytearray(BYTES)
+    east, north, up = observer.east, observer.north, observer.up
+    cos_psi, sin_r = ring_table or rings(km_per_px)
+    n = len(cos_psi)
+    rad_to_deg = 180 / math.pi
+    lo, hi = ATLANTIC
+    for sy in range(0, SIZE, STEP):
+        dy = SIZE // 2 - sy
+        for sx in range(0, SIZE, STEP):
+            dx = sx - SIZE // 2
+            q = (dx * dx + dy * dy) // (STEP * STEP)
+            if q >= n:
+                continue
+            c = cos_psi[q]
+            s = sin_r[q]
+            # Point at distance psi along bearing (dx, dy) from the observer
+            px = c * up[0] + s * (dx * east[0] + dy * north[0])
+            py = c * up[1] + s * (dx * east[1] + dy * north[1])
+            pz = c * up[2] + s * (dy * north[2])
+            if pz >= 0.9999 or pz <= -0.9999:
+                continue
+            # Mercator ordinate straight from sin(lat)
+            my = MAP_EQUATOR - MAP_Y_SCALE * rad_to_deg * 0.5 * math.log((1 + pz) / (1 - pz))
+            map_y = int(my + 0.5)
+            if map_y < 0 or map_y >= MAP_HEIGHT:
+                continue
+            lon = math.atan2(py, px) * rad_to_deg
+            land = False
+            if lon <= hi:
+                map_x = int(AMERICAS_X + MAP_X_SCALE * lon + 0.5)
+                if map_x < 0:
+                    map_x += MAP_WIDTH
+                land = _land(map_x, map_y)
+            if not land and lon >= lo:
+                map_x = int(OLD_WORLD_X + MAP_X_SCALE * lon + 0.5)
+                if map_x >= MAP_WIDTH:
+                    map_x -= MAP_WIDTH
+                land = _land(map_x, map_y)
+            if land:
+                i = sy * SIZE + sx
+                buf[i >> 3] |= 0x80 >> (i & 7)
+    return buf
+
+
+def load(lat, lon, path):
+    """Cached bitmap if it was built for this location, else None"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.readline()
+            if header != f"{lat:.4f},{lon:.4f}\n".encode():
+                return None
+            buf = bytearray(BYTES)
+            if f.readinto(buf) != BYTES:
+                return None
+            return buf
+    except OSError:
+        return None
+
+
+def save(lat, lon, buf, path):
+    try:
+        with open(path, 'wb') as f:
+            f.write(f"{lat:.4f},{lon:.4f}\n".encode())
+            f.write(buf)
+    except OSError as e:
+        print(f"Map cache write failed: {e}")
+
+
+def radar_map(observer, ring_table=None, km_per_px=KM_PER_PX, path=None):
+    """MONO_HLSB bitmap bytes of the map around observer, from flash if possible"""
+    if path is None:
+        path = MAP_CACHE.format(int(km_per_px))
+    buf = load(observer.lat, observer.lon, path)
+    if buf is None:
+        buf = build(observer, ring_table, km_per_px)
+        save(observer.lat, observer.lon, buf, path)
+    return buf
@@ -0,0 +1,118 @@
+# motion.py
+"""
+Dead reckoning of the ISS sub-satellite point between fixes.
+
+Over a few minutes the ground track is close to a great circle travelled at
+a constant rate. Each new fix precomputes its unit vector p and the unit
+tangent q along that circle, so the position t seconds later is just
+p*cos(w*t) + q*sin(w*t), which costs four trig calls per frame.
+
+Further ahead the Earth turning underneath matters, so forecast() moves the
+fitted circle into a non-rotating frame, follows it there and turns the
+result back by the Earth's rotation.
+"""
+import math
+import time
+
+MAX_FIXES = 4
+MAX_SPAN = 300          # s; older fixes say little about the current heading
+MAX_EXTRAPOLATION = 180  # s; hold position rather than guess further
+EARTH_ROTATION = 7.2921158553e-5  # rad/s
+
+
+def unit_vector(lat, lon):
+    phi = math.radians(lat)
+    lam = math.radians(lon)
+    c = math.cos(phi)
+    return c * math.cos(lam), c * math.sin(lam), math.sin(phi)
+
+
+class MotionModel:
+    def __init__(self):
+        self.fixes = []         # (timestamp, x, y, z), oldest first
+        self.ready = False
+        self.rate = 0.0         # rad/s along the great circle
+        self._p = (0.0, 0.0, 1.0)
+        self._q = (0.0, 0.0, 0.0)
+        self._k = (0.0, 0.0, 1.0)
+        self._timestamp = 0
+        self._ticks = 0
+
+    def add_fix(self, lat, lon, timestamp, ticks=None):
+        """Record a fix; ticks is the time.ticks_ms() it applies to."""
+        fixes = self.fixes
+        if fixes and timestamp <= fixes[-1][0]:
+            return  # repeat of a fix we already have
+        self._ticks = time.ticks_ms() if ticks is None else ticks
+        self._timestamp = timestamp
+        p = unit_vector(lat, lon)
+        fixes.append((timestamp, p[0], p[1], p[2]))
+        while len(fixes) > MAX_FIXES or (len(fixes) > 1 and timestamp - fixes[0][0] > MAX_SPAN):
+            fixes.pop(0)
+        self._p = p
+        self._q = (0.0, 0.0, 0.0)
+        self.rate = 0.0
+        self.ready = False
+        if len(fixes) < 2:
+            return
+
+        # Rotation axis and rate from the oldest fix still in the window
+        t0, x0, y0, z0 = fixes[0]
+        kx = y0 * p[2] - z0 * p[1]
+        ky = z0 * p[0] - x0 * p[2]
+        kz = x0 * p[1] - y0 * p[0]
+        s = math.sqrt(kx * kx + ky * ky + kz * kz)
+        if s < 1e-9:
+            return
+        angle = math.atan2(s, x0 * p[0] + y0 * p[1] + z0 * p[2])
+        kx, ky, kz = kx / s, ky / s, kz / s
+        self.rate = angle / (timestamp - t0)
+
+        # Tangent q = k x p points along the direction of travel
+        qx = ky * p[2] - kz * p[1]
+        qy = kz * p[0] - kx * p[2]
+        qz = kx * p[1] - ky * p[0]
+        self._q = (qx, qy, qz)
+        self._k = (kx, ky, kz)
+        self.ready = True
+
+    def position(self, ticks=None):
+        """Extrapolated (lat, lon) in degrees at a time.ticks_ms() value."""
+        now = time.ticks_ms() if ticks is None else ticks
+        dt = time.ticks_diff(now, self._ticks) / 1000
+        if dt > MAX_EXTRAPOLATION:
+            dt = MAX_EXTRAPOLATION
+        elif dt < 0:
+            dt = 0
+        theta = self.rate * dt
+        c = math.cos(theta)
+        s = math.sin(theta)
+        p, q = self._p, self._q
+        x = p[0] * c + q[0] * s
+        y = p[1] * c + q[1] * s
+        z = p[2] * c + q[2] * s
+        return math.degrees(math.asin(max(-1.0, min(1.0, z)))), math.degrees(math.atan2(y, x))
+
+    def forecast(self, timestamp):
+        """(lat, lon) at a unix time, following the fitted orbit past the extrapolation limit"""
+        if not self.ready:
+            return None
+        dt = timestamp - self._timestamp
+        p = self._p
+        # Inertial angular velocity: ground track plus the part of the Earth's
+        # spin that moves p, so the orbit stays a great circle
+        spin = EARTH_ROTATION * p[2]
+        wx = self.rate * self._k[0] - spin * p[0]
+        wy = self.rate * self._k[1] - spin * p[1]
+        wz = self.rate * self._k[2] + EARTH_ROTATION - spin * p[2]
+        w = math.sqrt(wx * wx + wy * wy + wz * wz)
+        ax, ay, az = wx / w, wy / w, wz / w
+        # Rodrigues rotation of p about a by w*dt
+        c = math.cos(w * dt)
+        s = math.sin(w * dt)
+        d = (ax * p[0] + ay * p[1] + az * p[2]) * (1 - c)
+        x = p[0] * c + (ay * p[2] - az * p[1]) * s + ax * d
+        y = p[1] * c + (az * p[0] - ax * p[2]) * s + ay * d
+        z = p[2] * c + (ax * p[1] - ay * p[0]) * s + az * d
+        lon = math.degrees(math.atan2(y, x) - EARTH_ROTATION * dt)
+        return math.degrees(math.asin(max(-1.0, min(1.0, z)))), (lon + 180) % 360 - 180
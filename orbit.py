@@ -0,0 +1,407 @@
+# orbit.py
+"""
+Near-earth SGP4 orbit propagation from a two-line element set.
+
+A trimmed port of the Spacetrack Report #3 / Vallado SGP4 model (WGS-72
+constants, improved mode) without the deep-space branch, which only applies
+to orbits longer than 225 minutes. Written for MicroPython's single precision
+floats: times are kept as integer unix seconds plus a small fraction, and
+sidereal time is computed from a split day count, so no large float is ever
+mixed with a small one.
+"""
+import math
+
+# WGS-72
+EARTH_RADIUS = 6378.135         # km
+XKE = 0.0743669161331734132     # sqrt(mu / R^3) in earth radii^1.5 / min
+J2 = 0.001082616
+J3OJ2 = -0.00000253881 / J2
+J4 = -0.00000165597
+TWO_PI = 2 * math.pi
+X2O3 = 2.0 / 3.0
+
+# WGS-84 flattening for the geodetic sub-satellite latitude
+FLATTENING = 1 / 298.257223563
+E2 = FLATTENING * (2 - FLATTENING)
+
+UNIX_J2000 = 946728000          # 2000-01-01 12:00:00 UTC
+FETCHED = '# fetched '          # first line of a cached TLE file, then unix s
+
+
+def _field(line, start, end):
+    return line[start:end].strip()
+
+
+def _implied_decimal(text):
+    """TLE '-11606-4' style field -> float."""
+    text = text.strip()
+    if not text:
+        return 0.0
+    sign = -1.0 if text[0] == '-' else 1.0
+    if text[0] in '+-':
+        text = text[1:]
+    mantissa, exponent = text[:-2], text[-2:]
+    return sign * float('0.' + mantissa.strip()) * 10 ** int(exponent)
+
+
+def _epoch_unix(field):
+    """TLE epoch 'YYDDD.DDDDDDDD' -> (whole unix seconds, fraction of a second)."""
+    yy = int(field[:2])
+    year = 1900 + yy if yy >= 57 else 2000 + yy
+    day, _, frac = field[2:].partition('.')
+    days = 365 * (year - 1970) + (year - 1969) // 4 + int(day) - 1
+    frac = frac.strip()
+    scaled = int(frac) * 86400 if frac else 0   # exact integer arithmetic
+    denom = 10 ** len(frac)
+    return days * 86400 + scaled // denom, (scaled % denom) / denom
+
+
+class SGP4:
+    """SGP4 model for one satellite. Raises ValueError for bad or deep-space TLEs."""
+
+    def __init__(self, line1, line2, name=''):
+        if not (line1.startswith('1 ') and line2.startswith('2 ')):
+            raise ValueError("not a two-line element set")
+        self.name = name
+        self.line1 = line1
+        self.line2 = line2
+        self.catnr = int(_field(line1, 2, 7))
+        self.epoch, self.epoch_frac = _epoch_unix(_field(line1, 18, 32))
+        self.bstar = _implied_decimal(line1[53:61])
+
+        self.inclo = math.radians(float(_field(line2, 8, 16)))
+        self.nodeo = math.radians(float(_field(line2, 17, 25)))
+        self.ecco = float('0.' + _field(line2, 26, 33))
+        self.argpo = math.radians(float(_field(line2, 34, 42)))
+        self.mo = math.radians(float(_field(line2, 43, 51)))
+        no_kozai = float(_field(line2, 52, 63)) * TWO_PI / 1440.0    # rad/min
+
+        if TWO_PI / no_kozai >= 225.0:
+            raise ValueError("deep-space orbit not supported")
+        self._init(no_kozai)
+
+    def _init(self, no_kozai):
+        ecco, inclo, bstar = self.ecco, self.inclo, self.bstar
+
+        # Recover the original mean motion and semi-major axis
+        eccsq = ecco * ecco
+        omeosq = 1.0 - eccsq
+        rteosq = math.sqrt(omeosq)
+        cosio = math.cos(inclo)
+        cosio2 = cosio * cosio
+        ak = (XKE / no_kozai) ** X2O3
+        d1 = 0.75 * J2 * (3.0 * cosio2 - 1.0) / (rteosq * omeosq)
+        dl = d1 / (ak * ak)
+        adel = ak * (1.0 - dl * dl - dl * (1.0 / 3.0 + 134.0 * dl * dl / 81.0))
+        dl = d1 / (adel * adel)
+        no = no_kozai / (1.0 + dl)
+        ao = (XKE / no) ** X2O3
+        sinio = math.sin(inclo)
+        po = ao * omeosq
+        con42 = 1.0 - 5.0 * cosio2
+        con41 = -con42 - cosio2 - cosio2
+        posq = po * po
+        rp = ao * (1.0 - ecco)
+
+        self.no = no
+        self.con41 = con41
+        self.x1mth2 = 1.0 - cosio2
+        self.x7thm1 = 7.0 * cosio2 - 1.0
+        self.isimp = rp < 220.0 / EARTH_RADIUS + 1.0
+
+        # Atmospheric drag terms, with the perigee-dependent s parameter
+        ss = 78.0 / EARTH_RADIUS + 1.0
+        qzms2t = ((120.0 - 78.0) / EARTH_RADIUS) ** 4
+        sfour = ss
+        qzms24 = qzms2t
+        perige = (rp - 1.0) * EARTH_RADIUS
+        if perige < 156.0:
+            sfour = perige - 78.0
+            if perige < 98.0:
+                sfour = 20.0
+            qzms24 = ((120.0 - sfour) / EARTH_RADIUS) ** 4
+            sfour = sfour / EARTH_RADIUS + 1.0
+        pinvsq = 1.0 / posq
+
+        tsi = 1.0 / (ao - sfour)
+        eta = ao * ecco * tsi
+        etasq = eta * eta
+        eeta = ecco * eta
+        psisq = abs(1.0 - etasq)
+        coef = qzms24 * tsi ** 4
+        coef1 = coef / psisq ** 3.5
+        cc2 = coef1 * no * (ao * (1.0 + 1.5 * etasq + eeta * (4.0 + etasq)) +
+                            0.375 * J2 * tsi / psisq * con41 *
+                            (8.0 + 3.0 * etasq * (8.0 + etasq)))
+        cc1 = bstar * cc2
+        cc3 = 0.0
+        if ecco > 1.0e-4:
+            cc3 = -2.0 * coef * tsi * J3OJ2 * no * sinio / ecco
+        cc4 = 2.0 * no * coef1 * ao * omeosq * (
+            eta * (2.0 + 0.5 * etasq) + ecco * (0.5 + 2.0 * etasq) -
+            J2 * tsi / (ao * psisq) * (
+                -3.0 * con41 * (1.0 - 2.0 * eeta + etasq * (1.5 - 0.5 * eeta)) +
+                0.75 * self.x1mth2 * (2.0 * etasq - eeta * (1.0 + etasq)) *
+                math.cos(2.0 * self.argpo)))
+        cc5 = 2.0 * coef1 * ao * omeosq * (1.0 + 2.75 * (etasq + eeta) + eeta * etasq)
+
+        # Secular rates from the zonal harmonics
+        cosio4 = cosio2 * cosio2
+        temp1 = 1.5 * J2 * pinvsq * no
+        temp2 = 0.5 * temp1 * J2 * pinvsq
+        temp3 = -0.46875 * J4 * pinvsq * pinvsq * no
+        self.mdot = (no + 0.5 * temp1 * rteosq * con41 +
+                     0.0625 * temp2 * rteosq * (13.0 - 78.0 * cosio2 + 137.0 * cosio4))
+        self.argpdot = (-0.5 * temp1 * con42 +
+                        0.0625 * temp2 * (7.0 - 114.0 * cosio2 + 395.0 * cosio4) +
+                        temp3 * (3.0 - 36.0 * cosio2 + 49.0 * cosio4))
+        xhdot1 = -temp1 * cosio
+        self.nodedot = xhdot1 + (0.5 * temp2 * (4.0 - 19.0 * cosio2) +
+                                 2.0 * temp3 * (3.0 - 7.0 * cosio2)) * cosio
+        self.omgcof = bstar * cc3 * math.cos(self.argpo)
+        self.xmcof = -X2O3 * coef * bstar / eeta if ecco > 1.0e-4 else 0.0
+        self.nodecf = 3.5 * omeosq * xhdot1 * cc1
+        self.t2cof = 1.5 * cc1
+        den = 1.0 + cosio if abs(cosio + 1.0) > 1.5e-12 else 1.5e-12
+        self.xlcof = -0.25 * J3OJ2 * sinio * (3.0 + 5.0 * cosio) / den
+        self.aycof = -0.5 * J3OJ2 * sinio
+        self.delmo = (1.0 + eta * math.cos(self.mo)) ** 3
+        self.sinmao = math.sin(self.mo)
+        self.eta = eta
+        self.cc1 = cc1
+        self.cc4 = cc4
+        self.cc5 = cc5
+
+        if not self.isimp:
+            cc1sq = cc1 * cc1
+            self.d2 = 4.0 * ao * tsi * cc1sq
+            temp = self.d2 * tsi * cc1 / 3.0
+            self.d3 = (17.0 * ao + sfour) * temp
+            self.d4 = 0.5 * temp * ao * tsi * (221.0 * ao + 31.0 * sfour) * cc1
+            self.t3cof = self.d2 + 2.0 * cc1sq
+            self.t4cof = 0.25 * (3.0 * self.d3 + cc1 * (12.0 * self.d2 + 10.0 * cc1sq))
+            self.t5cof = 0.2 * (3.0 * self.d4 + 12.0 * cc1 * self.d3 +
+                                6.0 * self.d2 * self.d2 + 15.0 * cc1sq * (2.0 * self.d2 + cc1sq))
+
+    def propagate(self, t):
+        """TEME position (x, y, z) in km, t minutes after the TLE epoch."""
+        # Secular gravity and drag
+        xmdf = self.mo + self.mdot * t
+        argpdf = self.argpo + self.argpdot * t
+        nodedf = self.nodeo + self.nodedot * t
+        argpm = argpdf
+        mm = xmdf
+        t2 = t * t
+        nodem = nodedf + self.nodecf * t2
+        tempa = 1.0 - self.cc1 * t
+        tempe = self.bstar * self.cc4 * t
+        templ = self.t2cof * t2
+
+        if not self.isimp:
+            delomg = self.omgcof * t
+            delm = self.xmcof * ((1.0 + self.eta * math.cos(xmdf)) ** 3 - self.delmo)
+            temp = delomg + delm
+            mm = xmdf + temp
+            argpm = argpdf - temp
+            t3 = t2 * t
+            t4 = t3 * t
+            tempa = tempa - self.d2 * t2 - self.d3 * t3 - self.d4 * t4
+            tempe = tempe + self.bstar * self.cc5 * (math.sin(mm) - self.sinmao)
+            templ = templ + self.t3cof * t3 + t4 * (self.t4cof + t * self.t5cof)
+
+        am = (XKE / self.no) ** X2O3 * tempa * tempa
+        em = self.ecco - tempe
+        if em < 1.0e-6:
+            em = 1.0e-6
+        mm = mm + self.no * templ
+        xlm = mm + argpm + nodem
+        nodem = nodem % TWO_PI
+        argpm = argpm % TWO_PI
+
+        # Long-period periodics
+        axnl = em * math.cos(argpm)
+        temp = 1.0 / (am * (1.0 - em * em))
+        aynl = em * math.sin(argpm) + temp * self.aycof
+        xl = xlm + temp * self.xlcof * axnl
+
+        # Kepler's equation
+        u = (xl - nodem) % TWO_PI
+        eo1 = u
+        for _ in range(10):
+            sineo1 = math.sin(eo1)
+            coseo1 = math.cos(eo1)
+            tem5 = (u - aynl * coseo1 + axnl * sineo1 - eo1) / \
+                (1.0 - coseo1 * axnl - sineo1 * aynl)
+            if tem5 > 0.95:
+                tem5 = 0.95
+            elif tem5 < -0.95:
+                tem5 = -0.95
+            eo1 += tem5
+            if abs(tem5) < 1.0e-12:
+                break
+        sineo1 = math.sin(eo1)
+        coseo1 = math.cos(eo1)
+
+        # Short-period periodics
+        ecose = axnl * coseo1 + aynl * sineo1
+        esine = axnl * sineo1 - aynl * coseo1
+        el2 = axnl * axnl + aynl * aynl
+        pl = am * (1.0 - el2)
+        if pl < 0.0:
+            raise ValueError("orbit decayed")
+        rl = am * (1.0 - ecose)
+        betal = math.sqrt(1.0 - el2)
+        temp = esine / (1.0 + betal)
+        sinu = am / rl * (sineo1 - aynl - axnl * temp)
+        cosu = am / rl * (coseo1 - axnl + aynl * temp)
+        su = math.atan2(sinu, cosu)
+        sin2u = (cosu + cosu) * sinu
+        cos2u = 1.0 - 2.0 * sinu * sinu
+        temp = 1.0 / pl
+        temp1 = 0.5 * J2 * temp
+        temp2 = temp1 * temp
+
+        cosip = math.cos(self.inclo)
+        sinip = math.sin(self.inclo)
+        mrt = rl * (1.0 - 1.5 * temp2 * betal * self.con41) + \
+            0.5 * temp1 * self.x1mth2 * cos2u
+        su = su - 0.25 * temp2 * self.x7thm1 * sin2u
+        xnode = nodem + 1.5 * temp2 * cosip * sin2u
+        xinc = self.inclo + 1.5 * temp2 * cosip * sinip * cos2u
+
+        # Orientation vectors -> position
+        sinsu = math.sin(su)
+        cossu = math.cos(su)
+        snod = math.sin(xnode)
+        cnod = math.cos(xnode)
+        sini = math.sin(xinc)
+        cosi = math.cos(xinc)
+        xmx = -snod * cosi
+        xmy = cnod * cosi
+        r = mrt * EARTH_RADIUS
+        return (r * (xmx * sinsu + cnod * cossu),
+                r * (xmy * sinsu + snod * cossu),
+                r * sini * sinsu)
+
+    def minutes_since_epoch(self, unix_s, ms=0):
+        """Split integer/fractional arithmetic keeps this exact in float32."""
+        return ((unix_s - self.epoch) + (ms / 1000 - self.epoch_frac)) / 60.0
+
+    def subpoint(self, unix_s, ms=0):
+        """Geodetic (lat, lon) in degrees under the satellite at a unix time."""
+        x, y, z = self.propagate(self.minutes_since_epoch(unix_s, ms))
+        return ecef_subpoint(x, y, z, gmst(unix_s, ms))
+
+
+def gmst(unix_s, ms=0):
+    """Greenwich mean sidereal angle in radians (IAU-82, linear in days).
+
+    The whole days since J2000 only contribute their excess over full turns
+    (0.98564736629 deg/day), so no float ever holds a large day count.
+    """
+    secs = unix_s - UNIX_J2000
+    days = secs // 86400
+    frac = ((secs - days * 86400) + ms / 1000) / 86400.0
+    deg = 280.46061837 + (0.98564736629 * days) % 360.0 + 360.98564736629 * frac
+    return math.radians(deg % 360.0)
+
+
+def ecef_subpoint(x, y, z, theta):
+    """TEME vector rotated by sidereal angle theta -> geodetic (lat, lon) degrees."""
+    lon = math.atan2(y, x) - theta
+    lon = (lon + math.pi) % TWO_PI - math.pi
+    p = math.sqrt(x * x + y * y)
+    lat = math.atan2(z, p)
+    for _ in range(3):
+        s = math.sin(lat)
+        c = EARTH_RADIUS / math.sqrt(1.0 - E2 * s * s)
+        lat = math.atan2(z + c * E2 * s, p)
+    return math.degrees(lat), math.degrees(lon)
+
+
+def _lines(text):
+    """Non-blank lines of TLE text, without '#' comments such as the fetch time."""
+    return [l for l in (l.strip() for l in text.split('\n')) if l and not l.startswith('#')]
+
+
+def parse_tle(text):
+    """First satellite in 2- or 3-line TLE text -> SGP4, or None."""
+    lines = _lines(text)
+    name = ''
+    for i in range(len(lines) - 1):
+        if lines[i].startswith('1 ') and lines[i + 1].startswith('2 '):
+            if i > 0:
+                name = lines[i - 1]
+            return SGP4(lines[i], lines[i + 1], name)
+    return None
+
+
+def parse_tles(text):
+    """Every near-earth satellite in 2- or 3-line TLE text -> list of SGP4."""
+    lines = _lines(text)
+    models = []
+    for i in range(len(lines) - 1):
+        if lines[i].startswith('1 ') and lines[i + 1].startswith('2 '):
+            name = lines[i - 1] if i > 0 and not lines[i - 1].startswith('2 ') else ''
+            try:
+                models.append(SGP4(lines[i], lines[i + 1], name))
+            except ValueError as e:
+                print(f"Skipping TLE {name}: {e}")
+    return models
+
+
+def load_tle(path):
+    """SGP4 model from a TLE file on flash, or None if missing or invalid."""
+    try:
+        with open(path) as f:
+            return parse_tle(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def save_tle(path, model, fetched=0):
+    """Cache one satellite's elements, with the unix time they were fetched."""
+    return save_tles(path, (model,), fetched)
+
+
+def load_fetched(path):
+    """Unix time a TLE file was downloaded, from its first line; 0 if not recorded."""
+    try:
+        with open(path) as f:
+            line = f.readline()
+        if line.startswith(FETCHED):
+            return int(line[len(FETCHED):])
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def download_age(fetched, epoch, now):
+    """Seconds since elements were downloaded. Elements cannot be fetched
+    before their epoch, so a fetch time that is missing, earlier than the
+    epoch or in the future falls back to the epoch."""
+    if not epoch <= fetched <= now:
+        fetched = epoch
+    return now - fetched
+
+
+def load_tles(path):
+    """All satellites in a TLE file on flash; empty if missing."""
+    try:
+        with open(path) as f:
+            return parse_tles(f.read())
+    except OSError:
+        return []
+
+
+def save_tles(path, models, fetched=0):
+    try:
+        with open(path, 'w') as f:
+            if fetched:
+                f.write(f"{FETCHED}{fetched}\n")
+            for model in models:
+                f.write(f"{model.name}\n{model.line1}\n{model.line2}\n")
+        return True
+    except OSError as e:
+        print(f"TLE write failed: {e}")
+        return False
@@ -0,0 +1,191 @@
+# passes.py
+"""
+Pass prediction for the observer from an orbit.SGP4 model.
+
+Finds when the ISS rises above the horizon (AOS), its closest approach (TCA,
+highest elevation) and when it sets (LOS), plus the times it enters radar
+range, over the next day or two. A coarse search steps in time by how far
+the ISS is from each boundary divided by the fastest rate it can close that
+gap, so the far side of an orbit costs only a few propagations. Crossings
+are then refined with the Illinois false-position method and the pass
+maximum with a golden-section search.
+
+Results are cached and only recomputed when the elements or the observer
+change, or the predicted window runs out.
+"""
+import math
+import orbit
+from geometry import EARTH_RADIUS, ISS_ALTITUDE
+
+EARTH_ROTATION = 7.2921158553e-5 * 60   # rad/min
+MIN_STEP = 0.5          # minutes; coarse step near the horizon, so short passes are kept
+RADAR_STEP = 3.0        # minutes; the radar circle is wide enough to step over faster
+MARGIN = 0.035          # rad; slack for the ellipsoid and altitude changes
+TOLERANCE = 1.0 / 60    # minutes; refine crossings to one second
+PEAK_TOLERANCE = 0.1    # minutes; elevation is flat around its maximum
+GOLDEN = 0.6180339887
+
+
+class PassPredictor:
+    def __init__(self, radar_range, hours=24, min_elevation=0.0):
+        self.hours = hours
+        self.min_elevation = min_elevation
+        self.passes = []        # (aos, tca, los, max elevation deg) in unix seconds
+        self.radar_entries = []  # unix seconds the ISS comes into radar range
+        self.evaluations = 0
+        self._key = None
+        self._until = 0
+        ground = math.sqrt(max(radar_range * radar_range - ISS_ALTITUDE * ISS_ALTITUDE, 0))
+        self._radar_cos = math.cos(ground / EARTH_RADIUS)
+        self._radar_psi = ground / EARTH_RADIUS
+        self._sin_min_el = math.sin(math.radians(min_elevation))
+
+    def update(self, model, lat, lon, now):
+        """Recompute if the elements, observer or window changed. True if recomputed."""
+        if model is None or not now:
+            return False
+        key = (model.catnr, model.epoch, lat, lon)
+        # An empty window is cached too: far north there may be no pass at all
+        if key == self._key and now < self._until - 3600:
+            return False
+        self._key = key
+        self.compute(model, lat, lon, now)
+        return True
+
+    def next_pass(self, now):
+        """The first pass that has not set yet, or None."""
+        for p in self.passes:
+            if p[2] > now:
+                return p
+        return None
+
+    def next_radar_entry(self, now):
+        for t in self.radar_entries:
+            if t > now:
+                return t
+        return None
+
+    def _setup(self, model, lat, lon, now):
+        self._model = model
+        self._base = now
+        self._t0 = model.minutes_since_epoch(now)
+        self._theta0 = orbit.gmst(now)
+        phi = math.radians(lat)
+        lam = math.radians(lon)
+        # Geodetic up vector and observer position on the ellipsoid
+        self._up = (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+        n = orbit.EARTH_RADIUS / math.sqrt(1.0 - orbit.E2 * math.sin(phi) ** 2)
+        self._obs = (n * self._up[0], n * self._up[1], n * (1.0 - orbit.E2) * self._up[2])
+        r = math.sqrt(sum(c * c for c in self._obs))
+        self._dir = (self._obs[0] / r, self._obs[1] / r, self._obs[2] / r)
+        # Horizon in central angle for a satellite at ISS height
+        self._horizon_psi = math.acos(EARTH_RADIUS / (EARTH_RADIUS + ISS_ALTITUDE))
+        # Fastest the central angle can change: orbit rate plus Earth rotation
+        self._max_rate = 1.1 * (model.no + EARTH_ROTATION)
+
+    def _state(self, minutes):
+        """(sine of elevation, cosine of central angle) `minutes` after the base time."""
+        self.evaluations += 1
+        x, y, z = self._model.propagate(self._t0 + minutes)
+        theta = self._theta0 + EARTH_ROTATION * minutes
+        c = math.cos(theta)
+        s = math.sin(theta)
+        xe = x * c + y * s
+        ye = y * c - x * s
+        r = math.sqrt(xe * xe + ye * ye + z * z)
+        d = self._dir
+        cos_psi = (xe * d[0] + ye * d[1] + z * d[2]) / r
+        o = self._obs
+        rx, ry, rz = xe - o[0], ye - o[1], z - o[2]
+        rho = math.sqrt(rx * rx + ry * ry + rz * rz)
+        u = self._up
+        return (rx * u[0] + ry * u[1] + rz * u[2]) / rho, cos_psi
+
+    def _elevation(self, minutes):
+        return self._state(minutes)[0] - self._sin_min_el
+
+    def _radar(self, minutes):
+        return self._state(minutes)[1] - self._radar_cos
+
+    def _refine(self, f, a, fa, b, fb):
+        """Root of f in [a, b] where f changes sign (Illinois false position)."""
+        side = 0
+        while b - a > TOLERANCE:
+            m = (a * fb - b * fa) / (fb - fa)
+            fm = f(m)
+            if fm * fb > 0:
+                b, fb = m, fm
+                if side == -1:
+                    fa *= 0.5
+                side = -1
+            else:
+                a, fa = m, fm
+                if side == 1:
+                    fb *= 0.5
+                side = 1
+            if fm == 0:
+                return m
+        return (a + b) / 2
+
+    def _peak(self, a, b):
+        """Time and value of the highest elevation in [a, b] (golden section)."""
+        c = b - GOLDEN * (b - a)
+        d = a + GOLDEN * (b - a)
+        fc = self._state(c)[0]
+        fd = self._state(d)[0]
+        while b - a > PEAK_TOLERANCE:
+            if fc > fd:
+                b, d, fd = d, c, fc
+                c = b - GOLDEN * (b - a)
+                fc = self._state(c)[0]
+            else:
+                a, c, fc = c, d, fd
+                d = a + GOLDEN * (b - a)
+                fd = self._state(d)[0]
+        return (c, fc) if fc > fd else (d, fd)
+
+    def compute(self, model, lat, lon, now):
+        self._setup(model, lat, lon, now)
+        self.evaluations = 0
+        passes = []
+        entries = []
+        end = self.hours * 60.0
+        horizon_psi = self._horizon_psi
+        radar_psi = self._radar_psi
+
+        t = 0.0
+        sin_el, cos_psi = self._state(t)
+        el = sin_el - self._sin_min_el
+        radar = cos_psi - self._radar_cos
+        aos = 0.0 if el > 0 else None
+
+        while t < end:
+            psi = math.acos(max(-1.0, min(1.0, cos_psi)))
+            rate = self._max_rate
+            step = min(max((abs(psi - horizon_psi) - MARGIN) / rate, MIN_STEP),
+                       max((abs(psi - radar_psi) - MARGIN) / rate, RADAR_STEP))
+            t_next = t + step
+            sin_el, cos_psi = self._state(t_next)
+            el_next = sin_el - self._sin_min_el
+            radar_next = cos_psi - self._radar_cos
+
+            if radar <= 0 < radar_next:
+                entries.append(self._refine(self._radar, t, radar, t_next, radar_next))
+            if el <= 0 < el_next:
+                aos = self._refine(self._elevation, t, el, t_next, el_next)
+            elif el > 0 >= el_next and aos is not None:
+                los = self._refine(self._elevation, t, el, t_next, el_next)
+                tca, peak = self._peak(aos, los)
+                passes.append((self._unix(aos), self._unix(tca), self._unix(los),
+                               math.degrees(math.asin(max(-1.0, min(1.0, peak))))))
+                aos = None
+
+            t, el, radar = t_next, el_next, radar_next
+
+        self.passes = passes
+        self.radar_entries = [self._unix(m) for m in entries]
+        self._until = self._unix(end)
+        self._model = None
+
+    def _unix(self, minutes):
+        return self._base + int(minutes * 60 + 0.5)
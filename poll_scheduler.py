@@ -0,0 +1,86 @@
+# poll_scheduler.py
+"""
+Adaptive poll interval for the ISS position API.
+
+While the ISS is inside (or about to enter) radar range it is polled at the
+normal rate so the trail keeps its resolution. Further out the interval grows
+with the predicted time until the ISS comes back into range.
+
+The prediction uses the fact that, for a point moving along a great circle at
+a constant angular rate w, the cosine of its angular distance from a fixed
+observer is a pure sinusoid: cos(psi(t)) = a*cos(w*t) + b*sin(w*t). Two fixes
+pin down a and b, which gives the next time psi drops back to the radar edge.
+"""
+import math
+from geometry import EARTH_RADIUS, ISS_ALTITUDE
+
+ORBIT_RATE = 2 * math.pi / 5570   # rad/s, ISS orbital period ~92.8 min
+MAX_GROUND_SPEED = 8.0  # km/s, upper bound incl. Earth rotation
+MIN_INTERVAL = 5000     # ms
+
+
+class PollScheduler:
+    def __init__(self, max_range, fast_ms=30000, slow_ms=600000, lead_ms=60000):
+        self.max_range = max_range
+        self.fast_ms = fast_ms
+        self.slow_ms = slow_ms
+        self.lead_ms = lead_ms
+        self._edge_psi = self._ground_angle(max_range)
+        self._edge_cos = math.cos(self._edge_psi)
+        self._last_cos = None
+        self._last_time = 0
+        self.entry_in = None  # predicted seconds until the ISS enters range
+
+    @staticmethod
+    def _ground_angle(slant_range):
+        ground = math.sqrt(max(slant_range * slant_range - ISS_ALTITUDE * ISS_ALTITUDE, 0))
+        return ground / EARTH_RADIUS
+
+    def update(self, distance, fix_time):
+        """Record a fix (slant range in km, unix seconds) and return the
+        interval in ms until the next poll."""
+        psi = self._ground_angle(distance)
+        c = math.cos(psi)
+        prev_cos, prev_time = self._last_cos, self._last_time
+        self._last_cos, self._last_time = c, fix_time
+
+        if distance <= self.max_range:
+            self.entry_in = 0
+            return self.fast_ms
+
+        entry = None
+        dt = fix_time - prev_time
+        if prev_cos is not None and dt > 0:
+            entry = self._predict_entry(prev_cos, c, dt)
+        if entry is None:
+            # Worst case: heading straight for the radar edge at full speed
+            entry = (psi - self._edge_psi) * EARTH_RADIUS / MAX_GROUND_SPEED
+        self.entry_in = entry
+
+        entry_ms = int(entry * 1000)
+        interval = entry_ms - self.lead_ms
+        if interval < self.fast_ms:
+            # Entry is close: land the next poll on the predicted entry time
+            # (the prediction errs early) rather than up to fast_ms after it
+            return max(min(entry_ms, self.fast_ms), MIN_INTERVAL)
+        return min(interval, self.slow_ms)
+
+    def _predict_entry(self, c0, c1, dt):
+        """Seconds from the second fix until cos(psi) rises to the edge value,
+        or None when the two fixes cannot constrain the sinusoid."""
+        wdt = ORBIT_RATE * dt
+        s = math.sin(wdt)
+        if abs(s) < 0.1:
+            return None
+        a = c0
+        b = (c1 - a * math.cos(wdt)) / s
+        amp = math.sqrt(a * a + b * b)
+        if amp <= self._edge_cos:
+            # Ground track misses the radar this orbit; Earth rotation moves
+            # it about 23 degrees west per orbit, so check again in one orbit.
+            return 2 * math.pi / ORBIT_RATE
+        # cos(psi) = amp*cos(theta); it rises through the edge value at
+        # theta = -acos(edge/amp), mod 2*pi
+        now = wdt - math.atan2(b, a)
+        target = -math.acos(max(-1.0, min(1.0, self._edge_cos / amp)))
+        return ((target - now) % (2 * math.pi)) / ORBIT_RATE
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Render the radar mandala offline, at any resolution and over days of orbits.
+
+The device draws the last 1000 trail points on a 240x240 screen. This
+renders the same picture from a fix log (the tracker's trail_N.bin
+segments, see trail_log.py) or from an orbit propagated with orbit.py,
+for any time span and image size.
+
+The drawing follows the device step by step. Points are thinned to the
+trail spacing (trail.GeoTrail), projected with the Observer geometry the
+tracker uses (vectorized here with NumPy), and joined by draw_radar's
+dashes: 3 px on, 3 px off, skipping points under 5 px apart and gaps over
+30 px. All of this is worked out in 240-pixel radar units and scaled to
+the output, so the mandala looks the same, just sharper. The dashes are
+rasterized in chunks of bounded size into one mask.
+
+Usage:
+    python render_mandala.py --lat 40.71 --lon -74.01 --tle tle.txt --days 7
+    python render_mandala.py --lat 40.71 --lon -74.01 --log trail_*.bin -o log.png
+    python render_mandala.py --lat 51.5 --lon -0.13 --tle tle.txt --start 2024-10-20 \\
+        --hours 36 --range 6000 --size 8192
+"""
+
+import argparse
+import calendar
+import math
+import sys
+import time
+
+import numpy as np
+
+import orbit
+import trail_log
+from convert_screenshot import rgb565_to_rgb888
+from geometry import EARTH_RADIUS, ISS_ALTITUDE, Observer
+from trail import SPACING, GeoTrail
+
+try:
+    from PIL import Image
+except ImportError:
+    sys.exit("Pillow is required: pip install Pillow")
+
+RADAR_RADIUS = 120      # px, the device's radar
+RING_RADII = (30, 60, 90)   # as in iss-tracker.py
+DASH = 3                # px on, then DASH px off, as draw_radar
+MIN_STEP = 5            # px a point must move before a dash is drawn to it
+MAX_GAP = 30            # px beyond which two points are not joined
+MAX_RADAR_DISTANCE = 12000  # km, as iss-tracker.py: farther points are never stored
+TRAIL_COLOR = 0xE739
+RING_COLOR = 0xFFFF
+CHUNK_SAMPLES = 1 << 22     # line samples rasterized at once
+
+
+def parse_time(text):
+    """Unix seconds from a number or a UTC date/time such as 2024-10-20T06:00"""
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    for fmt in ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M", "%Y-%m-%d"):
+        try:
+            return calendar.timegm(time.strptime(text, fmt))
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"not a unix time or UTC date: {text}")
+
+
+def log_points(paths, start=None, end=None):
+    """(lat, lon) degree arrays of the logged points in time order"""
+    dtype = np.dtype([("t", "<u4"), ("lat", "<i2"), ("lon", "<i2")])
+    parts = []
+    for path in paths:
+        data = np.fromfile(path, dtype=np.uint8)
+        usable = len(data) // trail_log.RECORD_SIZE * trail_log.RECORD_SIZE     # drop a torn record
+        parts.append(data[:usable].view(dtype))
+    records = np.concatenate(parts) if parts else np.zeros(0, dtype)
+    records = records[np.argsort(records["t"], kind="stable")]
+    keep = np.ones(len(records), dtype=bool)
+    if start is not None:
+        keep &= records["t"] >= start
+    if end is not None:
+        keep &= records["t"] < end
+    records = records[keep]
+    return records["lat"] / 100.0, records["lon"] / 100.0
+
+
+def orbit_points(model, start, end, step):
+    """(lat, lon) degree arrays of the sub-satellite point every step s"""
+    times = np.arange(start, end, step)
+    lat = np.empty(len(times))
+    lon = np.empty(len(times))
+    for k, t in enumerate(times.tolist()):
+        s = int(t)
+        lat[k], lon[k] = model.subpoint(s, int((t - s) * 1000))
+    return lat, lon
+
+
+def thin(lat, lon, spacing):
+    """The points a GeoTrail of this spacing would have stored"""
+    trail = GeoTrail(max(len(lat), 1), spacing)
+    for a, b in zip(lat.tolist(), lon.tolist()):
+        trail.add(a, b)
+    geo = np.frombuffer(trail.geo, dtype=np.int16)[:2 * trail.count].reshape(-1, 2)
+    return geo[:, 0] / 100.0, geo[:, 1] / 100.0
+
+
+def project(observer, lat, lon, km_per_px, max_range):
+    """Observer.project over arrays: radar x, y in float pixels, NaN beyond max_range"""
+    phi = np.radians(lat)
+    lam = np.radians(lon)
+    c = np.cos(phi)
+    x = c * np.cos(lam)
+    y = c * np.sin(lam)
+    z = np.sin(phi)
+    e_, n_, u_ = observer.east, observer.north, observer.up
+    e = x * e_[0] + y * e_[1]
+    n = x * n_[0] + y * n_[1] + z * n_[2]
+    u = x * u_[0] + y * u_[1] + z * u_[2]
+    h = np.hypot(e, n)
+    ground = EARTH_RADIUS * np.arctan2(h, u)
+    slant = np.sqrt(ground * ground + ISS_ALTITUDE * ISS_ALTITUDE)
+    r = np.minimum(slant / km_per_px, RADAR_RADIUS) / np.where(h > 0, h, 1.0)
+    px = RADAR_RADIUS + e * r
+    py = RADAR_RADIUS - n * r
+    outside = slant > max_range
+    px[outside] = np.nan
+    py[outside] = np.nan
+    return px, py
+
+
+def dashes(px, py):
+    """draw_radar's trail dashes as (x0, y0, x1, y1) arrays in radar pixels"""
+    pairs = []
+    x0 = y0 = None
+    for x1, y1 in zip(px.tolist(), py.tolist()):
+        if x1 != x1:            # NaN: out of range breaks the trail
+            x0 = None
+            continue
+        if x0 is None:
+            x0, y0 = x1, y1
+            continue
+        if abs(x1 - x0) <= MIN_STEP and abs(y1 - y0) <= MIN_STEP:
+            continue
+        pairs.append((x0, y0, x1, y1))
+        x0, y0 = x1, y1
+    if not pairs:
+        return (np.zeros(0),) * 4
+    a = np.array(pairs)
+    dx = a[:, 2] - a[:, 0]
+    dy = a[:, 3] - a[:, 1]
+    dist = np.hypot(dx, dy)
+    keep = (dist > 0) & (dist <= MAX_GAP)
+    a, dx, dy, dist = a[keep], dx[keep], dy[keep], dist[keep]
+    count = np.maximum((dist / (2 * DASH)).astype(int), 1)
+    pair = np.repeat(np.arange(len(a)), count)
+    j = np.arange(len(pair)) - np.repeat(np.cumsum(count) - count, count)
+    t0 = j * (2 * DASH) / dist[pair]
+    t1 = np.minimum((j * (2 * DASH) + DASH) / dist[pair], 1.0)
+    x, y = a[pair, 0], a[pair, 1]
+    return x + dx[pair] * t0, y + dy[pair] * t0, x + dx[pair] * t1, y + dy[pair] * t1
+
+
+def background():
+    """Range rings and crosshair of draw_background, as segments in radar pixels"""
+    angles = np.linspace(0, 2 * math.pi, 361)
+    parts = [(np.array([120.0, 112.0]), np.array([0.0, 120.0]), np.array([120.0, 128.0]), np.array([120.0, 120.0]))]
+    for radius in RING_RADII:
+        x = RADAR_RADIUS + radius * np.cos(angles)
+        y = RADAR_RADIUS + radius * np.sin(angles)
+        parts.append((x[:-1], y[:-1], x[1:], y[1:]))
+    return tuple(np.concatenate([p[i] for p in parts]) for i in range(4))
+
+
+def rasterize(segments, size, stroke=1, chunk=CHUNK_SAMPLES):
+    """Boolean size x size mask of segments given in radar pixels"""
+    scale = size / (2 * RADAR_RADIUS)
+    x0, y0, x1, y1 = (s * scale for s in segments)
+    mask = np.zeros(size * size, dtype=bool)
+    # Two samples per output pixel along each segment
+    steps = np.ceil(np.hypot(x1 - x0, y1 - y0) * 2).astype(np.int64) + 1
+    ends = np.cumsum(steps)
+    first = 0
+    while first < len(steps):
+        base = ends[first] - steps[first]
+        last = max(int(np.searchsorted(ends, base + chunk, side="right")), first + 1)
+        n = steps[first:last]
+        seg = np.repeat(np.arange(first, last), n)
+        t = (np.arange(len(seg)) - np.repeat(np.cumsum(n) - n, n)) / np.maximum(n[seg - first] - 1, 1)
+        x = np.rint(x0[seg] + (x1[seg] - x0[seg]) * t).astype(np.int64)
+        y = np.rint(y0[seg] + (y1[seg] - y0[seg]) * t).astype(np.int64)
+        inside = (x >= 0) & (x < size) & (y >= 0) & (y < size)
+        mask[y[inside] * size + x[inside]] = True
+        first = last
+    mask = mask.reshape(size, size)
+    if stroke > 1:
+        mask = thicken(mask, stroke)
+    return mask
+
+
+def thicken(mask, stroke):
+    """mask dilated by a disc stroke pixels across"""
+    out = mask.copy()
+    r = (stroke - 1) / 2
+    reach = int(math.ceil(r))
+    for dy in range(-reach, reach + 1):
+        for dx in range(-reach, reach + 1):
+            if (dx or dy) and dx * dx + dy * dy <= r * r + 0.5:
+                shifted = np.roll(np.roll(mask, dy, axis=0), dx, axis=1)
+                # Drop what np.roll wrapped round the edges
+                if dy > 0:
+                    shifted[:dy] = False
+                elif dy < 0:
+                    shifted[dy:] = False
+                if dx > 0:
+                    shifted[:, :dx] = False
+                elif dx < 0:
+                    shifted[:, dx:] = False
+                out |= shifted
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the ISS radar mandala at high resolution")
+    parser.add_argument("--lat", type=float, required=True, help="Observer latitude")
+    parser.add_argument("--lon", type=float, required=True, help="Observer longitude")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--tle", help="TLE file to propagate (e.g. tle.txt from the device)")
+    source.add_argument("--log", nargs="+", help="Trail log segments (trail_0.bin ...) from the device")
+    parser.add_argument("--start", type=parse_time,
+                        help="Unix time or UTC date (default: TLE epoch, or the first logged point)")
+    span = parser.add_mutually_exclusive_group()
+    span.add_argument("--days", type=float, help="Time span in days (default: 1 for --tle, all for --log)")
+    span.add_argument("--hours", type=float, help="Time span in hours")
+    parser.add_argument("--step", type=float, default=1.0, help="Propagation step in s (default: 1)")
+    parser.add_argument("--range", type=float, default=12000,
+                        help="Slant range in km at the radar edge, as ZOOM_LEVELS (default: 12000)")
+    parser.add_argument("--size", type=int, default=4096, help="Image width and height in px (default: 4096)")
+    parser.add_argument("--stroke", type=int, help="Line width in px (default: size / 1024)")
+    parser.add_argument("--no-rings", action="store_true", help="Leave out the range rings and crosshair")
+    parser.add_argument("-o", "--output", default="mandala.png", help="Output PNG (default: mandala.png)")
+    args = parser.parse_args()
+
+    span_s = args.days * 86400 if args.days else args.hours * 3600 if args.hours else None
+    clock = time.perf_counter()
+    if args.tle:
+        with open(args.tle) as f:
+            model = orbit.parse_tle(f.read())
+        if model is None:
+            sys.exit(f"{args.tle}: no usable TLE")
+        start = args.start if args.start is not None else model.epoch
+        lat, lon = orbit_points(model, start, start + (span_s or 86400), args.step)
+    else:
+        end = args.start + span_s if args.start is not None and span_s else None
+        lat, lon = log_points(args.log, args.start, end)
+    print(f"{len(lat)} points in {time.perf_counter() - clock:.2f} s")
+
+    clock = time.perf_counter()
+    observer = Observer(args.lat, args.lon)
+    stored = ~np.isnan(project(observer, lat, lon, 1, MAX_RADAR_DISTANCE)[0])
+    lat, lon = thin(lat[stored], lon[stored], SPACING)
+    px, py = project(observer, lat, lon, args.range / RADAR_RADIUS, args.range)
+    trail = dashes(px, py)
+    print(f"{len(lat)} trail points, {len(trail[0])} dashes in {time.perf_counter() - clock:.2f} s")
+
+    clock = time.perf_counter()
+    stroke = args.stroke or max(args.size // 1024, 1)
+    image = np.zeros((args.size, args.size, 3), dtype=np.uint8)
+    image[rasterize(trail, args.size, stroke)] = rgb565_to_rgb888(TRAIL_COLOR)
+    if not args.no_rings:
+        image[rasterize(background(), args.size, stroke)] = rgb565_to_rgb888(RING_COLOR)
+    print(f"Rasterized in {time.perf_counter() - clock:.2f} s")
+
+    Image.fromarray(image, "RGB").save(args.output)
+    print(f"Saved {args.output} ({args.size}x{args.size})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# rle565.py
+"""
+Run-length coding of RGB565 frames, shared by the tracker (encoder) and
+the host tools convert_screenshot.py and convert_timelapse.py (decoder).
+
+A file is an 8-byte header (b'R565', width and height as uint16 LE)
+followed by every row coded on its own, PackBits style over pairs of
+RGB565 pixels (4 bytes; the width must be even). A control byte c < 128
+is followed by c + 1 literal pairs; a control byte c >= 128 by one pair
+repeated c - 126 times (2..129). Pairs rather than single pixels because
+the map is drawn on every second pixel, which single-pixel runs cannot
+follow. Rows never share a run, so the encoder can work through a frame
+a few rows at a time. Pixels are kept as the raw bytes of the frame
+buffer, so decoding gives back exactly the bytes that were there.
+
+The radar is mostly black, so a frame typically shrinks to under a
+seventh of its 115200 raw bytes.
+"""
+import struct
+from array import array
+
+MAGIC = b'R565'
+HEADER = '<4sHH'
+HEADER_SIZE = 8
+MAX_LITERAL = 128
+MAX_REPEAT = 129
+
+
+def header(width, height):
+    return struct.pack(HEADER, MAGIC, width, height)
+
+
+def encode_row(buf, y, width, out):
+    """Append the coded row y of an RGB565 buffer to the bytearray out"""
+    start = y * width * 2
+    raw = memoryview(buf)[start:start + width * 2]
+    # 16-bit pixels compared two at a time; 32-bit items would not all be small ints
+    row = array('H', bytes(raw))
+    n = width // 2
+    i = 0
+    while i < n:
+        a = row[2 * i]
+        b = row[2 * i + 1]
+        j = i + 1
+        while j < n and j - i < MAX_REPEAT and row[2 * j] == a and row[2 * j + 1] == b:
+            j += 1
+        if j - i >= 2:
+            out.append(126 + j - i)
+            out.extend(raw[4 * i:4 * i + 4])
+            i = j
+            continue
+        # Literals up to the next two equal pairs
+        j = i + 1
+        while j < n and j - i < MAX_LITERAL and not (
+                j + 1 < n and row[2 * j] == row[2 * j + 2] and row[2 * j + 1] == row[2 * j + 3]):
+            j += 1
+        out.append(j - i - 1)
+        out.extend(raw[4 * i:4 * j])
+        i = j
+
+
+def is_rle(data):
+    return data[:4] == MAGIC
+
+
+def decode_into(data, pos, out):
+    """Decode coded rows from data[pos:] until out is full; returns the
+    position just past them"""
+    o = 0
+    end = len(out)
+    while o < end:
+        if pos >= len(data):
+            raise ValueError("truncated RLE565 frame")
+        c = data[pos]
+        if c < 128:
+            count = (c + 1) * 4
+            chunk = data[pos + 1:pos + 1 + count]
+            pos += 1 + count
+        else:
+            count = (c - 126) * 4
+            chunk = data[pos + 1:pos + 5] * (count // 4)
+            pos += 5
+        if len(chunk) != count or o + count > end:
+            raise ValueError("corrupt RLE565 frame")
+        out[o:o + count] = chunk
+        o += count
+    return pos
+
+
+def decode(data):
+    """(width, height, raw RGB565 bytes) from a coded frame"""
+    if len(data) < HEADER_SIZE:
+        raise ValueError("truncated RLE565 header")
+    magic, width, height = struct.unpack_from(HEADER, data)
+    if magic != MAGIC:
+        raise ValueError("not an RLE565 frame")
+    out = bytearray(width * height * 2)
+    decode_into(data, HEADER_SIZE, out)
+    return width, height, bytes(out)
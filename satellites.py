@@ -0,0 +1,186 @@
+# satellites.py
+"""
+Other satellites on the radar (Tiangong, Hubble, ...) next to the ISS.
+
+Every object is propagated from its own TLE in one pass and projected
+through geometry.Observer.project() in one batch call. Trails and markers
+are drawn into one shared GS2_HMSB layer only when an object moves, so a
+frame costs a single blit however many objects are tracked. Each object
+keeps its trail as a trail.GeoTrail, so it survives zoom and location
+changes, and its per-zoom screen view lets expired segments be erased from
+the layer.
+"""
+import framebuf
+from array import array
+from trail import GeoTrail
+
+SIZE = 240
+TRAIL_POINTS = 200      # per object
+TRAIL_SPACING = 1.5     # degrees between trail points (~170 km)
+MAX_SEGMENT = 30        # px; longer jumps are not joined
+MARKER = 3              # px square marking the current position
+COLORS = 3              # GS2 leaves three colours besides transparent
+
+
+class TrackedObject:
+    def __init__(self, model, color):
+        self.model = model
+        self.name = model.name
+        self.catnr = model.catnr
+        self.color = color          # palette index 1..3
+        self.x = self.y = -1        # cached screen position, -1 off the radar
+        self.trail = GeoTrail(TRAIL_POINTS, TRAIL_SPACING)
+        self.xy = None              # trail view for the current zoom
+
+
+class Registry:
+    def __init__(self, observer, max_range, km_per_px=100):
+        self.observer = observer
+        self.max_range = max_range
+        self.km_per_px = km_per_px
+        self.objects = []
+        self._buf = bytearray(SIZE * SIZE // 4)
+        self.layer = framebuf.FrameBuffer(self._buf, SIZE, SIZE, framebuf.GS2_HMSB)
+        # Scratch the size of the longest segment, to find the pixels one covers
+        side = MAX_SEGMENT + 1
+        self._mask = framebuf.FrameBuffer(bytearray((side + 7) // 8 * side), side, side,
+                                          framebuf.MONO_HLSB)
+        self._coords = array('f')
+        self._xy = array('h')
+
+    def set_models(self, models):
+        """Track these SGP4 models; objects already tracked keep their trails"""
+        old = {obj.catnr: obj for obj in self.objects}
+        objects = []
+        for model in models:
+            obj = old.get(model.catnr)
+            if obj is None:
+                obj = TrackedObject(model, len(objects) % COLORS + 1)
+            else:
+                obj.model = model
+            objects.append(obj)
+        self.objects = objects
+        self._coords = array('f', bytes(8 * len(objects)))
+        self._xy = array('h', bytes(4 * len(objects)))
+        self.redraw()
+
+    def set_zoom(self, max_range, km_per_px):
+        """Show another zoom level; trail views are projected as needed"""
+        self.max_range = max_range
+        self.km_per_px = km_per_px
+        for obj in self.objects:
+            obj.x = obj.y = -1      # the next update() places the markers
+        self.redraw()
+
+    def drop_zoom(self, max_range):
+        """Free the trail views of a zoom level that is no longer cached"""
+        for obj in self.objects:
+            obj.trail.drop(max_range)
+
+    def reproject(self):
+        """The observer moved: every screen point is stale"""
+        for obj in self.objects:
+            obj.x = obj.y = -1
+            obj.trail.reproject()
+        self.redraw()
+
+    def update(self, unix_s):
+        """Propagate and project every object in one pass; True if the layer changed"""
+        coords = self._coords
+        off = []
+        for i, obj in enumerate(self.objects):
+            try:
+                coords[2 * i], coords[2 * i + 1] = obj.model.subpoint(unix_s)
+            except ValueError:
+                off.append(i)   # decayed or unusable elements
+        xy = self.observer.project(coords, self._xy, self.km_per_px, max_range=self.max_range)
+        for i in off:
+            xy[2 * i] = xy[2 * i + 1] = -1
+        changed = False
+        for i, obj in enumerate(self.objects):
+            if i in off:
+                continue
+            if self._move(obj, coords[2 * i], coords[2 * i + 1], xy[2 * i], xy[2 * i + 1]):
+                changed = True
+        return changed
+
+    def draw(self, display, palette):
+        if self.objects:
+            display.blit(self.layer, 0, 0, 0, palette)
+
+    def _view(self, obj):
+        obj.xy = obj.trail.view(self.max_range, self.observer, self.km_per_px, self.max_range)
+        return obj.xy
+
+    def _move(self, obj, lat, lon, x, y):
+        layer = self.layer
+        trail = obj.trail
+        due = trail.due(lat, lon)
+        if x == obj.x and y == obj.y and not due:
+            return False
+        if obj.x >= 0:
+            self._erase_marker(obj)
+        if due:
+            self._append(obj, lat, lon)
+        elif trail.count > 1:
+            # The marker may have covered the newest segment
+            self._segment(obj, (trail.head - 2) % TRAIL_POINTS, obj.color)
+        obj.x, obj.y = x, y
+        if x >= 0:
+            layer.fill_rect(x - MARKER // 2, y - MARKER // 2, MARKER, MARKER, obj.color)
+        return True
+
+    def _append(self, obj, lat, lon):
+        trail = obj.trail
+        if trail.count == TRAIL_POINTS:
+            # Erase the oldest segment before its slot is reused
+            self._segment(obj, trail.head, 0)
+        trail.append(lat, lon)
+        self._view(obj)
+        self._segment(obj, (trail.head - 2) % TRAIL_POINTS, obj.color)
+
+    def _segment(self, obj, slot, color):
+        """Draw the segment from ring slot to the one after it"""
+        trail = obj.trail
+        if trail.count < 2 or slot == (trail.head - 1) % TRAIL_POINTS:
+            return
+        xy = obj.xy
+        i = slot * 2
+        j = ((slot + 1) % TRAIL_POINTS) * 2
+        x0, y0, x1, y1 = xy[i], xy[i + 1], xy[j], xy[j + 1]
+        if x0 < 0 or x1 < 0 or abs(x1 - x0) + abs(y1 - y0) > MAX_SEGMENT:
+            return
+        if color:
+            self.layer.line(x0, y0, x1, y1, color)
+            return
+        # Erasing: clear only the pixels still in this object's colour, so
+        # another track crossing the segment keeps its pixels
+        left, top = min(x0, x1), min(y0, y1)
+        mask = self._mask
+        mask.fill(0)
+        mask.line(x0 - left, y0 - top, x1 - left, y1 - top, 1)
+        layer = self.layer
+        for y in range(abs(y1 - y0) + 1):
+            for x in range(abs(x1 - x0) + 1):
+                if mask.pixel(x, y) and layer.pixel(left + x, top + y) == obj.color:
+                    layer.pixel(left + x, top + y, 0)
+
+    def _erase_marker(self, obj):
+        """Clear the marker's pixels that are still in its colour"""
+        layer = self.layer
+        for y in range(obj.y - MARKER // 2, obj.y - MARKER // 2 + MARKER):
+            for x in range(obj.x - MARKER // 2, obj.x - MARKER // 2 + MARKER):
+                if layer.pixel(x, y) == obj.color:
+                    layer.pixel(x, y, 0)
+
+    def redraw(self):
+        """Rebuild the layer from the trails at the current zoom"""
+        self.layer.fill(0)
+        for obj in self.objects:
+            self._view(obj)
+            trail = obj.trail
+            for k in range(trail.count - 1):
+                self._segment(obj, trail.slot(k), obj.color)
+            if obj.x >= 0:
+                self.layer.fill_rect(obj.x - MARKER // 2, obj.y - MARKER // 2,
+                                     MARKER, MARKER, obj.color)
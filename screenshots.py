@@ -0,0 +1,137 @@
+# screenshots.py
+"""
+Compressed screenshots, written a few rows per frame.
+
+start() copies the frame buffer (one fast memory copy, so the picture is
+the frame the button was pressed on) and opens the file. Each step()
+then codes ROWS_PER_STEP rows with rle565 and appends them, so the frame
+loop never waits on a 115 KB flash write. If there is no RAM for the
+copy, rows are coded from the live buffer instead and may come from
+successive frames.
+
+How many screenshots fit is decided by free flash space, not a fixed
+count: one is only started while a worst-case (uncompressible) frame
+would still leave RESERVE bytes free.
+"""
+import os
+import rle565
+
+PREFIX = 'screenshot_'
+EXTENSION = '.rle'
+ROWS_PER_STEP = 8
+RESERVE = 128 * 1024    # flash kept free for the trail log, map caches and TLEs
+
+
+def free_bytes(path='/'):
+    try:
+        st = os.statvfs(path)
+        return st[0] * st[4]    # block size * blocks available
+    except (AttributeError, OSError):
+        return 0
+
+
+def existing(path='/'):
+    """Numbers of the screenshots already on flash, raw (.bin) or coded"""
+    numbers = []
+    try:
+        for name in os.listdir(path):
+            if name.startswith(PREFIX) and (name.endswith('.bin') or name.endswith(EXTENSION)):
+                try:
+                    numbers.append(int(name[len(PREFIX):-4]))
+                except ValueError:
+                    pass
+    except OSError:
+        pass
+    return numbers
+
+
+class ScreenshotWriter:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        # Every row as literals: a control byte per 128 pairs plus the pixels
+        pairs = width // 2
+        self.max_bytes = rle565.HEADER_SIZE + height * (
+            (pairs + rle565.MAX_LITERAL - 1) // rle565.MAX_LITERAL + 2 * width)
+        numbers = existing()
+        self.number = max(numbers) if numbers else 0
+        self.busy = False
+        self.filename = None
+        self._file = None
+        self._frame = None
+        self._row = 0
+
+    def room(self):
+        """How many more screenshots fit, assuming none compresses"""
+        return max(free_bytes() - RESERVE, 0) // self.max_bytes
+
+    def start(self, buffer):
+        """Begin saving buffer; False if busy or flash is too full"""
+        if self.busy:
+            return False
+        if not self.room():
+            print(f"Screenshot skipped: under {(RESERVE + self.max_bytes) // 1024} KB flash free")
+            return False
+        try:
+            self._frame = bytes(buffer)
+        except MemoryError:
+            self._frame = buffer    # no RAM for a copy: code the live rows
+        filename = f"{PREFIX}{self.number + 1:03d}{EXTENSION}"
+        try:
+            self._file = open(filename, 'wb')
+        except OSError as e:
+            print(f"Screenshot failed: {e}")
+            self._frame = None
+            return False
+        # Only a file that was created uses up its number
+        self.number += 1
+        self.filename = filename
+        try:
+            self._file.write(rle565.header(self.width, self.height))
+        except OSError as e:
+            print(f"Screenshot failed: {e}")
+            self._finish()
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+            return False
+        self._row = 0
+        self.busy = True
+        return True
+
+    def step(self, rows=ROWS_PER_STEP):
+        """Code and write the next rows; True once the file is complete"""
+        if not self.busy:
+            return False
+        out = bytearray()
+        end = min(self._row + rows, self.height)
+        for y in range(self._row, end):
+            rle565.encode_row(self._frame, y, self.width, out)
+        self._row = end
+        try:
+            self._file.write(out)
+        except OSError as e:
+            print(f"Screenshot failed: {e}")
+            self._finish()
+            try:
+                os.remove(self.filename)
+            except OSError:
+                pass
+            return False
+        if end < self.height:
+            return False
+        size = self._file.tell()
+        self._finish()
+        more = max(free_bytes() - RESERVE, 0) // max(size, 1)
+        print(f"Screenshot saved: {self.filename} ({size // 1024} KB, about {more} more fit)")
+        return True
+
+    def _finish(self):
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        self._file = None
+        self._frame = None
+        self.busy = False
@@ -0,0 +1,17 @@
+# esp32.py
+"""
+Host stand-in for MicroPython's esp32 module, for the simulator.
+
+wake_on_ext0() only records the pin and level in _ext0, so a script can
+check what would wake the board from deep sleep.
+"""
+
+WAKEUP_ALL_LOW = False
+WAKEUP_ANY_HIGH = True
+
+_ext0 = None
+
+
+def wake_on_ext0(pin, level):
+    global _ext0
+    _ext0 = (pin, level)
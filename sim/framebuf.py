@@ -0,0 +1,268 @@
+# framebuf.py
+"""
+Host work-alike of MicroPython's framebuf, for the simulator.
+
+Covers what the tracker uses: RGB565, MONO_HLSB/HMSB/VLSB, GS2_HMSB and
+GS8 buffers with pixel, fill, fill_rect, hline, vline, rect, line,
+ellipse and blit with a key colour and a palette. As on the device,
+rows of packed formats start on a byte boundary and a palette is applied
+before the key is compared. text() draws nothing; the tracker has its
+own tiny font.
+
+Pure Python, so it is slower than the C original but gives the same
+pixels.
+"""
+import math
+from array import array
+
+MONO_VLSB = 0
+RGB565 = 1
+GS4_HMSB = 2
+MONO_HLSB = 3
+MONO_HMSB = 4
+GS2_HMSB = 5
+GS8 = 6
+MVLSB = MONO_VLSB
+
+
+# Pixel values in each byte of the packed formats, left to right
+_UNPACK = {
+    MONO_HLSB: [tuple((b >> (7 - k)) & 1 for k in range(8)) for b in range(256)],
+    MONO_HMSB: [tuple((b >> k) & 1 for k in range(8)) for b in range(256)],
+    GS2_HMSB: [tuple((b >> (2 * k)) & 3 for k in range(4)) for b in range(256)],
+    GS8: [(b,) for b in range(256)],
+}
+_TABLES = {}        # (format, palette colours, key) -> _lookup() tables
+_VALUES = {MONO_HLSB: 2, MONO_HMSB: 2, MONO_VLSB: 2, GS2_HMSB: 4, GS4_HMSB: 16, GS8: 256}
+
+
+def _lookup(fmt, colors, key):
+    """Per source byte: its pixels as RGB565 bytes (0 where keyed), and
+    a mask that is 0xFFFF where the key leaves the destination pixel"""
+    entry = (fmt, tuple(colors), key)
+    tables = _TABLES.get(entry)
+    if tables is None:
+        pixels = []
+        keep = []
+        for vals in _UNPACK[fmt]:
+            row = [colors[v] for v in vals]
+            pixels.append(array('H', [0 if c == key else c for c in row]).tobytes())
+            keep.append(array('H', [0xFFFF if c == key else 0 for c in row]).tobytes())
+        tables = _TABLES[entry] = (pixels, keep)
+    return tables
+
+
+class FrameBuffer:
+    def __init__(self, buffer, width, height, format, stride=None):
+        self.buf = buffer
+        self._w = width
+        self._h = height
+        self._fmt = format
+        self._stride = width if stride is None else stride
+        # Like MicroPython, packed formats start each row on a byte boundary
+        if format in (MONO_HLSB, MONO_HMSB):
+            self._stride = (self._stride + 7) & ~7
+        elif format == GS2_HMSB:
+            self._stride = (self._stride + 3) & ~3
+        elif format == GS4_HMSB:
+            self._stride = (self._stride + 1) & ~1
+        if format == RGB565:
+            self._px = memoryview(buffer).cast('B').cast('H')
+        else:
+            self._px = None
+
+    def _get(self, x, y):
+        f = self._fmt
+        if f == RGB565:
+            return self._px[x + y * self._stride]
+        if f == MONO_HLSB:
+            i = (x + y * self._stride) >> 3
+            return (self.buf[i] >> (7 - (x & 7))) & 1
+        if f == MONO_HMSB:
+            i = (x + y * self._stride) >> 3
+            return (self.buf[i] >> (x & 7)) & 1
+        if f == MONO_VLSB:
+            return (self.buf[(y >> 3) * self._stride + x] >> (y & 7)) & 1
+        if f == GS8:
+            return self.buf[x + y * self._stride]
+        if f == GS2_HMSB:
+            i = (x + y * self._stride) >> 2
+            return (self.buf[i] >> ((x & 3) << 1)) & 3
+        raise ValueError("unsupported format")
+
+    def _set(self, x, y, c):
+        f = self._fmt
+        if f == RGB565:
+            self._px[x + y * self._stride] = c & 0xFFFF
+        elif f == MONO_HLSB:
+            i = (x + y * self._stride) >> 3
+            b = 0x80 >> (x & 7)
+            self.buf[i] = (self.buf[i] | b) if c & 1 else (self.buf[i] & ~b & 0xFF)
+        elif f == MONO_HMSB:
+            i = (x + y * self._stride) >> 3
+            b = 1 << (x & 7)
+            self.buf[i] = (self.buf[i] | b) if c & 1 else (self.buf[i] & ~b & 0xFF)
+        elif f == MONO_VLSB:
+            i = (y >> 3) * self._stride + x
+            b = 1 << (y & 7)
+            self.buf[i] = (self.buf[i] | b) if c & 1 else (self.buf[i] & ~b & 0xFF)
+        elif f == GS8:
+            self.buf[x + y * self._stride] = c & 0xFF
+        elif f == GS2_HMSB:
+            i = (x + y * self._stride) >> 2
+            shift = (x & 3) << 1
+            self.buf[i] = (self.buf[i] & ~(3 << shift) & 0xFF) | ((c & 3) << shift)
+        else:
+            raise ValueError("unsupported format")
+
+    def pixel(self, x, y, c=None):
+        if 0 <= x < self._w and 0 <= y < self._h:
+            if c is None:
+                return self._get(x, y)
+            self._set(x, y, c)
+        elif c is None:
+            return None
+
+    def fill(self, c):
+        if self._fmt == RGB565:
+            v = c & 0xFFFF
+            self.buf[:] = bytes((v & 0xFF, v >> 8)) * (len(self.buf) // 2)
+        elif self._fmt in (MONO_HLSB, MONO_HMSB, MONO_VLSB):
+            self.buf[:] = (b'\xff' if c & 1 else b'\x00') * len(self.buf)
+        else:
+            self.fill_rect(0, 0, self._w, self._h, c)
+
+    def fill_rect(self, x, y, w, h, c):
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, self._w), min(y + h, self._h)
+        if x0 >= x1 or y0 >= y1:
+            return
+        if self._fmt == RGB565:
+            # A row at a time through the 16-bit view
+            row = array('H', [c & 0xFFFF]) * (x1 - x0)
+            for yy in range(y0, y1):
+                i = yy * self._stride
+                self._px[i + x0:i + x1] = row
+            return
+        for yy in range(y0, y1):
+            for xx in range(x0, x1):
+                self._set(xx, yy, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            return self.fill_rect(x, y, w, h, c)
+        self.hline(x, y, w, c)
+        self.hline(x, y + h - 1, w, c)
+        self.vline(x, y, h, c)
+        self.vline(x + w - 1, y, h, c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def line(self, x0, y0, x1, y1, c):
+        dx, dy = abs(x1 - x0), -abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        err = dx + dy
+        while True:
+            self.pixel(x0, y0, c)
+            if x0 == x1 and y0 == y1:
+                break
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x0 += sx
+            if e2 <= dx:
+                err += dx
+                y0 += sy
+
+    def ellipse(self, x0, y0, xr, yr, c, f=False, m=15):
+        if f:
+            for dy in range(-yr, yr + 1):
+                half = int(xr * math.sqrt(max(0.0, 1 - (dy / yr) ** 2))) if yr else xr
+                self.hline(x0 - half, y0 + dy, 2 * half + 1, c)
+            return
+        n = max(8, int(4 * (xr + yr)))
+        for k in range(n):
+            a = 2 * math.pi * k / n
+            self.pixel(int(round(x0 + xr * math.cos(a))), int(round(y0 + yr * math.sin(a))), c)
+
+    def _row(self, y, x0, x1):
+        """Pixel values x0..x1-1 of row y, unpacked a byte at a time"""
+        f = self._fmt
+        if f == RGB565:
+            i = y * self._stride
+            return self._px[i + x0:i + x1].tolist()
+        unpack = _UNPACK.get(f)
+        if unpack is None:
+            return [self._get(x, y) for x in range(x0, x1)]
+        per = len(unpack[0])
+        i = y * self._stride // per
+        row = self.buf[i + x0 // per:i + (x1 + per - 1) // per]
+        skip = x0 % per
+        return [v for b in row for v in unpack[b]][skip:skip + x1 - x0]
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        if isinstance(fbuf, tuple):
+            fbuf = FrameBuffer(*fbuf)
+        # Clip once, and read the palette once rather than per pixel
+        sx0, sx1 = max(0, -x), min(fbuf._w, self._w - x)
+        sy0, sy1 = max(0, -y), min(fbuf._h, self._h - y)
+        if sx0 >= sx1 or sy0 >= sy1:
+            return
+        colors = None
+        if palette is not None:
+            colors = [palette._get(i, 0) for i in range(palette._w)]
+            # Values past the end of the palette read as 0
+            colors += [0] * (_VALUES.get(fbuf._fmt, 65536) - len(colors))
+        unpack = _UNPACK.get(fbuf._fmt)
+        if self._fmt == RGB565 and unpack is not None and sx0 % len(unpack[0]) == 0:
+            return self._blit_packed(fbuf, x, y, sx0, sx1, sy0, sy1, key,
+                                     colors or range(_VALUES[fbuf._fmt]))
+        for sy in range(sy0, sy1):
+            dy = y + sy
+            vals = fbuf._row(sy, sx0, sx1)
+            if colors is not None:
+                vals = [colors[v] for v in vals]
+            if self._fmt != RGB565:
+                for k, col in enumerate(vals):
+                    if col != key:
+                        self._set(x + sx0 + k, dy, col)
+                continue
+            # A row at a time through the 16-bit view, keeping keyed pixels
+            i = dy * self._stride + x
+            if key in vals:
+                vals = [d if v == key else v
+                        for v, d in zip(vals, self._px[i + sx0:i + sx1].tolist())]
+            self._px[i + sx0:i + sx1] = array('H', vals)
+
+    def _blit_packed(self, fbuf, x, y, sx0, sx1, sy0, sy1, key, colors):
+        """blit of a packed source into RGB565 by table lookup per source
+        byte, merged into each row with one wide integer operation"""
+        pixels, keep = _lookup(fbuf._fmt, colors, key)
+        per = len(_UNPACK[fbuf._fmt][0])
+        size = (sx1 - sx0) * 2
+        first = sx0 // per
+        count = (sx1 - sx0 + per - 1) // per
+        dest = self._px.cast('B')
+        for sy in range(sy0, sy1):
+            i = sy * fbuf._stride // per + first
+            row = fbuf.buf[i:i + count]
+            src = b''.join([pixels[b] for b in row])[:size]
+            mask = b''.join([keep[b] for b in row])[:size]
+            j = ((y + sy) * self._stride + x + sx0) * 2
+            if mask.count(0) == size:
+                dest[j:j + size] = src
+                continue
+            old = int.from_bytes(dest[j:j + size], 'little')
+            merged = int.from_bytes(src, 'little') | (old & int.from_bytes(mask, 'little'))
+            dest[j:j + size] = merged.to_bytes(size, 'little')
+
+    def scroll(self, dx, dy):
+        raise NotImplementedError("scroll is not simulated")
+
+    def text(self, s, x, y, c=1):
+        pass
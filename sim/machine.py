@@ -0,0 +1,125 @@
+# machine.py
+"""
+Host stand-in for MicroPython's machine module, for the simulator.
+
+Pin, PWM and SPI accept the device's arguments and do nothing, except:
+- Pin.press() and Pin.release() drive an input and call its IRQ handler,
+  so a script can work the BOOT button.
+- SPI.write() of a whole frame (anything over 1000 bytes, which only the
+  LCD's show() sends) calls SPI.on_frame with the bytes. panel.FrameSink
+  is the usual handler.
+- RTC().memory() keeps its bytes in the module. Set _reset_cause to
+  DEEPSLEEP_RESET to make the next tracker resume from them, and
+  _wake_reason to EXT0_WAKE for a wake by the BOOT button.
+- deepsleep() raises DeepSleep, which ends the run like a real sleep
+  would end the program.
+"""
+
+PWRON_RESET = 1
+HARD_RESET = 2
+WDT_RESET = 3
+DEEPSLEEP_RESET = 4
+SOFT_RESET = 5
+EXT0_WAKE = 2
+TIMER_WAKE = 4
+
+_reset_cause = PWRON_RESET
+_wake_reason = 0
+_rtc_mem = bytearray()
+
+
+class Pin:
+    IN = 1
+    OUT = 3
+    PULL_UP = 2
+    PULL_DOWN = 1
+    IRQ_FALLING = 2
+    IRQ_RISING = 1
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self._v = 1 if pull == Pin.PULL_UP else (value or 0)
+        self._handler = None
+
+    def value(self, v=None):
+        if v is None:
+            return self._v
+        self._v = v
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+    def on(self):
+        self._v = 1
+
+    def off(self):
+        self._v = 0
+
+    def irq(self, handler=None, trigger=0):
+        self._handler = handler
+
+    def press(self):
+        """Pull the pin low, as the BOOT button does"""
+        self._v = 0
+        if self._handler:
+            self._handler(self)
+
+    def release(self):
+        self._v = 1
+        if self._handler:
+            self._handler(self)
+
+
+class PWM:
+    def __init__(self, pin, freq=1000, duty_u16=0):
+        self._duty = duty_u16
+        self._freq = freq
+
+    def freq(self, f=None):
+        if f is None:
+            return self._freq
+        self._freq = f
+
+    def duty_u16(self, d=None):
+        if d is None:
+            return self._duty
+        self._duty = d
+
+
+class SPI:
+    on_frame = None     # called with each frame written to the panel
+
+    def __init__(self, id, baudrate=0, polarity=0, phase=0, sck=None, mosi=None, miso=None):
+        pass
+
+    def write(self, data):
+        if len(data) > 1000 and SPI.on_frame is not None:
+            SPI.on_frame(data)
+
+
+class RTC:
+    def memory(self, data=None):
+        global _rtc_mem
+        if data is None:
+            return bytes(_rtc_mem)
+        _rtc_mem = bytearray(data)
+
+
+class DeepSleep(Exception):
+    pass
+
+
+def reset_cause():
+    return _reset_cause
+
+
+def wake_reason():
+    return _wake_reason
+
+
+def deepsleep(ms=0):
+    raise DeepSleep(ms)
+
+
+def freq(f=None):
+    return 240000000
@@ -0,0 +1,70 @@
+# network.py
+"""
+Host stand-in for MicroPython's network module, for the simulator.
+
+One WLAN per interface. connect() succeeds at once with a fixed address,
+scan() finds the network set in SCAN_RESULTS, and drop() disconnects it
+as if the access point went away.
+"""
+
+STA_IF = 0
+AP_IF = 1
+STAT_IDLE = 1000
+STAT_CONNECTING = 1001
+STAT_GOT_IP = 1010
+
+SCAN_RESULTS = [(b'YOUR_SSID', b'\x11\x22\x33\x44\x55\x66', 6, -50, 3, False)]
+_ifaces = {}
+
+
+class WLAN:
+    def __new__(cls, iface=STA_IF):
+        if iface not in _ifaces:
+            wlan = object.__new__(cls)
+            wlan._init(iface)
+            _ifaces[iface] = wlan
+        return _ifaces[iface]
+
+    def _init(self, iface):
+        self._active = False
+        self._connected = False
+        self._cfg = {'ssid': ''}
+        self._ifc = ('0.0.0.0', '0.0.0.0', '0.0.0.0', '0.0.0.0')
+
+    def active(self, a=None):
+        if a is None:
+            return self._active
+        self._active = a
+
+    def connect(self, ssid=None, key=None, bssid=None):
+        self._cfg['ssid'] = ssid
+        self._connected = True
+        self._ifc = ('192.168.1.50', '255.255.255.0', '192.168.1.1', '192.168.1.1')
+
+    def disconnect(self):
+        self._connected = False
+
+    def drop(self):
+        """Lose the link, as if the access point went away"""
+        self._connected = False
+
+    def isconnected(self):
+        return self._connected
+
+    def status(self, param=None):
+        if param == 'rssi':
+            return -55
+        return STAT_GOT_IP if self._connected else STAT_IDLE
+
+    def ifconfig(self, cfg=None):
+        if cfg is None:
+            return self._ifc
+        self._ifc = tuple(cfg)
+
+    def config(self, *args, **kw):
+        if args:
+            return self._cfg.get(args[0], b'\x00' * 6 if args[0] == 'mac' else 0)
+        self._cfg.update(kw)
+
+    def scan(self):
+        return list(SCAN_RESULTS)
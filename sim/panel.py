@@ -0,0 +1,55 @@
+# panel.py
+"""
+Frames the simulated LCD receives, kept in memory or saved as PNG.
+
+The tracker's colours are byte-swapped RGB565: the panel reads each
+pixel big-endian. to_image() does the same, so a saved frame shows what
+the screen would.
+"""
+import os
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+WIDTH = 240
+HEIGHT = 240
+
+
+def to_image(frame):
+    """PIL image of a frame as the panel shows it"""
+    if Image is None:
+        raise RuntimeError("Pillow is required to save frames: pip install Pillow")
+    swapped = bytearray(len(frame))
+    swapped[0::2] = frame[1::2]
+    swapped[1::2] = frame[0::2]
+    return Image.frombytes("RGB", (WIDTH, HEIGHT), bytes(swapped), "raw", "BGR;16")
+
+
+class FrameSink:
+    """Handler for machine.SPI.on_frame. Keeps the last frame, saves every
+    save_every-th as a PNG in out_dir, and raises KeyboardInterrupt (which
+    ends the tracker's main loop cleanly) once limit frames have arrived."""
+
+    def __init__(self, limit=None, save_every=0, out_dir='.', on_frame=None):
+        self.limit = limit
+        self.save_every = save_every
+        self.out_dir = out_dir
+        self.on_frame = on_frame
+        self.count = 0
+        self.last = None
+
+    def __call__(self, data):
+        self.count += 1
+        self.last = bytes(data)
+        if self.save_every and self.count % self.save_every == 0:
+            self.save(os.path.join(self.out_dir, f"frame_{self.count:05d}.png"))
+        if self.on_frame is not None:
+            self.on_frame(self)
+        if self.limit is not None and self.count >= self.limit:
+            raise KeyboardInterrupt
+
+    def save(self, path):
+        to_image(self.last).save(path)
+        print(f"Saved {path}")
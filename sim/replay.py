@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Replay a recorded sequence of ISS fixes through the tracker, as fast as
+it can draw.
+
+The tracker runs on the simulated hardware as in run_sim.py, but its
+main loop is replaced by this driver. At each fix the virtual clock is
+set to the fix time and the fix goes in through set_fix(), as if Open
+Notify had answered. Then --frames-per-fix frames are drawn, spread
+evenly over the time to the next fix, with the same per-frame work as
+run(): dead reckoning, heading, draw_radar, forecast, night side and
+trail log. Nothing waits and nothing touches the network, so a day of
+orbits takes seconds and a run is the same every time.
+
+Fixes come from:
+  trail_N.bin   the tracker's own trail log, copied off the device
+  text files    one fix a line, either "unix,lat,lon" or an Open Notify
+                iss-now response (a log of curl calls, say)
+  neither       the recorded elements in run_sim.TLES, a fix every --step s
+
+At the end it prints frames per second and the SHA-1 of the final
+frame. A change that should not alter the picture must keep the SHA-1;
+--expect checks it.
+
+Usage:
+    python sim/replay.py --hours 24 --save-last
+    python sim/replay.py trail_*.bin --lat 51.5 --lon -0.13 --frames-per-fix 4
+    python sim/replay.py --hours 6 --expect 3f2a...
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+
+import run_sim      # puts the simulator's modules first on the path
+import machine      # noqa: E402
+import trail_log    # noqa: E402
+from panel import FrameSink     # noqa: E402
+
+STEP = 30               # s between generated fixes, the tracker's in-range poll interval
+
+
+def log_fixes(path):
+    """(unix, lat, lon) records of one trail log segment; a torn last record is dropped"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    usable = len(data) // trail_log.RECORD_SIZE * trail_log.RECORD_SIZE
+    return [(t, lat / 100, lon / 100) for t, lat, lon in
+            struct.iter_unpack(trail_log.RECORD, data[:usable])]
+
+
+def text_fixes(path):
+    """(unix, lat, lon) from "unix,lat,lon" lines or Open Notify responses"""
+    fixes = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('{'):
+                data = json.loads(line)
+                position = data['iss_position']
+                fixes.append((int(data['timestamp']), float(position['latitude']),
+                              float(position['longitude'])))
+                continue
+            fields = line.split(',')
+            try:
+                fixes.append((int(float(fields[0])), float(fields[1]), float(fields[2])))
+            except (ValueError, IndexError):
+                pass    # a header line
+    return fixes
+
+
+def orbit_fixes(start, hours, step):
+    """A fix every step s from the recorded ISS elements"""
+    import orbit
+    iss = orbit.parse_tle(run_sim.TLES[25544])
+    return [(t,) + tuple(iss.subpoint(t)) for t in range(start, start + int(hours * 3600), step)]
+
+
+def load_fixes(paths):
+    fixes = []
+    for path in paths:
+        fixes.extend(log_fixes(path) if path.endswith('.bin') else text_fixes(path))
+    fixes.sort(key=lambda fix: fix[0])
+    # Two fixes for one second would leave no time to draw between them
+    return [fix for k, fix in enumerate(fixes) if k == 0 or fix[0] != fixes[k - 1][0]]
+
+
+def replay(tracker, clock, fixes, frames_per_fix):
+    """Draw frames_per_fix frames per fix; the virtual clock follows the fixes"""
+    start = fixes[0][0]
+    for k, (unix_s, lat, lon) in enumerate(fixes):
+        fix_ms = (unix_s - start) * 1000
+        gap = (fixes[k + 1][0] - unix_s) * 1000 if k + 1 < len(fixes) else STEP * 1000
+        clock.advance(fix_ms - clock.ms)
+        tracker.set_fix(lat, lon, unix_s)
+        for j in range(frames_per_fix):
+            clock.advance(fix_ms + gap * j / frames_per_fix - clock.ms)
+            frame(tracker)
+
+
+def frame(tracker):
+    """One pass of run()'s loop, less the network, button and sleep"""
+    if tracker.motion.ready:
+        lat, lon = tracker.motion.position(time.ticks_ms())
+        tracker.iss_data['lat'] = lat
+        tracker.iss_data['lon'] = lon
+    tracker.update_heading()
+    tracker.draw_radar()
+    tracker.update_forecast()
+    now = tracker.unix_time()
+    if tracker.layer is not None and tracker.layer.daylight is not None:
+        tracker.layer.daylight.update(now)
+    if tracker.trail_log.due(now):
+        tracker.trail_log.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded ISS fixes through the tracker")
+    parser.add_argument("fixes", nargs="*",
+                        help="Trail log segments (.bin) or text files of fixes (default: from the recorded elements)")
+    parser.add_argument("--frames-per-fix", type=int, default=1, help="Frames drawn per fix (default: 1)")
+    parser.add_argument("--hours", type=float, default=24, help="Hours of generated fixes (default: 24)")
+    parser.add_argument("--step", type=int, default=STEP, help=f"s between generated fixes (default: {STEP})")
+    parser.add_argument("--start", type=int, default=run_sim.START_UNIX, help="Unix time of the first generated fix")
+    parser.add_argument("--lat", type=float, default=40.7128, help="Observer latitude")
+    parser.add_argument("--lon", type=float, default=-74.0060, help="Observer longitude")
+    parser.add_argument("--zoom", type=int, default=0, help="Zoom level index (default: 0, the widest)")
+    parser.add_argument("--workdir", help="Directory standing in for flash (default: a fresh temporary one)")
+    parser.add_argument("--save-every", type=int, default=0, help="Save every Nth frame as PNG (default: none)")
+    parser.add_argument("--save-last", action="store_true", help="Save the final frame as replay.png")
+    parser.add_argument("--expect", help="SHA-1 the final frame must have; exit 1 otherwise")
+    parser.add_argument("--profile", action="store_true", help="Profile the replay and print the top functions")
+    args = parser.parse_args()
+
+    paths = [os.path.abspath(path) for path in args.fixes]
+    fixes = load_fixes(paths) if paths else orbit_fixes(args.start, args.hours, args.step)
+    if not fixes:
+        sys.exit("No fixes to replay")
+    out_dir = os.getcwd()
+
+    clock = run_sim.install(fixes[0][0])
+    # A fresh directory each time, so no cache or log of an earlier run leaks in
+    scratch = None
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+        os.chdir(args.workdir)
+    else:
+        scratch = tempfile.TemporaryDirectory(prefix="iss-replay-")
+        os.chdir(scratch.name)
+    sink = FrameSink(None, args.save_every, out_dir)
+    machine.SPI.on_frame = sink
+
+    module = run_sim.load_tracker()
+    tracker = module.ISSTracker()
+    # Only the fixes move the ISS: no elements and no other satellites
+    tracker.orbit = None
+    tracker.satellites.set_models([])
+    tracker.set_location(args.lat, args.lon)
+    if args.zoom:
+        tracker.set_zoom(args.zoom)
+    sink.count = 0
+    gc.collect()
+
+    wall = time.perf_counter()
+    if args.profile:
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.runcall(replay, tracker, clock, fixes, args.frames_per_fix)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+    else:
+        replay(tracker, clock, fixes, args.frames_per_fix)
+    wall = time.perf_counter() - wall
+    tracker.trail_log.flush()
+
+    digest = hashlib.sha1(tracker.lcd.buffer).hexdigest()
+    if args.save_last:
+        sink.save(os.path.join(out_dir, "replay.png"))
+    os.chdir(out_dir)
+    if scratch is not None:
+        scratch.cleanup()
+    print(f"{len(fixes)} fixes, {sink.count} frames, {clock.ms / 3600000:.1f} h simulated "
+          f"in {wall:.1f} s ({sink.count / wall:.1f} frames/s)")
+    print(f"Final frame SHA-1 {digest}")
+    if args.expect and args.expect != digest:
+        sys.exit(f"Final frame differs from {args.expect}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Run the tracker on the host, unmodified, against simulated hardware.
+
+framebuf, machine, network and urequests are replaced by the work-alikes
+in this directory, and time by a virtual clock (simclock.py), so
+iss-tracker.py runs as it would on the ESP32. It draws into the same
+240x240 buffer and writes its caches to the working directory. Frames
+the LCD receives are kept by panel.FrameSink and can be saved as PNG.
+
+Requests are answered offline. Open Notify reports the ISS where the
+recorded elements put it at the virtual time. ip-api.com returns the
+location given, and CelesTrak returns the recorded elements (TLES).
+--recording adds or overrides routes from a JSON file of URL prefix ->
+body. --forward sends any other request to the network, for example to
+a local test server.
+
+Usage:
+    python sim/run_sim.py --frames 200 --save-every 50 --workdir /tmp/iss-sim
+    python sim/run_sim.py --lat 51.5 --lon -0.13 --frames 1000 --profile
+"""
+
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import sys
+import time
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SIM_DIR)
+sys.path.insert(0, SIM_DIR)
+sys.path.insert(1, REPO_DIR)
+
+import machine      # noqa: E402  (the simulator's, found first on the path)
+import simclock     # noqa: E402
+import urequests    # noqa: E402
+from panel import FrameSink     # noqa: E402
+
+START_UNIX = 1729400000     # 2024-10-20 04:53 UTC, a day after the TLE epoch
+TLES = {
+    25544: "ISS (ZARYA)\n"
+           "1 25544U 98067A   24293.50000000  .00020000  00000-0  35000-3 0  9991\n"
+           "2 25544  51.6400 120.0000 0007000  60.0000 300.0000 15.50000000470000\n",
+    48274: "CSS (TIANHE)\n"
+           "1 48274U 21035A   24293.50000000  .00020000  00000-0  25000-3 0  9991\n"
+           "2 48274  41.4700 200.0000 0005000  90.0000  40.0000 15.60000000190000\n",
+    20580: "HST\n"
+           "1 20580U 90037B   24293.50000000  .00002000  00000-0  10000-3 0  9991\n"
+           "2 20580  28.4700 250.0000 0002500  80.0000 150.0000 15.28000000700000\n",
+}
+
+
+def install(start_unix=START_UNIX):
+    """Put the virtual clock in place and return it"""
+    clock = simclock.Clock(start_unix)
+    clock.install()
+    if not hasattr(gc, 'mem_free'):
+        gc.mem_free = lambda: 2000000   # the S3's PSRAM, near enough
+        gc.mem_alloc = lambda: 100000
+    return clock
+
+
+def offline_routes(clock, lat, lon):
+    """Answer the tracker's three APIs from the recorded elements"""
+    import orbit
+    iss = orbit.parse_tle(TLES[25544])
+
+    def iss_now(url):
+        now = clock.time()
+        plat, plon = iss.subpoint(now)
+        return json.dumps({"message": "success", "timestamp": now,
+                           "iss_position": {"latitude": f"{plat:.4f}", "longitude": f"{plon:.4f}"}}).encode()
+
+    def celestrak(url):
+        for catnr, tle in TLES.items():
+            if f"CATNR={catnr}&" in url or url.endswith(f"CATNR={catnr}"):
+                return tle.encode()
+        return b"No GP data found"
+
+    urequests.routes['http://api.open-notify.org'] = iss_now
+    urequests.routes['http://ip-api.com'] = lambda url: json.dumps({"lat": lat, "lon": lon}).encode()
+    urequests.routes['https://celestrak.org'] = celestrak
+
+
+def load_tracker():
+    """iss-tracker.py as a module (its name is not importable as is)"""
+    spec = importlib.util.spec_from_file_location('iss_tracker', os.path.join(REPO_DIR, 'iss-tracker.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the ISS tracker on simulated hardware")
+    parser.add_argument("--frames", type=int, default=100, help="Frames to run for (default: 100)")
+    parser.add_argument("--save-every", type=int, default=0, help="Save every Nth frame as PNG (default: none)")
+    parser.add_argument("--save-last", action="store_true", help="Save the last frame as last.png")
+    parser.add_argument("--workdir", default="sim_out",
+                        help="Directory standing in for the device's flash (default: sim_out)")
+    parser.add_argument("--lat", type=float, default=40.7128, help="Location ip-api.com reports")
+    parser.add_argument("--lon", type=float, default=-74.0060, help="Location ip-api.com reports")
+    parser.add_argument("--start", type=int, default=START_UNIX, help="Virtual unix time at boot")
+    parser.add_argument("--recording", help="JSON of URL prefix -> response body, tried before the built-in routes")
+    parser.add_argument("--forward", action="store_true", help="Fetch unrouted URLs from the network")
+    parser.add_argument("--no-boot", action="store_true", help="Skip the boot animation")
+    parser.add_argument("--profile", action="store_true", help="Profile the run and print the top functions")
+    args = parser.parse_args()
+
+    clock = install(args.start)
+    offline_routes(clock, args.lat, args.lon)
+    if args.recording:
+        recorded = dict(urequests.routes)
+        urequests.routes.clear()
+        urequests.load(os.path.abspath(args.recording))
+        urequests.routes.update({k: v for k, v in recorded.items() if k not in urequests.routes})
+    urequests.FORWARD = args.forward
+
+    os.makedirs(args.workdir, exist_ok=True)
+    os.chdir(args.workdir)
+    sink = FrameSink(args.frames, args.save_every)
+    machine.SPI.on_frame = sink
+
+    module = load_tracker()
+    tracker = module.ISSTracker()
+    if args.no_boot:
+        tracker.boot_animation = lambda: None
+
+    wall = time.perf_counter()
+    if args.profile:
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.runcall(tracker.run)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+    else:
+        tracker.run()
+    wall = time.perf_counter() - wall
+    if args.save_last and sink.last is not None:
+        sink.save("last.png")
+    print(f"{sink.count} frames, {clock.ms / 1000:.0f} s simulated in {wall:.1f} s "
+          f"({sink.count / wall:.1f} frames/s)")
+
+
+if __name__ == "__main__":
+    main()
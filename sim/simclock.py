@@ -0,0 +1,49 @@
+# simclock.py
+"""
+Virtual clock for the simulator.
+
+install() points time.ticks_ms/us, ticks_diff, ticks_add, sleep_ms/us
+and time.time at a Clock. Sleeping advances the clock instead of
+waiting, so simulated hours pass as fast as the tracker can draw, and a
+run is the same every time. The tick counters wrap at 2**30 like
+MicroPython's. advance() moves time on without sleeping.
+"""
+import time as _time
+
+TICKS_MASK = 0x3FFFFFFF
+TICKS_HALF = 0x20000000
+
+
+class Clock:
+    def __init__(self, start_unix=1729350000.0):
+        self.ms = 0.0
+        self.start_unix = start_unix
+
+    def ticks_ms(self):
+        return int(self.ms) & TICKS_MASK
+
+    def ticks_us(self):
+        return int(self.ms * 1000) & TICKS_MASK
+
+    def ticks_diff(self, a, b):
+        d = (a - b) & TICKS_MASK
+        return d - TICKS_MASK - 1 if d & TICKS_HALF else d
+
+    def ticks_add(self, a, d):
+        return (a + d) & TICKS_MASK
+
+    def sleep_ms(self, ms):
+        self.ms += ms
+
+    def sleep_us(self, us):
+        self.ms += us / 1000
+
+    def time(self):
+        return int(self.start_unix + self.ms / 1000)
+
+    def advance(self, ms):
+        self.ms += ms
+
+    def install(self):
+        for name in ('ticks_ms', 'ticks_us', 'ticks_diff', 'ticks_add', 'sleep_ms', 'sleep_us', 'time'):
+            setattr(_time, name, getattr(self, name))
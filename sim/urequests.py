@@ -0,0 +1,74 @@
+# urequests.py
+"""
+Host stand-in for MicroPython's urequests, for the simulator.
+
+Requests are answered from routes, a dict of URL prefix -> handler. A
+handler takes the URL and returns the body as bytes, or a Response. A
+recording (see load()) maps URL prefixes to fixed bodies. With FORWARD
+set, URLs no route matches are fetched for real, for example from a
+local test server. Anything else raises OSError, like a failed request
+on the device.
+"""
+import io
+import json as _json
+import urllib.request
+
+routes = {}
+FORWARD = False
+TIMEOUT = 10
+
+
+class Response:
+    def __init__(self, body, status=200):
+        self.raw = io.BytesIO(body)
+        self.status_code = status
+        self._content = None
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = self.raw.read()
+        return self._content
+
+    @property
+    def text(self):
+        return self.content.decode()
+
+    def json(self):
+        return _json.loads(self.content)
+
+    def close(self):
+        pass
+
+
+def load(path):
+    """Add the routes of a recording: JSON of URL prefix -> response body"""
+    with open(path) as f:
+        for prefix, body in _json.load(f).items():
+            data = body.encode()
+            routes[prefix] = lambda url, data=data: data
+
+
+def request(method, url, data=None, json=None, headers={}, **kw):
+    for prefix, handler in routes.items():
+        if url.startswith(prefix):
+            r = handler(url)
+            return r if isinstance(r, Response) else Response(r)
+    if FORWARD:
+        if json is not None:
+            data = _json.dumps(json).encode()
+        req = urllib.request.Request(url, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=TIMEOUT) as r:
+                return Response(r.read(), r.status)
+        except OSError as e:
+            raise OSError(-1, str(e))
+    raise OSError(-2, 'no route for ' + url)
+
+
+def get(url, **kw):
+    return request('GET', url, **kw)
+
+
+def post(url, **kw):
+    return request('POST', url, **kw)
@@ -0,0 +1,95 @@
+# snapshot.py
+"""
+State kept across deep sleep, so a wake can skip the cold start.
+
+Before sleeping the tracker packs its clock (its unix time and the RTC,
+which runs on through the sleep), last fix, location, zoom, sweep angle
+and the newest TAIL_POINTS trail points into one small binary record. It
+goes to RTC memory, which survives deep sleep but not a power cut, or to
+SNAPSHOT_FILE on flash where the port has no RTC memory or the record
+does not fit. On wake the record is read back and cleared, so a later
+cold boot never resumes from stale state.
+"""
+import os
+import struct
+import machine
+
+SNAPSHOT_FILE = 'resume.bin'
+MAGIC = b'ISS2'
+TAIL_POINTS = 400       # 1.6 KB of trail; ESP32 RTC user memory holds 2 KB
+FIELDS = ('slept_at', 'sleep_ms', 'fix_lat', 'fix_lon', 'fix_time', 'user_lat',
+          'user_lon', 'location_time', 'sweep', 'heading', 'zoom', 'rtc_at')
+HEADER = '<4sIIffIffIffBIH'    # magic, FIELDS, trail point count
+HEADER_SIZE = struct.calcsize(HEADER)
+
+
+def pack(state, trail):
+    """Record bytes for state (a dict with FIELDS) and the newest trail points"""
+    n = min(trail.count, TAIL_POINTS)
+    buf = bytearray(HEADER_SIZE + 4 * n)
+    struct.pack_into(HEADER, buf, 0, MAGIC, *([state[k] for k in FIELDS] + [n]))
+    geo = trail.geo
+    for k in range(n):
+        i = trail.slot(trail.count - n + k) * 2
+        struct.pack_into('<hh', buf, HEADER_SIZE + 4 * k, geo[i], geo[i + 1])
+    return buf
+
+
+def unpack(data):
+    """(state dict, list of (lat, lon) degrees) from record bytes, or None"""
+    if len(data) < HEADER_SIZE or data[:4] != MAGIC:
+        return None
+    values = struct.unpack_from(HEADER, data)
+    n = values[-1]
+    if len(data) < HEADER_SIZE + 4 * n:
+        return None
+    state = dict(zip(FIELDS, values[1:-1]))
+    points = []
+    for k in range(n):
+        lat, lon = struct.unpack_from('<hh', data, HEADER_SIZE + 4 * k)
+        points.append((lat / 100, lon / 100))
+    return state, points
+
+
+def save(state, trail, path=SNAPSHOT_FILE):
+    """Store the record in RTC memory, else on flash; returns where it went"""
+    buf = pack(state, trail)
+    try:
+        machine.RTC().memory(buf)
+        return 'rtc'
+    except (AttributeError, ValueError, OSError):
+        pass                # no RTC memory on this port, or too small
+    try:
+        with open(path, 'wb') as f:
+            f.write(buf)
+        return 'flash'
+    except OSError as e:
+        print(f"Snapshot write failed: {e}")
+        return None
+
+
+def load(path=SNAPSHOT_FILE):
+    """The record saved before sleeping, from RTC memory or flash, or None"""
+    try:
+        found = unpack(machine.RTC().memory())
+        if found is not None:
+            return found
+    except (AttributeError, ValueError, OSError):
+        pass
+    try:
+        with open(path, 'rb') as f:
+            return unpack(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def clear(path=SNAPSHOT_FILE):
+    """Forget the record once it has been used"""
+    try:
+        machine.RTC().memory(b'')
+    except (AttributeError, ValueError, OSError):
+        pass
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,76 @@
+# sprites.py
+"""
+The ISS icon pre-rotated to a fixed set of headings.
+
+Rotating a bitmap means a trig-heavy loop over every pixel, far too slow
+to do each frame. Instead the icon is rotated once at startup into
+HEADINGS small MONO_HLSB frame buffers (57 bytes each for the 15x11 icon),
+and a frame just blits the one nearest the heading through a one-colour
+palette. Only the first quarter turn is actually resampled; the other
+three are exact 90 degree turns of it.
+"""
+import math
+import framebuf
+
+HEADINGS = 32
+SUBSAMPLES = 2          # per axis; keeps the 1 px lines joined on diagonals
+
+
+class RotatedSprite:
+    def __init__(self, data, width, height, on=0xFFFF, headings=HEADINGS):
+        """data: width * height RGB565 values, pixels equal to `on` are drawn.
+        Frame k shows the sprite turned clockwise by k * 360 / headings
+        degrees, so a sprite facing up follows a compass heading."""
+        if headings % 4:
+            raise ValueError("headings must be a multiple of 4")
+        self.headings = headings
+        self.size = size = int(math.sqrt(width * width + height * height) + 1) | 1
+        row_bytes = (size + 7) // 8
+        self.frames = [framebuf.FrameBuffer(bytearray(row_bytes * size), size, size,
+                                            framebuf.MONO_HLSB)
+                       for _ in range(headings)]
+        quarter = headings // 4
+        for k in range(quarter):
+            self._rotate(data, width, height, on, 2 * math.pi * k / headings, self.frames[k])
+        for k in range(quarter, headings):
+            self._turn(self.frames[k - quarter], self.frames[k])
+
+    def _rotate(self, data, width, height, on, angle, fb):
+        """Resample the sprite turned clockwise by angle (radians)"""
+        size = self.size
+        c, s = math.cos(angle), math.sin(angle)
+        cx, cy = (width - 1) / 2, (height - 1) / 2
+        half = size // 2
+        n = SUBSAMPLES
+        offsets = [(i + 0.5) / n - 0.5 for i in range(n)]
+        for v in range(size):
+            for u in range(size):
+                hits = 0
+                for oy in offsets:
+                    dy = v - half + oy
+                    for ox in offsets:
+                        dx = u - half + ox
+                        # Inverse rotation back into the source sprite
+                        x = int(math.floor(dx * c + dy * s + cx + 0.5))
+                        y = int(math.floor(dy * c - dx * s + cy + 0.5))
+                        if 0 <= x < width and 0 <= y < height and data[y * width + x] == on:
+                            hits += 1
+                if hits * 2 >= n * n:
+                    fb.pixel(u, v, 1)
+
+    def _turn(self, src, dst):
+        """dst = src turned a quarter clockwise"""
+        last = self.size - 1
+        for v in range(self.size):
+            for u in range(self.size):
+                if src.pixel(v, last - u):
+                    dst.pixel(u, v, 1)
+
+    def frame(self, heading):
+        """Frame nearest a heading in degrees clockwise from up"""
+        return self.frames[int(heading * self.headings / 360 + 0.5) % self.headings]
+
+    def draw(self, display, x, y, heading, palette):
+        """Blit centred on x, y; palette maps colour 1 (colour 0 is transparent)"""
+        half = self.size // 2
+        display.blit(self.frame(heading), x - half, y - half, 0, palette)
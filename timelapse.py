@@ -0,0 +1,184 @@
+# timelapse.py
+"""
+Time-lapse of the radar: a frame every few minutes into one container
+file, so the mandala can be watched forming afterwards.
+
+The first capture in a file is a keyframe, coded with rle565 like a
+screenshot. Later captures are deltas: each row XORed with the same row
+of the previous capture and then coded the same way, so an unchanged row
+shrinks to one 5-byte run and a delta is mostly the new trail and the
+sweep. A keyframe is written again every KEYFRAME_EVERY captures, so a
+damaged record only spoils the frames up to the next one.
+
+Like screenshots.py, a capture copies the frame buffer once and is then
+coded and written ROWS_PER_STEP rows per frame. After the file header
+(MAGIC, width, height) each record is
+
+    kind (b'K' or b'D'), unix s (uint32), coded rows, END
+
+and a record without its END marker was cut short by a reset. When the
+file passes MAX_BYTES, or its last record is torn, it is renamed to
+OLD_FILE and a fresh file begins with a keyframe, so flash use stays
+under two files' worth. convert_timelapse.py rebuilds the frames on the
+host.
+"""
+import os
+import struct
+import rle565
+
+TIMELAPSE_FILE = 'timelapse.bin'
+OLD_FILE = 'timelapse.old'
+MAGIC = b'TLP1'
+HEADER = '<4sHH'        # magic, width, height
+HEADER_SIZE = 8
+RECORD = '<cI'          # kind, unix s
+RECORD_SIZE = 5
+KEYFRAME = b'K'
+DELTA = b'D'
+END = b'TEND'
+KEYFRAME_EVERY = 12     # captures, so hourly at one per 5 minutes
+MAX_BYTES = 512 * 1024
+ROWS_PER_STEP = 8
+
+
+def _size(path):
+    try:
+        return os.stat(path)[6]
+    except OSError:
+        return -1
+
+
+class TimeLapse:
+    def __init__(self, width, height, path=TIMELAPSE_FILE, old_path=OLD_FILE,
+                 max_bytes=MAX_BYTES):
+        self.width = width
+        self.height = height
+        self.path = path
+        self.old_path = old_path
+        self.max_bytes = max_bytes
+        self.busy = False
+        self.frames = 0             # captures completed since boot
+        self._size = self._check()
+        self._prev = None           # last capture, which the next delta is against
+        self._since_key = 0
+        self._frame = None
+        self._file = None
+        self._key = False
+        self._row = 0
+        # An unchanged row XORs to zeros; code that once
+        self._same_row = bytearray()
+        rle565.encode_row(bytes(width * 2), 0, width, self._same_row)
+
+    def _check(self):
+        """Bytes in an intact container to append to, or -1 to start afresh"""
+        size = _size(self.path)
+        if size < HEADER_SIZE:
+            return -1
+        try:
+            with open(self.path, 'rb') as f:
+                head = f.read(HEADER_SIZE)
+                f.seek(size - len(END))
+                tail = f.read(len(END))
+        except OSError:
+            return -1
+        if head != struct.pack(HEADER, MAGIC, self.width, self.height) or \
+                (size > HEADER_SIZE and tail != END):
+            print("Time-lapse file torn or from another display, starting a new one")
+            self._rotate()
+            return -1
+        return size
+
+    def _rotate(self):
+        try:
+            os.remove(self.old_path)
+        except OSError:
+            pass
+        try:
+            os.rename(self.path, self.old_path)
+        except OSError:
+            pass
+
+    def start(self, buffer, unix_s):
+        """Begin a capture of buffer; False if busy or it could not start"""
+        if self.busy:
+            return False
+        try:
+            self._frame = bytes(buffer)
+        except MemoryError:
+            print("Time-lapse frame skipped: no RAM for a copy")
+            return False
+        if self._size >= self.max_bytes:
+            self._rotate()
+            self._size = -1
+        fresh = self._size < 0
+        self._key = fresh or self._prev is None or self._since_key >= KEYFRAME_EVERY
+        try:
+            self._file = open(self.path, 'ab')
+            if fresh:
+                self._file.write(struct.pack(HEADER, MAGIC, self.width, self.height))
+            self._file.write(struct.pack(RECORD, KEYFRAME if self._key else DELTA, unix_s or 0))
+        except OSError as e:
+            print(f"Time-lapse write failed: {e}")
+            self._abandon()
+            return False
+        self._size = max(self._size, 0)
+        self._row = 0
+        self.busy = True
+        return True
+
+    def step(self, rows=ROWS_PER_STEP):
+        """Code and write the next rows; True once the capture is complete"""
+        if not self.busy:
+            return False
+        out = bytearray()
+        stride = self.width * 2
+        end = min(self._row + rows, self.height)
+        for y in range(self._row, end):
+            if self._key:
+                rle565.encode_row(self._frame, y, self.width, out)
+                continue
+            a = self._frame[y * stride:(y + 1) * stride]
+            b = self._prev[y * stride:(y + 1) * stride]
+            if a == b:
+                out.extend(self._same_row)
+            else:
+                # One wide XOR in C rather than a loop over 480 bytes
+                diff = (int.from_bytes(a, 'little') ^ int.from_bytes(b, 'little')).to_bytes(stride, 'little')
+                rle565.encode_row(diff, 0, self.width, out)
+        self._row = end
+        if end == self.height:
+            out.extend(END)
+        try:
+            self._file.write(out)
+        except OSError as e:
+            print(f"Time-lapse write failed: {e}")
+            self._abandon()
+            return False
+        if end < self.height:
+            return False
+        size = self._file.tell()
+        self._file.close()
+        self._file = None
+        self._since_key = 1 if self._key else self._since_key + 1
+        self._prev = self._frame
+        self._frame = None
+        self.busy = False
+        self.frames += 1
+        print(f"Time-lapse frame {self.frames} ({'key' if self._key else 'delta'}, "
+              f"{(size - self._size) // 1024} KB, file {size // 1024} KB)")
+        self._size = size
+        return True
+
+    def _abandon(self):
+        """Drop a capture that failed part-way; the torn file is rotated"""
+        try:
+            if self._file is not None:
+                self._file.close()
+        except OSError:
+            pass
+        self._file = None
+        self._frame = None
+        self._prev = None
+        self.busy = False
+        self._rotate()
+        self._size = -1
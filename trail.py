@@ -0,0 +1,98 @@
+# trail.py
+"""
+Ground tracks kept in geographic coordinates, so they survive a zoom change.
+
+Each point is stored once, as int16 centidegrees (4 bytes a point), in a
+ring. Every zoom level has its own view: the same ring projected to int16
+screen points through geometry.Observer.project(). A view remembers how
+many points it has projected, so bringing one up to date only projects the
+points added since it was last shown. A zoom switch back to a level costs
+a few projections instead of the whole trail.
+"""
+import math
+from array import array
+
+# Degrees of arc between stored points (~500 km): 5 px at the widest zoom,
+# as the screen-space trail had, so TRAIL_POINTS still span about a day.
+# Narrower zooms join the points with longer dashed chords.
+SPACING = 4.5
+
+
+class GeoTrail:
+    def __init__(self, size, spacing=SPACING):
+        self.size = size
+        self.spacing = spacing
+        self.geo = array('h', bytes(4 * size))  # lat, lon in centidegrees
+        self.head = 0           # next slot in the ring
+        self.count = 0
+        self.total = 0          # points ever added
+        self._views = {}        # key -> [screen points, total when projected]
+
+    def due(self, lat, lon):
+        """True if lat, lon is far enough from the newest point to be stored"""
+        if not self.count:
+            return True
+        i = ((self.head - 1) % self.size) * 2
+        dlat = lat - self.geo[i] / 100
+        dlon = (lon - self.geo[i + 1] / 100 + 180) % 360 - 180
+        dlon *= math.cos(math.radians(lat))
+        return dlat * dlat + dlon * dlon >= self.spacing * self.spacing
+
+    def append(self, lat, lon):
+        """Store a point, overwriting the oldest once the ring is full"""
+        i = self.head * 2
+        self.geo[i] = int(round(lat * 100))
+        self.geo[i + 1] = int(round(lon * 100))
+        self.head = (self.head + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+        self.total += 1
+
+    def add(self, lat, lon):
+        """append() if due(); True if the point was stored"""
+        if not self.due(lat, lon):
+            return False
+        self.append(lat, lon)
+        return True
+
+    def slot(self, k):
+        """Ring slot of the k-th oldest point"""
+        return (self.head - self.count + k) % self.size
+
+    def view(self, key, observer, km_per_px, max_range):
+        """Screen x, y pairs for every slot, projected for this zoom level.
+
+        Only points added since the view was last brought up to date are
+        projected; slots beyond max_range hold -1, -1.
+        """
+        view = self._views.get(key)
+        if view is None:
+            view = [array('h', bytes(4 * self.size)), 0]
+            self._views[key] = view
+        xy, done = view
+        new = min(self.total - done, self.count)
+        if new:
+            start = (self.head - new) % self.size
+            end = start + new
+            geo, out = memoryview(self.geo), memoryview(xy)
+            if end > self.size:
+                # Wrapped: the tail of the ring and then its start
+                observer.project(geo[2 * start:], out[2 * start:], km_per_px,
+                                 max_range=max_range, scale=0.01)
+                start, end = 0, end - self.size
+            observer.project(geo[2 * start:2 * end], out[2 * start:2 * end], km_per_px,
+                             max_range=max_range, scale=0.01)
+            view[1] = self.total
+        return xy
+
+    def drop(self, key):
+        """Forget one zoom level's view, e.g. when its layers are evicted"""
+        self._views.pop(key, None)
+
+    def reproject(self):
+        """Forget every view; the observer moved"""
+        self._views = {}
+
+    def clear(self):
+        self.head = self.count = self.total = 0
+        self._views = {}
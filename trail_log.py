@@ -0,0 +1,158 @@
+# trail_log.py
+"""
+Append-only log of ISS trail points on flash, so a reboot or power blip
+does not wipe the trail that has built up over hours.
+
+Each point is one 8-byte record: unix seconds (uint32) and latitude and
+longitude in centidegrees (int16), the same units trail.GeoTrail keeps.
+The timestamp is absolute rather than a delta from the previous record,
+so a record torn by a power cut never corrupts the ones after it.
+
+Records go to a ring of SEGMENTS fixed-size files. When one is full the
+oldest is truncated and reused, so the log never grows past
+SEGMENTS * SEGMENT_RECORDS * 8 bytes and every block is rewritten only
+once per trip round the ring. Points are collected in RAM and written
+BATCH at a time (or after FLUSH_AFTER seconds), one short append per
+flush, so the frame loop never waits on flash for long.
+
+At boot replay() reads the segments back oldest first with readinto()
+into one reused buffer and appends the last hours of points to a
+GeoTrail; its first view then projects them all in one batch.
+"""
+import os
+import struct
+
+SEGMENT_FILE = 'trail_{}.bin'
+SEGMENTS = 4
+SEGMENT_RECORDS = 2048  # 16 KB a segment, 64 KB in all
+RECORD = '<Ihh'
+RECORD_SIZE = 8
+BATCH = 32              # records per flash write
+FLUSH_AFTER = 300       # s a point may wait in RAM
+READ_RECORDS = 128      # records per readinto() on replay
+
+
+def _size(path):
+    try:
+        return os.stat(path)[6]
+    except OSError:
+        return -1
+
+
+class TrailLog:
+    def __init__(self, pattern=SEGMENT_FILE, segments=SEGMENTS,
+                 segment_records=SEGMENT_RECORDS):
+        self.pattern = pattern
+        self.segments = segments
+        self.segment_records = segment_records
+        self._pending = bytearray(BATCH * RECORD_SIZE)
+        self._pending_count = 0
+        self._pending_since = 0
+        order = self._scan()
+        self._index = order[-1][1] if order else 0
+        self._count = 0         # records in the current segment
+        size = _size(self._path(self._index))
+        if size > 0 and (size % RECORD_SIZE or size >= segment_records * RECORD_SIZE):
+            self._rotate()      # torn last record or full: start the next segment
+        elif size > 0:
+            self._count = size // RECORD_SIZE
+
+    def _path(self, index):
+        return self.pattern.format(index)
+
+    def _scan(self):
+        """(first unix s, index) of the segments holding records, oldest first"""
+        first = []
+        buf = bytearray(RECORD_SIZE)
+        for i in range(self.segments):
+            try:
+                with open(self._path(i), 'rb') as f:
+                    if (f.readinto(buf) or 0) == RECORD_SIZE:
+                        first.append((struct.unpack_from(RECORD, buf)[0], i))
+            except OSError:
+                pass
+        first.sort()
+        return first
+
+    def _rotate(self):
+        self._index = (self._index + 1) % self.segments
+        self._count = 0
+        try:
+            open(self._path(self._index), 'wb').close()
+        except OSError as e:
+            print(f"Trail log rotate failed: {e}")
+
+    def append(self, unix_s, lat, lon):
+        """Queue a trail point; flush() writes it out"""
+        if not unix_s:
+            return
+        if self._pending_count == BATCH:
+            self.flush()
+        if not self._pending_count:
+            self._pending_since = unix_s
+        struct.pack_into(RECORD, self._pending, self._pending_count * RECORD_SIZE,
+                         unix_s, int(round(lat * 100)), int(round(lon * 100)))
+        self._pending_count += 1
+
+    def due(self, unix_s):
+        """True when a batch is full or its oldest point has waited FLUSH_AFTER"""
+        return self._pending_count == BATCH or (
+            self._pending_count and unix_s - self._pending_since >= FLUSH_AFTER)
+
+    def flush(self):
+        """Append the queued points, rotating segments as they fill"""
+        data = memoryview(self._pending)
+        done = 0
+        total = self._pending_count
+        try:
+            while done < total:
+                room = self.segment_records - self._count
+                if room <= 0:
+                    self._rotate()
+                    continue
+                n = min(room, total - done)
+                with open(self._path(self._index), 'ab') as f:
+                    f.write(data[done * RECORD_SIZE:(done + n) * RECORD_SIZE])
+                self._count += n
+                done += n
+        except OSError as e:
+            print(f"Trail log write failed: {e}")
+        self._pending_count = 0
+
+    def replay(self, trail, since=0):
+        """Append logged points newer than since (unix s) to a GeoTrail, oldest
+        first; returns how many were read back. Records the trail's ring would
+        only overwrite again are skipped with a seek, so at most trail.size
+        of them are read."""
+        order = self._scan()
+        sizes = [max(_size(self._path(index)), 0) // RECORD_SIZE for _, index in order]
+        # Newest first, find the segment and offset the last trail.size records start at
+        skip = [0] * len(order)
+        wanted = trail.size
+        first = len(order)
+        while first > 0 and wanted > 0:
+            first -= 1
+            wanted -= sizes[first]
+            if order[first][0] < since:
+                break           # older segments hold nothing newer than since
+        if wanted < 0:
+            skip[first] = -wanted
+        buf = bytearray(READ_RECORDS * RECORD_SIZE)
+        count = 0
+        for k in range(first, len(order)):
+            try:
+                with open(self._path(order[k][1]), 'rb') as f:
+                    if skip[k]:
+                        f.seek(skip[k] * RECORD_SIZE)
+                    while True:
+                        n = (f.readinto(buf) or 0) // RECORD_SIZE
+                        for i in range(n):
+                            t, lat, lon = struct.unpack_from(RECORD, buf, i * RECORD_SIZE)
+                            if t >= since:
+                                trail.append(lat / 100, lon / 100)
+                                count += 1
+                        if n < READ_RECORDS:
+                            break
+            except OSError:
+                pass
+        return count
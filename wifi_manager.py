@@ -0,0 +1,195 @@
+# wifi_manager.py
+"""
+WiFi connection manager for the ISS tracker.
+
+Remembers the access point (BSSID, channel) and IP settings of the last good
+connection on flash, so a reboot or outage can reassociate directly with that
+AP and skip the scan and DHCP exchange. Falls back to a full scan + DHCP
+connect when the fast path fails. Connection phases are timed so reconnect
+latency can be reported.
+"""
+import network
+import time
+import os
+import json
+import binascii
+
+CACHE_FILE = 'wifi.json'
+FAST_TIMEOUT = 4000       # ms to wait for a direct reconnect before scanning
+FULL_TIMEOUT = 20000      # ms to wait for a full scan + DHCP connect
+RETRY_INTERVAL = 10000    # ms between reconnect attempts while the link is down
+FAST_RETRIES = 3          # direct reconnects tried before falling back to DHCP
+
+
+class WiFiManager:
+    def __init__(self, ssid, password, static_ip=None):
+        self.ssid = ssid
+        self.password = password
+        self.static_ip = static_ip
+        self.wlan = network.WLAN(network.STA_IF)
+        self.connected = False
+        self.timings = {}
+        self._cache = self._load()
+        self._lost_at = None
+        self._last_attempt = 0
+        self._retries = 0
+
+    def _load(self):
+        try:
+            with open(CACHE_FILE) as f:
+                cache = json.load(f)
+            if cache.get('ssid') == self.ssid:
+                return cache
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _save(self, bssid, channel):
+        self._cache = {
+            'ssid': self.ssid,
+            'bssid': binascii.hexlify(bssid).decode() if bssid else None,
+            'channel': channel,
+            'ifconfig': list(self.wlan.ifconfig()),
+        }
+        try:
+            with open(CACHE_FILE, 'w') as f:
+                json.dump(self._cache, f)
+        except OSError as e:
+            print(f"WiFi cache write failed: {e}")
+
+    def forget(self):
+        """Drop the cached AP and lease, e.g. when the reused IP turns out bad."""
+        self._cache = None
+        try:
+            os.remove(CACHE_FILE)
+        except OSError:
+            pass
+
+    def _cached_bssid(self):
+        if self._cache and self._cache.get('bssid'):
+            return binascii.unhexlify(self._cache['bssid'])
+        return None
+
+    def _set_ip(self, use_lease):
+        """Static IP if configured, else the cached lease (fast path) or DHCP."""
+        try:
+            if self.static_ip:
+                self.wlan.ifconfig(self.static_ip)
+            elif use_lease and self._cache and self._cache.get('ifconfig'):
+                self.wlan.ifconfig(tuple(self._cache['ifconfig']))
+            else:
+                self.wlan.ifconfig('dhcp')
+        except (OSError, ValueError, TypeError):
+            pass
+
+    def _wait(self, timeout_ms, idle):
+        start = time.ticks_ms()
+        while not self.wlan.isconnected():
+            if time.ticks_diff(time.ticks_ms(), start) >= timeout_ms:
+                return False
+            if idle:
+                idle()
+            time.sleep_ms(5)
+        return True
+
+    def _scan(self):
+        """Strongest AP advertising our SSID as (bssid, channel), or (None, 0)."""
+        best = None
+        try:
+            for ap in self.wlan.scan():
+                if ap[0].decode() == self.ssid and (best is None or ap[3] > best[2]):
+                    best = (ap[1], ap[2], ap[3])
+        except OSError:
+            pass
+        return (best[0], best[1]) if best else (None, 0)
+
+    def _start(self, bssid, channel, use_lease):
+        self._set_ip(use_lease)
+        if channel:
+            try:
+                self.wlan.config(channel=channel)
+            except (OSError, ValueError, TypeError):
+                pass
+        if bssid:
+            self.wlan.connect(self.ssid, self.password, bssid=bssid)
+        else:
+            self.wlan.connect(self.ssid, self.password)
+
+    def connect(self, idle=None):
+        """Blocking connect, fast path first. idle() is called while waiting."""
+        self.wlan.active(True)
+        t0 = time.ticks_ms()
+        self.timings = {}
+
+        if self.wlan.isconnected():
+            self.connected = True
+            self.timings['mode'] = 'already'
+            return True
+
+        bssid = self._cached_bssid()
+        if bssid:
+            self._start(bssid, self._cache.get('channel', 0), True)
+            if self._wait(FAST_TIMEOUT, idle):
+                self.connected = True
+                self.timings['mode'] = 'fast'
+                self.timings['total_ms'] = time.ticks_diff(time.ticks_ms(), t0)
+                self._report()
+                return True
+            self.wlan.disconnect()
+
+        t_scan = time.ticks_ms()
+        bssid, channel = self._scan()
+        self.timings['scan_ms'] = time.ticks_diff(time.ticks_ms(), t_scan)
+        t_assoc = time.ticks_ms()
+        self._start(bssid, channel, False)
+        ok = self._wait(FULL_TIMEOUT, idle)
+        self.timings['connect_ms'] = time.ticks_diff(time.ticks_ms(), t_assoc)
+        self.timings['mode'] = 'full'
+        self.timings['total_ms'] = time.ticks_diff(time.ticks_ms(), t0)
+        self.connected = ok
+        if ok:
+            self._save(bssid, channel)
+        self._report()
+        return ok
+
+    def poll(self):
+        """Cheap per-frame link check.
+
+        Returns True when the link came back, False when it was just lost,
+        None when nothing changed. While the link is down a direct reconnect
+        to the cached AP is retried every RETRY_INTERVAL. After FAST_RETRIES
+        of those fail, the router may have rebooted with new leases or the
+        AP been replaced, so the cache is dropped and later retries are plain
+        connects with DHCP.
+        """
+        now = time.ticks_ms()
+        up = self.wlan.isconnected()
+        if up == self.connected:
+            if not up and time.ticks_diff(now, self._last_attempt) >= RETRY_INTERVAL:
+                self._last_attempt = now
+                self._retries += 1
+                try:
+                    if self._retries > FAST_RETRIES and self._cache is not None:
+                        print("WiFi fast reconnect failing, dropping cached AP and lease")
+                        self.forget()
+                        self.wlan.disconnect()
+                    self._start(self._cached_bssid(), 0, True)
+                except OSError:
+                    pass
+            return None
+
+        self.connected = up
+        if not up:
+            self._lost_at = now
+            self._last_attempt = now
+            self._retries = 0
+            return False
+        if self._lost_at is not None:
+            self.timings = {'mode': 'reconnect',
+                            'outage_ms': time.ticks_diff(now, self._lost_at)}
+            self._lost_at = None
+            self._report()
+        return True
+
+    def _report(self):
+        print("WiFi " + ", ".join(f"{k}={v}" for k, v in self.timings.items()))